@@ -5,6 +5,8 @@ import flet as ft
 from services.page_parser import PageParser
 from services.pdf_service import PDFService
 from services.page_manager import PageManager
+from services.metrics import metrics
+from services.log import get_logger
 from ui.message_handler import MessageHandler
 from ui.interactive_preview import InteractivePreview
 from ui.export_options import ExportOptions
@@ -12,6 +14,8 @@ from ui.progress_dialog import ProgressDialog, InlineProgressBar
 from ui.notification_system import NotificationSystem, CompletionDialog
 from ui.credits_dialog import CreditsDialog
 
+logger = get_logger("app")
+
 class AdvancedPDFExtractorApp:
     """Aplicación avanzada de extracción de PDF con funcionalidades interactivas"""
     
@@ -51,8 +55,8 @@ class AdvancedPDFExtractorApp:
         
         # Campo de páginas
         self.pages_input = ft.TextField(
-            label="Páginas (ej: 1,3,5-7)",
-            hint_text="Deja vacío para todas las páginas",
+            label='Páginas (ej: 1,3,5-7,"factura 4471")',
+            hint_text="Deja vacío para todas las páginas; entre comillas busca por texto",
             expand=True
         )
         
@@ -70,6 +74,22 @@ class AdvancedPDFExtractorApp:
             disabled=True
         )
         
+        self.blank_button = ft.OutlinedButton(
+            "Quitar en blanco",
+            icon=ft.Icons.LAYERS_CLEAR,
+            tooltip="Eliminar de la selección las páginas en blanco",
+            on_click=self._remove_blank_pages,
+            disabled=True
+        )
+        
+        self.duplicates_button = ft.OutlinedButton(
+            "Duplicadas",
+            icon=ft.Icons.CONTENT_COPY,
+            tooltip="Agrupar las páginas casi idénticas",
+            on_click=self._find_duplicate_pages,
+            disabled=True
+        )
+        
         self.clear_button = ft.OutlinedButton(
             "Limpiar",
             icon=ft.Icons.CLEAR,
@@ -152,6 +172,8 @@ class AdvancedPDFExtractorApp:
                 ft.Row([
                     self.pages_input,
                     self.preview_button,
+                    self.blank_button,
+                    self.duplicates_button,
                     self.clear_button
                 ]),
                 
@@ -205,10 +227,15 @@ class AdvancedPDFExtractorApp:
         try:
             self.loading_bar.show("Cargando PDF...")
             
-            # Crear servicio PDF
+            # Crear servicio PDF (liberando los documentos del anterior)
+            if self.service:
+                self.service.close()
             self.service = PDFService(file_path)
             self.current_pdf_path = file_path
             
+            # Índice de texto en segundo plano para la selección por contenido
+            threading.Thread(target=self._build_text_index, args=(self.service,), daemon=True).start()
+            
             # Mostrar solo el nombre del archivo
             file_name = Path(file_path).name
             self.file_name_text.value = file_name
@@ -226,6 +253,8 @@ class AdvancedPDFExtractorApp:
             total_pages = self.service.get_total_pages()
             self.status_text.value = f"PDF cargado: {total_pages} páginas"
             self.preview_button.disabled = False
+            self.blank_button.disabled = True
+            self.duplicates_button.disabled = True
             
             # Ocultar barra de carga
             self.loading_bar.hide()
@@ -238,6 +267,20 @@ class AdvancedPDFExtractorApp:
             self.msg.show(f"Error cargando PDF: {ex}", ft.Colors.RED, ft.Icons.ERROR)
             self._reset_state()
     
+    def _parse_pages(self, pages_str: str) -> list:
+        """Páginas de la expresión del campo de páginas (todas si está vacío)"""
+        if not pages_str:
+            return list(range(1, self.service.get_total_pages() + 1))
+        index = None
+        if PageParser.needs_index(pages_str):
+            if not self.service.is_text_index_ready():
+                self.loading_bar.show("Esperando al índice de texto...")
+            index = self.service.get_text_index()
+        pages = PageParser.parse(pages_str, index)
+        if not pages:
+            raise ValueError("Ninguna página coincide con la búsqueda")
+        return pages
+    
     def _preview_pages(self, e):
         """Previsualizar páginas seleccionadas"""
         if not self.service:
@@ -258,33 +301,42 @@ class AdvancedPDFExtractorApp:
                 f"Procesando {pages_str}"
             )
             
-            # Parsear páginas
             pages_str = self.pages_input.value.strip()
-            if not pages_str:
-                # Si no hay páginas especificadas, usar todas
-                pages = list(range(1, self.service.get_total_pages() + 1))
-            else:
-                pages = PageParser.parse(pages_str)
-            
-            # Limpiar manager previo
-            self.page_manager.clear()
             
             # Procesar páginas en hilo separado para no bloquear UI
             def process_pages():
+                try:
+                    # Parsear páginas aquí: una búsqueda por texto espera al índice si aún se está construyendo
+                    pages = self._parse_pages(pages_str)
+                except Exception as ex:
+                    self.loading_bar.hide()
+                    self.is_processing = False
+                    self.msg.show(f"Error parseando páginas: {ex}", ft.Colors.RED)
+                    self.page.update()
+                    return
+                
+                # Limpiar manager previo
+                self.page_manager.clear()
+                
                 try:
                     total = len(pages)
                     for i, page_num in enumerate(pages):
-                        self.loading_bar.update_progress(i, total, f"Renderizando página {page_num}")
+                        with metrics.span("ui.progress_update"):
+                            self.loading_bar.update_progress(i, total, f"Renderizando página {page_num}")
                         
                         if page_num <= self.service.get_total_pages():
-                            img = self.service.render_page(page_num)
+                            with metrics.span("preview.render_page"):
+                                img = self.service.render_page(page_num)
                             if img:
                                 self.page_manager.add_page(page_num, img)
                     
                     # Actualizar preview en hilo principal
                     def update_ui():
-                        self.preview.render_pages(self.page_manager)
+                        with metrics.span("ui.preview_update"):
+                            self.preview.render_pages(self.page_manager)
                         self.export_options.enable_export(self.page_manager.get_selected_pages_count() > 0)
+                        self.blank_button.disabled = False
+                        self.duplicates_button.disabled = False
                         self.status_text.value = f"Páginas seleccionadas: {self.page_manager.get_selected_pages_count()}"
                         self.loading_bar.hide()
                         self.is_processing = False
@@ -311,6 +363,81 @@ class AdvancedPDFExtractorApp:
             self.is_processing = False
             self.msg.show(f"Error parseando páginas: {ex}", ft.Colors.RED)
     
+    def _remove_blank_pages(self, e):
+        """Detectar las páginas en blanco de la selección y eliminarlas de una vez"""
+        if not self.service or self.is_processing:
+            return
+        
+        pages = [p.page_number for p in self.page_manager.get_active_pages()]
+        if not pages:
+            return
+        
+        self.is_processing = True
+        self.loading_bar.show("Buscando páginas en blanco...")
+        
+        def detect_worker():
+            try:
+                blank = self.service.find_blank_pages(pages, progress_callback=self.loading_bar.update_progress)
+                removed = self.page_manager.delete_pages(blank)
+                
+                # Un único refresco de la previsualización para todo el lote
+                self.preview.render_pages(self.page_manager)
+                self.export_options.enable_export(self.page_manager.get_selected_pages_count() > 0)
+                self.status_text.value = f"Páginas seleccionadas: {self.page_manager.get_selected_pages_count()}"
+                self.loading_bar.hide()
+                self.is_processing = False
+                if removed:
+                    self.msg.show(f"{removed} páginas en blanco eliminadas", ft.Colors.BLUE)
+                else:
+                    self.msg.show("No se encontraron páginas en blanco", ft.Colors.BLUE)
+                self.page.update()
+            except Exception as ex:
+                self.loading_bar.hide()
+                self.is_processing = False
+                self.msg.show(f"Error detectando páginas en blanco: {ex}", ft.Colors.RED)
+                self.page.update()
+        
+        threading.Thread(target=detect_worker, daemon=True).start()
+    
+    def _find_duplicate_pages(self, e):
+        """Agrupar las páginas casi idénticas de la selección y mostrarlas por grupos"""
+        if not self.service or self.is_processing:
+            return
+        
+        pages = [p.page_number for p in self.page_manager.get_active_pages()]
+        if len(pages) < 2:
+            return
+        
+        self.is_processing = True
+        self.loading_bar.show("Buscando páginas duplicadas...")
+        
+        def detect_worker():
+            try:
+                groups = self.service.find_duplicate_pages(pages, progress_callback=self.loading_bar.update_progress)
+                self.loading_bar.hide()
+                self.is_processing = False
+                if groups:
+                    self.tabs.selected_index = 0
+                    self.preview.render_duplicate_groups(groups, self.page_manager)
+                    self.msg.show(f"{len(groups)} grupos de páginas duplicadas", ft.Colors.BLUE)
+                else:
+                    self.msg.show("No se encontraron páginas duplicadas", ft.Colors.BLUE)
+                self.page.update()
+            except Exception as ex:
+                self.loading_bar.hide()
+                self.is_processing = False
+                self.msg.show(f"Error buscando duplicadas: {ex}", ft.Colors.RED)
+                self.page.update()
+        
+        threading.Thread(target=detect_worker, daemon=True).start()
+    
+    def _build_text_index(self, service: PDFService):
+        """Construir (o cargar de la caché) el índice de texto del documento"""
+        try:
+            service.get_text_index()
+        except Exception as e:
+            logger.warning("No se pudo indexar el texto", extra={"context": {"error": str(e)}})
+    
     def _on_page_change(self, message: str):
         """Callback para cambios en páginas"""
         self.msg.show(message, ft.Colors.BLUE)
@@ -331,6 +458,12 @@ class AdvancedPDFExtractorApp:
         export_format = export_config['format']
         output_path = export_config['output_path']
         image_format = export_config.get('image_format', 'PNG')
+        encoding_profile = export_config.get('encoding_profile', 'balanced')
+        prefer_embedded = export_config.get('prefer_embedded', False)
+        incremental = export_config.get('incremental', False)
+        deduplicate = export_config.get('deduplicate', False)
+        color_mode = export_config.get('color_mode', 'color')
+        split = export_config.get('split')
         
         # Mostrar progreso tanto inline como en diálogo para máxima visibilidad
         self.loading_bar.show(f"Exportando ({export_format})...")
@@ -340,8 +473,16 @@ class AdvancedPDFExtractorApp:
         format_names = {
             "pdf_combined": "PDF único",
             "pdf_individual": "PDFs individuales",
+            "pdf_split": "PDF dividido",
             "images_zip": f"Imágenes {image_format} (ZIP)",
-            "images_folder": f"Imágenes {image_format} (Carpeta)"
+            "images_folder": f"Imágenes {image_format} (Carpeta)",
+            "images_tar": f"Imágenes {image_format} (TAR)",
+            "images_tiff": "TIFF multipágina",
+            "images_pdf": "PDF de imágenes",
+            "text_txt": "Texto (TXT)",
+            "text_json": "Texto (JSON)",
+            "embedded_zip": "Imágenes incrustadas (ZIP)",
+            "embedded_folder": "Imágenes incrustadas (Carpeta)"
         }
         format_display = format_names.get(export_format, export_format)
         NotificationSystem.show_start_notification(
@@ -352,33 +493,20 @@ class AdvancedPDFExtractorApp:
         def progress_callback(current, total, status):
             try:
                 # Actualizar ambas barras de progreso
-                self.loading_bar.update_progress(current, total, status)
-                dialog_success = self.progress_dialog.update_progress(current, total, status)
+                with metrics.span("ui.progress_update"):
+                    self.loading_bar.update_progress(current, total, status)
+                    dialog_success = self.progress_dialog.update_progress(current, total, status)
                 return dialog_success  # Si el diálogo fue cancelado, detener
             except Exception as e:
-                print(f"Error en callback de progreso: {e}")
+                logger.warning("Error en callback de progreso", extra={"context": {"error": str(e)}})
                 return False
         
         def export_worker():
             try:
-                success = False
-                
-                if export_format == "pdf_combined":
-                    success = self.service.export_combined_pdf(
-                        self.page_manager, output_path, progress_callback
-                    )
-                elif export_format == "pdf_individual":
-                    success = self.service.export_individual_pdfs(
-                        self.page_manager, output_path, progress_callback
-                    )
-                elif export_format == "images_zip":
-                    success = self.service.export_as_images_zip(
-                        self.page_manager, output_path, image_format, progress_callback
-                    )
-                elif export_format == "images_folder":
-                    success = self.service.export_as_images_folder(
-                        self.page_manager, output_path, image_format, progress_callback
-                    )
+                success = self.service.export(
+                    export_format, self.page_manager, output_path, image_format, progress_callback,
+                    encoding_profile, prefer_embedded, incremental, deduplicate, color_mode, split
+                )
                 
                 def finish_export():
                     # Ocultar ambos indicadores de progreso
@@ -390,22 +518,33 @@ class AdvancedPDFExtractorApp:
                         # Calcular número de archivos según el formato
                         active_pages = self.page_manager.get_active_pages()
                         count = len(active_pages)
+                        if export_format == "pdf_split":
+                            count = len(self.service.last_split_report.get("files", []))
                         
-                        # Mensaje de éxito en la interfaz
-                        self.msg.show(f"Exportación completada: {Path(output_path).name}", ft.Colors.GREEN)
+                        # Mensaje de éxito en la interfaz (con el coste de codificación en imágenes)
+                        message = f"Exportación completada: {Path(output_path).name}"
+                        encoding = self.service.last_encoding_report
+                        if export_format in ["images_zip", "images_folder", "images_tar", "images_tiff", "images_pdf"] and encoding.get("pages"):
+                            message += (f" ({encoding['encode_ms_per_page']} ms y "
+                                        f"{encoding['bytes_per_page'] // 1024} KB por página)")
+                        if export_format in ["images_zip", "images_folder", "images_tar"] and encoding.get("embedded_pages"):
+                            message += f" - {encoding['embedded_pages']} páginas con su imagen original"
+                        if export_format in ["images_zip", "images_folder", "images_tar"] and encoding.get("duplicate_pages"):
+                            message += f" - {encoding['duplicate_pages']} páginas duplicadas guardadas una vez"
+                        self.msg.show(message, ft.Colors.GREEN)
                         
                         # Notificación del sistema
                         NotificationSystem.show_completion_notification(
                             "Exportación", 
                             output_path, 
-                            count if export_format in ["pdf_individual", "images_folder"] else 0
+                            count if export_format in ["pdf_individual", "images_folder", "pdf_split"] else 0
                         )
                         
                         # Diálogo de completación con opción de abrir carpeta
                         self.completion_dialog.show_completion_dialog(
                             "Exportación",
                             output_path,
-                            count if export_format in ["pdf_individual", "images_folder"] else 0
+                            count if export_format in ["pdf_individual", "images_folder", "pdf_split"] else 0
                         )
                         
                         # Limpiar path de salida para evitar corrupción en futuras exportaciones
@@ -447,6 +586,8 @@ class AdvancedPDFExtractorApp:
     
     def _reset_state(self):
         """Resetear estado de la aplicación"""
+        if self.service:
+            self.service.close()
         self.service = None
         self.current_pdf_path = ""
         self.is_processing = False
@@ -455,6 +596,8 @@ class AdvancedPDFExtractorApp:
         self.pages_input.value = ""
         self.status_text.value = ""
         self.preview_button.disabled = True
+        self.blank_button.disabled = True
+        self.duplicates_button.disabled = True
         
         self.page_manager.clear()
         self.preview.clear()
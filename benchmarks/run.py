@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de la capa de servicios sobre PDFs sintéticos
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.run --kinds text scanned --pages 10 100 --output resultados.json
+    python -m benchmarks.run --baseline baseline.json --threshold 0.15
+"""
+
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+import pypdf
+import PIL
+
+from benchmarks.synthetic import KINDS, cached_pdf
+from services.log import configure_logging
+from services.metrics import metrics
+from services.export_plan import ExportTarget
+from services.page_manager import PageManager
+from services.pdf_service import PDFService
+from services.resolution_policy import EXPORT_DPI, ExportResolutionPolicy
+
+
+def _time_runs(func, repeat: int) -> list:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def _page_manager(pages: int) -> PageManager:
+    manager = PageManager()
+    for page_num in range(1, pages + 1):
+        manager.add_page(page_num)
+    return manager
+
+
+def run_case(pdf_path: str, pages: int, out_dir: Path, repeat: int, max_render_pages: int) -> dict:
+    """Medir todas las operaciones sobre un documento; devuelve {operación: resultado}"""
+    results = {}
+    service = PDFService(pdf_path)
+    # Las operaciones de render se limitan a una muestra: a 300 DPI 10.000 páginas tardan horas
+    render_pages = min(pages, max_render_pages)
+    sample = _page_manager(render_pages)
+    everything = _page_manager(pages)
+
+    def record(name, func, measured_pages):
+        runs = _time_runs(func, repeat)
+        median = statistics.median(runs)
+        results[name] = {
+            "median_s": median,
+            "min_s": min(runs),
+            "runs": runs,
+            "pages": measured_pages,
+            "per_page_ms": median / measured_pages * 1000 if measured_pages else None,
+        }
+
+    def reset_output(path: Path):
+        if path.is_dir():
+            shutil.rmtree(path)
+        elif path.exists():
+            path.unlink()
+
+    record("open", lambda: PDFService(pdf_path).close(), 1)
+    record("render_thumbnail",
+           lambda: [service.render_page(n) for n in range(1, render_pages + 1)], render_pages)
+    # El render a 300 DPI no sigue la resolución nativa de los escaneos: mide siempre el mismo trabajo
+    fixed_dpi = ExportResolutionPolicy(dpi=EXPORT_DPI, match_native=False)
+    fixed = PDFService(pdf_path, resolution_policy=fixed_dpi)
+    record("render_300dpi",
+           lambda: [fixed.render_page(n, for_export=True) for n in range(1, render_pages + 1)],
+           render_pages)
+    fixed.close()
+
+    combined = out_dir / "combinado.pdf"
+    # Mismo render en dos procesos, con las páginas devueltas por memoria compartida
+    processes = PDFService(pdf_path, resolution_policy=fixed_dpi, render_processes=2)
+    processes.render_page(1)  # Arranque de los procesos, fuera de la medida
+    record("render_300dpi_processes",
+           lambda: [processes.render_page(n, for_export=True) for n in range(1, render_pages + 1)],
+           render_pages)
+    processes.close()
+
+    record("export_combined_pdf",
+           lambda: (reset_output(combined), service.export_combined_pdf(everything, str(combined))),
+           pages)
+
+    individual = out_dir / "individuales"
+    record("export_individual_pdfs",
+           lambda: (reset_output(individual), service.export_individual_pdfs(everything, str(individual))),
+           pages)
+
+    zip_path = out_dir / "imagenes.zip"
+    record("export_images_zip",
+           lambda: (reset_output(zip_path), service.export_as_images_zip(sample, str(zip_path))),
+           render_pages)
+
+    folder = out_dir / "imagenes"
+    record("export_images_folder",
+           lambda: (reset_output(folder), service.export_as_images_folder(sample, str(folder))),
+           render_pages)
+
+    # PDF único + ZIP de imágenes de la misma selección en una sola pasada
+    plan_dir = out_dir / "plan"
+    targets = [ExportTarget("pdf_combined", str(plan_dir / "combinado.pdf")),
+               ExportTarget("images_zip", str(plan_dir / "imagenes.zip"))]
+    record("export_plan",
+           lambda: (reset_output(plan_dir), service.export_plan(sample, targets)),
+           render_pages)
+
+    service.close()
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Devolver las regresiones (mediana por encima de baseline * (1 + umbral))"""
+    regressions = []
+    for case, operations in results["cases"].items():
+        for name, current in operations.items():
+            previous = baseline.get("cases", {}).get(case, {}).get(name)
+            if not previous:
+                continue
+            ratio = current["median_s"] / previous["median_s"] if previous["median_s"] else 1.0
+            current["baseline_ratio"] = ratio
+            if ratio > 1 + threshold:
+                regressions.append(f"{case}/{name}: {previous['median_s']:.4f}s -> "
+                                   f"{current['median_s']:.4f}s ({(ratio - 1) * 100:+.1f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de PDFService con PDFs sintéticos")
+    parser.add_argument("--kinds", nargs="+", default=list(KINDS), choices=KINDS)
+    parser.add_argument("--pages", nargs="+", type=int, default=[10, 100],
+                        help="Tamaños de documento (de 10 a 10000 páginas)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por operación")
+    parser.add_argument("--max-render-pages", type=int, default=10,
+                        help="Páginas renderizadas por las operaciones de imagen")
+    parser.add_argument("--work-dir", help="Carpeta para los PDFs sintéticos (se reutilizan)")
+    parser.add_argument("--output", help="Archivo JSON de resultados (por defecto stdout)")
+    parser.add_argument("--baseline", help="Resultados previos contra los que comparar")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Regresión tolerada sobre la mediana (0.15 = 15%%)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Incluir el desglose de tiempos por etapa en cada caso")
+    args = parser.parse_args()
+    metrics.enabled = metrics.enabled or args.metrics
+    # Solo avisos: los resúmenes INFO de cada repetición ensuciarían la salida
+    configure_logging("WARNING")
+
+    work_dir = Path(args.work_dir or Path(tempfile.gettempdir()) / "pdf_extractor_bench")
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pymupdf": fitz.VersionBind,
+            "pypdf": pypdf.__version__,
+            "pillow": PIL.__version__,
+            "repeat": args.repeat,
+            "max_render_pages": args.max_render_pages,
+        },
+        "cases": {},
+    }
+
+    for kind in args.kinds:
+        for pages in args.pages:
+            case = f"{kind}-{pages}"
+            print(f"Ejecutando {case}...", file=sys.stderr)
+            pdf_path = cached_pdf(kind, pages, str(work_dir))
+            with tempfile.TemporaryDirectory(prefix="bench_out_") as out_dir:
+                metrics.reset()
+                results["cases"][case] = run_case(
+                    pdf_path, pages, Path(out_dir), args.repeat, args.max_render_pages
+                )
+                if metrics.enabled:
+                    results.setdefault("stages", {})[case] = metrics.snapshot()
+
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.threshold)
+        results["regressions"] = regressions
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(output, encoding="utf-8")
+    else:
+        print(output)
+
+    if regressions:
+        print("Regresiones detectadas:", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
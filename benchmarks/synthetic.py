@@ -0,0 +1,107 @@
+"""
+Generación local de PDFs sintéticos para los benchmarks
+"""
+
+import random
+from io import BytesIO
+from pathlib import Path
+
+import fitz  # PyMuPDF
+from PIL import Image, ImageDraw, ImageFilter
+
+KINDS = ("text", "vector", "scanned")
+# Versión de los documentos generados: al cambiar, los PDFs en caché se regeneran
+SYNTHETIC_VERSION = 2
+
+# Tamaño carta en puntos (72 por pulgada)
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+
+LOREM = (
+    "Lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua factura cliente importe total "
+).split()
+
+
+def _text_page(page, rng: random.Random, page_num: int):
+    """Página densa de texto: ~50 líneas en fuente pequeña"""
+    page.insert_text((54, 50), f"Documento sintético - página {page_num}", fontsize=14)
+    y = 80
+    while y < PAGE_HEIGHT - 40:
+        line = " ".join(rng.choice(LOREM) for _ in range(14))
+        page.insert_text((54, y), line, fontsize=9)
+        y += 13
+
+
+def _vector_page(page, rng: random.Random, page_num: int):
+    """Página de dibujo vectorial: cientos de líneas, curvas y rectángulos"""
+    shape = page.new_shape()
+    for _ in range(400):
+        p1 = fitz.Point(rng.uniform(0, PAGE_WIDTH), rng.uniform(0, PAGE_HEIGHT))
+        p2 = fitz.Point(rng.uniform(0, PAGE_WIDTH), rng.uniform(0, PAGE_HEIGHT))
+        shape.draw_line(p1, p2)
+    for _ in range(100):
+        x, y = rng.uniform(0, PAGE_WIDTH - 60), rng.uniform(0, PAGE_HEIGHT - 60)
+        shape.draw_bezier((x, y), (x + 20, y + 60), (x + 40, y - 20), (x + 60, y + 40))
+    shape.finish(color=(0, 0, 0.6), width=0.4)
+    for _ in range(60):
+        x, y = rng.uniform(0, PAGE_WIDTH - 80), rng.uniform(0, PAGE_HEIGHT - 80)
+        shape.draw_rect(fitz.Rect(x, y, x + rng.uniform(10, 80), y + rng.uniform(10, 80)))
+    shape.finish(color=(0.6, 0, 0), fill=(1, 0.9, 0.8), width=0.6)
+    shape.commit()
+    page.insert_text((54, 40), f"Plano sintético - página {page_num}", fontsize=12)
+
+
+def _scan_backgrounds(count: int = 8, dpi: int = 150) -> list:
+    """Fondos de papel escaneado (escala de grises con ruido), reutilizados entre páginas"""
+    width, height = int(8.5 * dpi), int(11 * dpi)
+    return [Image.effect_noise((width, height), 12).point(lambda v: 200 + v // 5) for _ in range(count)]
+
+
+def _scan_page(backgrounds: list, rng: random.Random, page_num: int) -> bytes:
+    """JPEG de una página escaneada: líneas de texto propias de la página sobre un fondo"""
+    img = backgrounds[page_num % len(backgrounds)].copy()
+    width = img.width
+    draw = ImageDraw.Draw(img)
+    for line in range(60):
+        y = 120 + line * 28
+        x_end = rng.randint(width // 2, width - 100)
+        draw.rectangle((100, y, x_end, y + 10), fill=40)
+    draw.text((100, 60), f"ESCANEO {page_num}", fill=0)
+    img = img.filter(ImageFilter.GaussianBlur(0.6))
+    buffer = BytesIO()
+    img.save(buffer, format="JPEG", quality=80)
+    return buffer.getvalue()
+
+
+def generate_pdf(kind: str, pages: int, output_path: str, seed: int = 1234) -> str:
+    """Generar un PDF sintético del tipo indicado y devolver su ruta"""
+    if kind not in KINDS:
+        raise ValueError(f"Tipo de documento desconocido: '{kind}'")
+
+    rng = random.Random(seed)
+    doc = fitz.open()
+    backgrounds = _scan_backgrounds() if kind == "scanned" else None
+
+    for page_num in range(1, pages + 1):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        if kind == "text":
+            _text_page(page, rng, page_num)
+        elif kind == "vector":
+            _vector_page(page, rng, page_num)
+        else:
+            # Cada página recibe su propia imagen (texto distinto), como en un escaneo real:
+            # si se repitieran, PyMuPDF las guardaría una vez y el render las tendría en caché
+            page.insert_image(page.rect, stream=_scan_page(backgrounds, rng, page_num))
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    doc.save(output_path, garbage=1, deflate=True)
+    doc.close()
+    return output_path
+
+
+def cached_pdf(kind: str, pages: int, work_dir: str) -> str:
+    """Reutilizar el PDF sintético si ya existe en la carpeta de trabajo"""
+    path = Path(work_dir) / f"{kind}_{pages}_v{SYNTHETIC_VERSION}.pdf"
+    if not path.exists():
+        generate_pdf(kind, pages, str(path))
+    return str(path)
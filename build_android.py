@@ -42,7 +42,7 @@ version.regex = __version__ = ['"]([^'"]*)['"]
 version.filename = %(source.dir)s/main.py
 
 # Requisitos Python
-requirements = python3,kivy==2.0.0,flet,pypdf,pymupdf,pillow,plyer
+requirements = python3,kivy==2.0.0,flet,pypdf,pymupdf,pillow,plyer,numpy
 
 # Icono y splash
 #icon.filename = %(source.dir)s/assets/icon.png
@@ -38,6 +38,7 @@ hiddenimports = [
     'PIL',
     'pillow',
     'plyer',
+    'numpy',
     'threading',
     'subprocess',
     'asyncio',
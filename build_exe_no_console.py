@@ -28,6 +28,7 @@ hiddenimports = [
     'pypdf', 'pypdf2', 'fitz', 'pymupdf',
     'PIL', 'pillow',
     'plyer', 'plyer.platforms.win.notification',
+    'numpy',
     'threading', 'concurrent.futures', 'asyncio',
     'subprocess', 'multiprocessing',
     'json', 'base64', 'io', 'tempfile',
@@ -1,5 +1,8 @@
+import multiprocessing
+
 import flet as ft
 from app import AdvancedPDFExtractorApp
+from services.log import configure_logging
 
 def main(page: ft.Page):
     page.title = "PDF Extractor"
@@ -26,4 +29,8 @@ def main(page: ft.Page):
     AdvancedPDFExtractorApp(page)
 
 if __name__ == "__main__":
+    # Los procesos de render (PDF_EXTRACTOR_RENDER_PROCESSES) arrancan con "spawn":
+    # en los ejecutables congelados cada proceso hijo vuelve a entrar por aquí
+    multiprocessing.freeze_support()
+    configure_logging()
     ft.app(target=main)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Servicio HTTP local de extracción para integraciones con otras herramientas
+"""
+
+import argparse
+from services.log import configure_logging
+from services.http_service import serve
+from services.metrics import metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP de PDF Extractor Advanced")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección de escucha (por defecto solo local)")
+    parser.add_argument("--port", type=int, default=8765, help="Puerto de escucha")
+    parser.add_argument("--workers", type=int, default=2, help="Hilos trabajadores de la cola")
+    parser.add_argument("--max-pending", type=int, default=16, help="Trabajos máximos en cola")
+    parser.add_argument("--max-documents", type=int, default=8, help="Documentos abiertos en caché")
+    parser.add_argument("--work-dir", help="Carpeta para los resultados de los trabajos")
+    parser.add_argument("--job-ttl", type=float, default=3600,
+                        help="Segundos que se conserva un trabajo terminado y su resultado")
+    parser.add_argument("--max-finished-jobs", type=int, default=100,
+                        help="Trabajos terminados conservados como máximo")
+    parser.add_argument("--root", help="Restringir los PDFs abribles a esta carpeta")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Medir tiempos por etapa (expuestos en /metrics y /metrics.json)")
+    parser.add_argument("--log-level", default=None, help="Nivel de log (DEBUG, INFO, WARNING...)")
+    parser.add_argument("--log-json", action="store_true", default=None, help="Log estructurado en JSON")
+    args = parser.parse_args()
+    configure_logging(args.log_level, args.log_json)
+
+    if args.metrics:
+        metrics.enabled = True
+
+    serve(
+        args.host,
+        args.port,
+        work_dir=args.work_dir,
+        workers=args.workers,
+        max_pending=args.max_pending,
+        max_documents=args.max_documents,
+        allowed_root=args.root,
+        job_ttl=args.job_ttl,
+        max_finished_jobs=args.max_finished_jobs,
+    )
+
+
+if __name__ == "__main__":
+    main()
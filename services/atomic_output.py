@@ -0,0 +1,120 @@
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional
+
+# Durabilidad de las salidas: "file" sincroniza cada archivo y su carpeta al
+# publicarlo, "batch" sincroniza cada archivo antes de renombrarlo pero las
+# carpetas en grupos (un corte de luz puede perder la publicación del último
+# grupo, nunca dejar un archivo a medias con su nombre) y "none" lo deja en
+# manos del sistema operativo
+FSYNC_MODES = ("file", "batch", "none")
+DEFAULT_FSYNC = "batch"
+# Archivos publicados entre sincronizaciones de carpeta en modo "batch"
+FSYNC_BATCH_SIZE = 64
+
+
+def fsync_mode_from_env() -> str:
+    """Modo de durabilidad por defecto (PDF_EXTRACTOR_FSYNC)"""
+    return os.environ.get("PDF_EXTRACTOR_FSYNC", DEFAULT_FSYNC)
+
+
+def _fsync_dir(folder: Path):
+    """Persistir el renombrado (en Windows los directorios no se pueden sincronizar)"""
+    if os.name == "nt":
+        return
+    fd = os.open(folder, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class OutputWriter:
+    """Escritura atómica de las salidas de una exportación
+
+    Cada salida se escribe en un temporal de la misma carpeta y se renombra
+    sobre la ruta final solo si se completó: un fallo o un corte nunca deja un
+    PDF o ZIP truncado con el nombre definitivo. La sincronización a disco
+    sigue el modo elegido; close() sincroniza el grupo pendiente.
+    """
+
+    def __init__(self, fsync: Optional[str] = None, batch_size: int = FSYNC_BATCH_SIZE):
+        self.fsync = fsync or fsync_mode_from_env()
+        if self.fsync not in FSYNC_MODES:
+            raise ValueError(f"Modo de durabilidad desconocido: '{self.fsync}'")
+        self.batch_size = batch_size
+        self._pending: List[Path] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def open(self, path, mode: str = "wb", **kwargs):
+        """Archivo temporal que se publica en path al salir del bloque sin errores"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Nombre único en la misma carpeta (el renombrado es atómico dentro de un volumen);
+        # se crea con open() para conservar los permisos habituales
+        tmp_name = path.with_name(f".{path.name}.{uuid.uuid4().hex[:12]}.tmp")
+        try:
+            with open(tmp_name, mode, **kwargs) as f:
+                yield f
+                # El contenido llega al disco antes que el renombrado que lo publica
+                if self.fsync != "none":
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+        self._published(path)
+
+    def write_bytes(self, path, data: bytes):
+        with self.open(path) as f:
+            f.write(data)
+
+    def link(self, source, path):
+        """Publicar path como enlace duro a source; si el sistema no lo admite, se copia"""
+        path = Path(path)
+        tmp_name = path.with_name(f".{path.name}.{uuid.uuid4().hex[:12]}.tmp")
+        try:
+            os.link(source, tmp_name)
+        except OSError:
+            self.write_bytes(path, Path(source).read_bytes())
+            return
+        os.replace(tmp_name, path)
+        self._published(path)
+
+    def _published(self, path: Path):
+        if self.fsync == "file":
+            _fsync_dir(path.parent)
+        elif self.fsync == "batch":
+            with self._lock:
+                self._pending.append(path)
+                if len(self._pending) < self.batch_size:
+                    return
+                pending, self._pending = self._pending, []
+            self._sync(pending)
+
+    @staticmethod
+    def _sync(paths: List[Path]):
+        # Los archivos ya se sincronizaron antes de renombrarse: falta persistir los renombrados
+        for folder in {path.parent for path in paths}:
+            _fsync_dir(folder)
+
+    def close(self):
+        """Sincronizar las salidas publicadas que quedan del último grupo"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if pending:
+            self._sync(pending)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
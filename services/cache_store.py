@@ -0,0 +1,40 @@
+import hashlib
+import os
+from pathlib import Path
+
+# Bytes leídos del inicio y del final del archivo para la huella
+FINGERPRINT_SAMPLE = 1024 * 1024
+
+
+def cache_root() -> Path:
+    """Carpeta raíz de la caché (PDF_EXTRACTOR_CACHE_DIR o la caché del usuario)"""
+    override = os.environ.get("PDF_EXTRACTOR_CACHE_DIR")
+    if override:
+        return Path(override)
+    if os.name == "nt" and os.environ.get("LOCALAPPDATA"):
+        return Path(os.environ["LOCALAPPDATA"]) / "pdf_extractor" / "cache"
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "pdf_extractor"
+
+
+def document_fingerprint(pdf_path: str) -> str:
+    """Huella del contenido del documento, independiente de su ruta
+
+    Usa el tamaño y muestras del inicio y el final: basta para distinguir
+    versiones de un PDF sin leer archivos de cientos de MB completos.
+    """
+    path = Path(pdf_path)
+    size = path.stat().st_size
+    digest = hashlib.sha1(str(size).encode("ascii"))
+    with open(path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_SAMPLE))
+        if size > FINGERPRINT_SAMPLE:
+            f.seek(max(FINGERPRINT_SAMPLE, size - FINGERPRINT_SAMPLE))
+            digest.update(f.read(FINGERPRINT_SAMPLE))
+    return digest.hexdigest()
+
+
+def document_cache_dir(fingerprint: str) -> Path:
+    """Carpeta de caché de un documento (índices, miniaturas...)"""
+    path = cache_root() / fingerprint
+    path.mkdir(parents=True, exist_ok=True)
+    return path
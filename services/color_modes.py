@@ -0,0 +1,54 @@
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+# Modos de color de las exportaciones de imágenes: "gray" renderiza directamente
+# en escala de grises (un tercio de la memoria de RGB) y "bitonal" además umbraliza
+# a 1 bit por píxel, lo justo para escaneos de texto
+COLOR_MODES = ("color", "gray", "bitonal")
+DEFAULT_COLOR_MODE = "color"
+
+# Compresión TIFF para imágenes de 1 bit (CCITT Grupo 4, la de los archivos documentales)
+BITONAL_TIFF_COMPRESSION = "group4"
+
+
+def check_color_mode(color_mode: str) -> str:
+    if color_mode not in COLOR_MODES:
+        raise ValueError(f"Modo de color desconocido: '{color_mode}'")
+    return color_mode
+
+
+def render_colorspace(color_mode: str) -> fitz.Colorspace:
+    """Espacio de color en el que renderizar para el modo dado"""
+    return fitz.csRGB if check_color_mode(color_mode) == "color" else fitz.csGRAY
+
+
+def pil_mode(colorspace: fitz.Colorspace) -> str:
+    return "L" if colorspace.n == 1 else "RGB"
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """Umbral que mejor separa tinta y fondo (método de Otsu), vectorizado sobre el histograma"""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    weight = np.cumsum(hist)
+    mass = np.cumsum(hist * np.arange(256))
+    total, total_mass = weight[-1], mass[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (total_mass * weight - mass * total) ** 2 / (weight * (total - weight))
+    # Páginas de un solo tono: sin separación posible, todo queda como fondo
+    return int(np.argmax(np.nan_to_num(between)))
+
+
+def pack_bitonal(gray: np.ndarray, threshold: int) -> bytes:
+    """Filas de 1 bit por píxel (1 = blanco), empaquetadas como las espera PNG o PIL"""
+    return np.packbits(gray > threshold, axis=1).tobytes()
+
+
+def to_bitonal(img: Image.Image, threshold: int = None) -> Image.Image:
+    """Imagen de 1 bit a partir de una en escala de grises (umbral de Otsu por defecto)"""
+    gray = np.asarray(img.convert("L"))
+    if threshold is None:
+        threshold = otsu_threshold(gray)
+    bitonal = Image.frombytes("1", img.size, pack_bitonal(gray, threshold))
+    bitonal.info.update(img.info)
+    return bitonal
@@ -0,0 +1,97 @@
+import threading
+from dataclasses import dataclass, field
+
+# Formatos de imagen admitidos en las exportaciones de imágenes
+IMAGE_FORMATS = ("PNG", "JPEG", "TIFF", "WEBP")
+
+# Parámetros de Pillow por perfil y formato: "fast" prioriza el rendimiento,
+# "smallest" el tamaño en disco; "balanced" es el perfil por defecto
+ENCODING_PROFILES = {
+    "fast": {
+        "PNG": {"compress_level": 1},
+        "JPEG": {"quality": 90},
+        "TIFF": {"compression": "packbits"},
+        "WEBP": {"quality": 90, "method": 0},
+    },
+    "balanced": {
+        # Sin optimize: en PNG multiplica el tiempo de codificación casi sin reducir el tamaño
+        "PNG": {"compress_level": 6},
+        "JPEG": {"quality": 95, "optimize": True},
+        "TIFF": {"compression": "tiff_lzw"},
+        "WEBP": {"quality": 90, "method": 2},
+    },
+    "smallest": {
+        "PNG": {"compress_level": 9, "optimize": True},
+        "JPEG": {"quality": 85, "optimize": True, "progressive": True},
+        "TIFF": {"compression": "tiff_adobe_deflate"},
+        "WEBP": {"quality": 80, "method": 6},
+    },
+}
+
+DEFAULT_PROFILE = "balanced"
+
+
+def encode_params(profile: str, image_format: str) -> dict:
+    """Parámetros de Pillow para guardar una imagen con el perfil y formato dados"""
+    if profile not in ENCODING_PROFILES:
+        raise ValueError(f"Perfil de codificación desconocido: '{profile}'")
+    image_format = image_format.upper()
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Formato de imagen desconocido: '{image_format}'")
+    return dict(ENCODING_PROFILES[profile][image_format])
+
+
+def png_compress_level(profile: str) -> int:
+    """Nivel zlib del perfil, para el codificador PNG por franjas"""
+    return encode_params(profile, "PNG")["compress_level"]
+
+
+@dataclass
+class EncodingStats:
+    """Tiempo de codificación y bytes por página medidos durante una exportación"""
+    profile: str
+    image_format: str
+    color_mode: str = "color"
+    pages: int = 0
+    seconds: float = 0.0
+    bytes: int = 0
+    # Páginas escritas con su imagen incrustada original, sin codificar
+    embedded_pages: int = 0
+    embedded_bytes: int = 0
+    # Páginas idénticas a otra ya guardada, que no se volvieron a guardar
+    duplicate_pages: int = 0
+    duplicate_bytes: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, seconds: float, size: int):
+        with self._lock:
+            self.pages += 1
+            self.seconds += seconds
+            self.bytes += size
+
+    def add_embedded(self, size: int):
+        with self._lock:
+            self.embedded_pages += 1
+            self.embedded_bytes += size
+
+    def add_duplicate(self, size: int):
+        with self._lock:
+            self.duplicate_pages += 1
+            self.duplicate_bytes += size
+
+    def as_dict(self) -> dict:
+        pages = self.pages or 1
+        return {
+            "profile": self.profile,
+            "format": self.image_format,
+            "color_mode": self.color_mode,
+            "pages": self.pages,
+            "encode_s": round(self.seconds, 3),
+            "bytes": self.bytes,
+            "encode_ms_per_page": round(self.seconds * 1000 / pages, 1),
+            "bytes_per_page": self.bytes // pages,
+            "embedded_pages": self.embedded_pages,
+            "embedded_bytes": self.embedded_bytes,
+            "duplicate_pages": self.duplicate_pages,
+            "duplicate_bytes": self.duplicate_bytes,
+        }
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from .log import get_logger
+from .page_manager import PageInfo
+
+logger = get_logger("export_checkpoint")
+
+# Manifiesto de salidas que se guarda junto a las salidas de la exportación
+CHECKPOINT_NAME = ".exportacion.jsonl"
+
+
+def file_sha1(path: Path) -> str:
+    """Hash del contenido de un archivo, leído por bloques"""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExportCheckpoint:
+    """Manifiesto de las salidas de una exportación a carpeta
+
+    Cada salida terminada se anota en una línea JSON con su clave (huella del
+    documento, página, rotación y ajustes de la exportación), nombre, tamaño,
+    fecha y hash, así que un corte pierde como mucho la salida en curso. Solo
+    lo usan las exportaciones incrementales: se omiten las salidas cuya clave
+    no cambió y que siguen intactas en disco, así que se reanudan las
+    exportaciones interrumpidas y, al repetir una exportación, solo se
+    regeneran las páginas que cambiaron.
+    """
+
+    def __init__(self, folder: str, operation: str, settings: dict):
+        self.folder = Path(folder)
+        self.path = self.folder / CHECKPOINT_NAME
+        self.header = {"operation": operation}
+        self.settings = settings
+        self._entries: Dict[int, dict] = self._load()
+
+        # Se reescribe compacto (sin duplicados ni una última línea a medias)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in [self.header, *self._entries.values()]:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+    def _load(self) -> Dict[int, dict]:
+        entries = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return entries
+        except OSError as e:
+            logger.warning("Manifiesto de exportación ilegible, se empieza de cero",
+                           extra={"context": {"checkpoint": str(self.path), "error": str(e)}})
+            return entries
+
+        try:
+            same_export = bool(lines) and json.loads(lines[0]) == self.header
+        except json.JSONDecodeError:
+            same_export = False
+        if not same_export:
+            logger.info("El manifiesto es de otro tipo de exportación, se empieza de cero",
+                        extra={"context": {"checkpoint": str(self.path)}})
+            return entries
+
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                break  # Línea cortada por la interrupción: lo anterior es válido
+            entries[entry["page"]] = entry
+        return entries
+
+    def output_key(self, page_info: PageInfo) -> str:
+        """Clave de la salida de una página: cambia si cambia cualquier cosa que la genera"""
+        key = {**self.settings, "page": page_info.page_number, "rotation": page_info.rotation}
+        return hashlib.sha1(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def completed(self, page_info: PageInfo) -> Optional[str]:
+        """Nombre de la salida vigente e intacta de la página, o None si hay que generarla"""
+        entry = self._entries.get(page_info.page_number)
+        if not entry or entry["key"] != self.output_key(page_info):
+            return None
+        # Tamaño y fecha bastan para dar por intactos los archivos sin releer miles de imágenes
+        path = self.folder / entry["name"]
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        if stat.st_size != entry["size"]:
+            return None
+        if stat.st_mtime_ns != entry["mtime_ns"]:
+            # Misma longitud y otra fecha (copia, reescritura idéntica, archivo tocado): decide el hash
+            try:
+                if file_sha1(path) != entry["sha1"]:
+                    return None
+            except OSError:
+                return None
+        return entry["name"]
+
+    def record(self, page_info: PageInfo, name: str, data: bytes = None):
+        """Anotar una salida terminada (sin data, se lee del disco para el hash)"""
+        path = self.folder / name
+        stat = path.stat()
+        sha1 = file_sha1(path) if data is None else hashlib.sha1(data).hexdigest()
+        entry = {"page": page_info.page_number, "key": self.output_key(page_info), "name": name,
+                 "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": sha1}
+        self._entries[page_info.page_number] = entry
+        # Se abre por anotación: no queda nada pendiente si la exportación falla o se corta
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
@@ -0,0 +1,152 @@
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from PIL import Image
+
+from .metrics import metrics
+from .page_images import EmbeddedImage
+from .page_manager import PageInfo
+from .parallel import DEFAULT_WORKERS
+
+_DONE = object()
+
+
+class _Failure:
+    """Excepción de una etapa, que viaja en lugar del elemento hasta el consumidor"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+@dataclass
+class Stage:
+    """Etapa del pipeline: func(elemento) -> elemento, en un pool de `workers` hilos"""
+    name: str
+    func: Callable
+    workers: int = DEFAULT_WORKERS
+
+
+@dataclass
+class PageWork:
+    """Una página en su paso por el pipeline de exportación de imágenes"""
+    page_info: PageInfo
+    # Exportación incremental: nombre de la salida de una exportación anterior que sigue vigente
+    skipped: Optional[str] = None
+    # Huella de render (deduplicación) y si repite la de una página anterior: no se renderiza
+    render_key: Optional[str] = None
+    duplicate: bool = False
+    # Salidas (índices) que escriben la página por franjas directamente en su destino
+    tiled: Set[int] = field(default_factory=set)
+    embedded: Optional[EmbeddedImage] = None
+    # Bitmaps por modo de color ("color", "gray", "bitonal") e imágenes codificadas por clave
+    images: Dict[str, Optional[Image.Image]] = field(default_factory=dict)
+    encoded: Dict[tuple, object] = field(default_factory=dict)
+
+
+class ExportPipeline:
+    """Etapas en pools de hilos propios unidas por colas acotadas
+
+    La fuente se recorre en un hilo aparte y cada etapa en sus propios hilos;
+    el consumidor (quien itera run(), normalmente la escritura en el destino)
+    recibe los elementos en el orden de entrada, así que la escritura a disco
+    se solapa con el render y la codificación de las páginas siguientes.
+
+    Como mucho `window` elementos están a la vez entre la fuente y el
+    consumidor (en colas, en proceso o esperando su turno): si la escritura se
+    retrasa, la fuente se detiene y la memoria no crece con el número de páginas.
+    Un error en la fuente o en una etapa se relanza en el consumidor al llegar
+    su turno y detiene el resto del trabajo.
+    """
+
+    def __init__(self, stages: List[Stage], window: int = None):
+        self.stages = stages
+        self.window = window or 2 * max(stage.workers for stage in stages)
+
+    def run(self, items: Iterable) -> Iterator:
+        slots = threading.Semaphore(self.window)
+        stop = threading.Event()
+        # La ventana ya acota los elementos: las colas solo reservan sitio para los avisos de fin
+        capacity = self.window + max(stage.workers for stage in self.stages)
+        queues = [queue.Queue(capacity) for _ in range(len(self.stages) + 1)]
+        consumers = [stage.workers for stage in self.stages] + [1]
+        threads = []
+
+        def finish(position: int):
+            for _ in range(consumers[position]):
+                queues[position].put(_DONE)
+
+        def feed():
+            count = 0
+            try:
+                for item in items:
+                    slots.acquire()
+                    if stop.is_set():
+                        break
+                    queues[0].put((count, item))
+                    count += 1
+            except BaseException as e:
+                queues[0].put((count, _Failure(e)))
+            finally:
+                finish(0)
+
+        def work(position: int, stage: Stage, remaining: list, lock: threading.Lock):
+            inbox, outbox = queues[position], queues[position + 1]
+            while True:
+                entry = inbox.get()
+                if entry is _DONE:
+                    break
+                index, item = entry
+                if not isinstance(item, _Failure) and not stop.is_set():
+                    try:
+                        with metrics.span(f"pipeline.{stage.name}"):
+                            item = stage.func(item)
+                    except BaseException as e:
+                        item = _Failure(e)
+                outbox.put((index, item))
+            # El último hilo de la etapa avisa a la siguiente
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                finish(position + 1)
+
+        threads.append(threading.Thread(target=feed, name="pipeline-fuente", daemon=True))
+        for position, stage in enumerate(self.stages):
+            remaining, lock = [stage.workers], threading.Lock()
+            for n in range(stage.workers):
+                threads.append(threading.Thread(target=work, args=(position, stage, remaining, lock),
+                                                name=f"pipeline-{stage.name}-{n}", daemon=True))
+        for thread in threads:
+            thread.start()
+
+        pending = {}
+        next_index = 0
+        try:
+            while True:
+                entry = queues[-1].get()
+                if entry is _DONE:
+                    break
+                index, item = entry
+                pending[index] = item
+                # Entregar en orden lo que ya está listo
+                while next_index in pending:
+                    item = pending.pop(next_index)
+                    next_index += 1
+                    if isinstance(item, _Failure):
+                        raise item.error
+                    yield item
+                    slots.release()
+        finally:
+            # Ante un error o un consumidor que abandona: liberar a la fuente y esperar a los hilos
+            stop.set()
+            for _ in range(self.window):
+                slots.release()
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    queues[-1].get(timeout=0.05)
+                except queue.Empty:
+                    pass
+            for thread in threads:
+                thread.join()
@@ -0,0 +1,43 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from .color_modes import DEFAULT_COLOR_MODE, check_color_mode
+from .encoding_profiles import DEFAULT_PROFILE
+from .pdf_split import SplitRule
+
+# Formatos que se alimentan del render de cada página: en un plan, cada página
+# se renderiza una vez por modo de color y la imagen se reparte entre todos ellos
+RENDERED_FORMATS = ("images_zip", "images_folder", "images_tar", "images_tiff", "images_pdf")
+
+
+@dataclass
+class ExportTarget:
+    """Una salida de un plan de exportación (mismos parámetros que PDFService.export)"""
+    export_format: str
+    output_path: str
+    image_format: str = "PNG"
+    encoding_profile: str = DEFAULT_PROFILE
+    color_mode: str = DEFAULT_COLOR_MODE
+    split: Optional[SplitRule] = None
+
+    def __post_init__(self):
+        check_color_mode(self.color_mode)
+        self.image_format = self.image_format.upper()
+
+    @property
+    def rendered(self) -> bool:
+        return self.export_format in RENDERED_FORMATS
+
+    @property
+    def render_mode(self) -> str:
+        """Modo en que se renderiza: el blanco y negro se umbraliza a partir de los grises"""
+        return "gray" if self.color_mode == "bitonal" else self.color_mode
+
+    @property
+    def encoding_key(self) -> Tuple[str, str, str]:
+        """Salidas con la misma clave comparten también la imagen codificada"""
+        if self.export_format == "images_tiff":
+            return "TIFF", self.encoding_profile, self.color_mode
+        if self.export_format == "images_pdf":
+            return "PDF", self.encoding_profile, self.color_mode
+        return self.image_format, self.encoding_profile, self.color_mode
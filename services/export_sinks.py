@@ -0,0 +1,231 @@
+import sys
+import tarfile
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from dataclasses import dataclass
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from PIL import TiffImagePlugin
+from pypdf import PdfReader, PdfWriter
+
+from .atomic_output import OutputWriter
+from .image_pdf import StreamingImagePDFWriter
+from .metrics import metrics
+from .page_manager import PageInfo
+from .resolution_policy import PDF_POINTS_PER_INCH
+
+
+@dataclass
+class EncodedPage:
+    """Imagen codificada de una página con lo que necesitan los destinos para colocarla
+
+    Las imágenes incrustadas copiadas tal cual solo traen datos y extensión.
+    """
+    data: bytes
+    extension: str
+    mode: Optional[str] = None
+    size: Optional[Tuple[int, int]] = None
+    dpi: Optional[float] = None
+
+
+def page_file_stem(base_name: str, page_number: int) -> str:
+    return f"{base_name}_pagina_{page_number:03d}"
+
+
+class PageSink:
+    """Destino de una exportación: recibe las páginas en orden y se cierra al terminar"""
+    # Si necesita la imagen renderizada y codificada de cada página
+    needs_image = True
+
+    def add(self, page_info: PageInfo, page: Optional[EncodedPage]):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class FileSink(PageSink):
+    """Destino de un archivo por página (ZIP, carpeta, TAR, memoria...)
+
+    write() guarda un archivo con su nombre; link() publica un duplicado de
+    uno ya escrito (enlace duro donde el destino lo admite; si no, links es
+    False y la exportación deja un manifiesto de equivalencias); open_stream()
+    da un flujo para escribir una página gigante por franjas.
+    """
+    links = False
+
+    def __init__(self, base_name: str):
+        self.base_name = base_name
+
+    def add(self, page_info: PageInfo, page: EncodedPage):
+        self.write(f"{page_file_stem(self.base_name, page_info.page_number)}.{page.extension}", page.data)
+
+    def write(self, name: str, data: bytes):
+        raise NotImplementedError
+
+    def link(self, name: str, original: str):
+        pass
+
+    @contextmanager
+    def open_stream(self, name: str):
+        # Por defecto se acumula en memoria y se escribe al cerrar
+        buffer = BytesIO()
+        yield buffer
+        self.write(name, buffer.getvalue())
+
+
+class ZipSink(FileSink):
+    def __init__(self, fileobj: BinaryIO, base_name: str):
+        super().__init__(base_name)
+        self.zip_file = zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED)
+
+    def write(self, name: str, data: bytes):
+        with metrics.span("zip.write"):
+            self.zip_file.writestr(name, data)
+
+    @contextmanager
+    def open_stream(self, name: str):
+        with self.zip_file.open(name, "w", force_zip64=True) as entry:
+            yield entry
+
+    def close(self):
+        self.zip_file.close()
+
+
+class FolderSink(FileSink):
+    """Archivos publicados de forma atómica; los duplicados, como enlaces duros"""
+    links = True
+
+    def __init__(self, out: OutputWriter, folder: str, base_name: str):
+        super().__init__(base_name)
+        self.out = out
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+    def write(self, name: str, data: bytes):
+        with metrics.span("folder.write"):
+            self.out.write_bytes(self.folder / name, data)
+
+    def link(self, name: str, original: str):
+        self.out.link(self.folder / original, self.folder / name)
+
+    @contextmanager
+    def open_stream(self, name: str):
+        with self.out.open(self.folder / name) as f:
+            yield f
+
+
+class TarSink(FileSink):
+    """TAR en streaming (sin retroceder en el archivo): sirve también para tuberías"""
+    links = True
+
+    def __init__(self, fileobj: BinaryIO, base_name: str):
+        super().__init__(base_name)
+        self.tar_file = tarfile.open(fileobj=fileobj, mode="w|")
+        self._mtime = time.time()
+
+    def _info(self, name: str) -> tarfile.TarInfo:
+        info = tarfile.TarInfo(name)
+        info.mtime = self._mtime
+        return info
+
+    def write(self, name: str, data: bytes):
+        info = self._info(name)
+        info.size = len(data)
+        with metrics.span("tar.write"):
+            self.tar_file.addfile(info, BytesIO(data))
+
+    def link(self, name: str, original: str):
+        info = self._info(name)
+        info.type = tarfile.LNKTYPE
+        info.linkname = original
+        self.tar_file.addfile(info)
+
+    def close(self):
+        self.tar_file.close()
+
+
+class StdoutSink(TarSink):
+    """TAR escrito en la salida estándar, para encadenar la exportación con otro proceso"""
+
+    def __init__(self, base_name: str):
+        super().__init__(sys.stdout.buffer, base_name)
+
+    def close(self):
+        super().close()
+        sys.stdout.buffer.flush()
+
+
+class MemorySink(FileSink):
+    """Archivos en memoria (nombre -> bytes), para integrar la exportación sin tocar disco"""
+    links = True
+
+    def __init__(self, base_name: str):
+        super().__init__(base_name)
+        self.files: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def write(self, name: str, data: bytes):
+        with self._lock:
+            self.files[name] = data
+
+    def link(self, name: str, original: str):
+        with self._lock:
+            self.files[name] = self.files[original]
+
+
+class TiffSink(PageSink):
+    """Cada página llega como un TIFF completo y se añade como un fotograma más"""
+
+    def __init__(self, fileobj: BinaryIO):
+        self.tiff = TiffImagePlugin.AppendingTiffWriter(fileobj, new=True)
+
+    def add(self, page_info: PageInfo, page: EncodedPage):
+        with metrics.span("tiff.append"):
+            self.tiff.write(page.data)
+            self.tiff.newFrame()
+
+    def close(self):
+        self.tiff.close()
+
+
+class ImagePDFSink(PageSink):
+    def __init__(self, fileobj: BinaryIO):
+        self.writer = StreamingImagePDFWriter(fileobj)
+
+    def add(self, page_info: PageInfo, page: EncodedPage):
+        # Tamaño de página en puntos a partir de los píxeles y su resolución
+        width, height = (side * PDF_POINTS_PER_INCH / page.dpi for side in page.size)
+        with metrics.span("pdf.write_page"):
+            self.writer.add_page(width, height, page.data, *page.size, grayscale=page.mode != "RGB",
+                                 bits=1 if page.mode == "1" else 8,
+                                 image_filter="FlateDecode" if page.mode == "1" else "DCTDecode")
+
+    def close(self):
+        self.writer.close()
+
+
+class CombinedPDFSink(PageSink):
+    """PDF único: copia cada página del lector compartido (no necesita el render)"""
+    needs_image = False
+
+    def __init__(self, fileobj: BinaryIO, reader: PdfReader, reader_lock: threading.RLock):
+        self.fileobj = fileobj
+        self.reader = reader
+        self.reader_lock = reader_lock
+        self.writer = PdfWriter()
+
+    def add(self, page_info: PageInfo, page: Optional[EncodedPage]):
+        with self.reader_lock, metrics.span("pypdf.add_page"):
+            copy = self.writer.add_page(self.reader.pages[page_info.page_number - 1])
+        # Rotar la copia del writer para no alterar el lector compartido
+        if page_info.rotation != 0:
+            copy.rotate(page_info.rotation)
+
+    def close(self):
+        with self.reader_lock, metrics.span("pypdf.write"):
+            self.writer.write(self.fileobj)
@@ -0,0 +1,230 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from .atomic_output import DEFAULT_FSYNC
+from .color_modes import DEFAULT_COLOR_MODE
+from .encoding_profiles import DEFAULT_PROFILE
+from .log import get_logger, job_logger
+from .page_manager import PageManager
+from .page_analysis import BlankPageDetector
+from .page_parser import PageParser
+from .pdf_service import EXPORT_OUTPUT_NAMES, PDFService
+from .pdf_split import SplitRule
+from .text_index import TextIndex
+
+logger = get_logger("folder_watcher")
+
+
+@dataclass
+class WatchConfig:
+    """Configuración del modo de vigilancia de carpeta"""
+    input_dir: str
+    output_dir: str
+    pages: str = ""  # Expresión de PageParser; vacío = todas las páginas
+    export_format: str = "pdf_combined"
+    image_format: str = "PNG"
+    encoding_profile: str = DEFAULT_PROFILE
+    prefer_embedded: bool = False  # Escaneos: copiar la imagen original sin re-rasterizar
+    deduplicate: bool = False  # Guardar una sola vez las páginas idénticas
+    color_mode: str = DEFAULT_COLOR_MODE  # "color", "gray" o "bitonal"
+    split: Optional[SplitRule] = None  # Criterio de división de pdf_split
+    max_workers: int = 2
+    poll_interval: float = 2.0
+    settle_time: float = 5.0  # Segundos sin cambios antes de procesar un archivo
+    manifest_path: Optional[str] = None
+    pattern: str = "*.pdf"
+    remove_blank: bool = False  # Quitar las páginas en blanco antes de exportar
+    blank_threshold: float = BlankPageDetector.ink_threshold
+    fsync: str = DEFAULT_FSYNC  # Durabilidad de las salidas: "file", "batch" o "none"
+
+
+class ProcessedManifest:
+    """Registro persistente de archivos ya procesados"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+        if self.path.exists():
+            try:
+                self._entries = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning("Manifiesto ilegible, se empieza de cero",
+                               extra={"context": {"manifest": str(self.path), "error": str(e)}})
+
+    @staticmethod
+    def file_key(stat: os.stat_result) -> str:
+        """Huella del contenido: un archivo modificado se vuelve a procesar"""
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def is_processed(self, name: str, stat: os.stat_result) -> bool:
+        with self._lock:
+            entry = self._entries.get(name)
+            return bool(entry) and entry.get("key") == self.file_key(stat)
+
+    def mark(self, name: str, stat: os.stat_result, status: str, output: str = "", error: str = ""):
+        """Registrar el resultado de un archivo y persistir el manifiesto"""
+        with self._lock:
+            self._entries[name] = {
+                "key": self.file_key(stat),
+                "status": status,
+                "output": output,
+                "error": error,
+                "processed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            }
+            self._save()
+
+    def _save(self):
+        # Escritura atómica: un corte nunca deja el manifiesto a medias
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp_path.write_text(json.dumps(self._entries, indent=2, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+
+class FolderWatcher:
+    """Vigila una carpeta y exporta cada PDF nuevo con la configuración dada"""
+
+    def __init__(self, config: WatchConfig):
+        self.config = config
+        self.input_dir = Path(config.input_dir)
+        self.output_dir = Path(config.output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = config.manifest_path or self.output_dir / ".procesados.json"
+        self.manifest = ProcessedManifest(str(manifest_path))
+
+        # Validar la expresión una sola vez al arrancar (las búsquedas se resuelven por archivo)
+        if config.pages.strip():
+            PageParser.parse(config.pages, TextIndex.empty())
+
+        self._executor = ThreadPoolExecutor(max_workers=max(1, config.max_workers))
+        self._candidates: Dict[Path, tuple] = {}  # ruta -> (tamaño, mtime, estable desde)
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def run(self, once: bool = False):
+        """Bucle de vigilancia; con once=True procesa lo existente y termina"""
+        try:
+            while not self._stop.is_set():
+                submitted = self.scan_once(ignore_settle=once)
+                with self._lock:
+                    idle = not self._in_flight
+                if once and not submitted and idle:
+                    break
+                self._stop.wait(self.config.poll_interval)
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def stop(self):
+        self._stop.set()
+
+    def scan_once(self, ignore_settle: bool = False) -> int:
+        """Revisar la carpeta y encolar los archivos estables; devuelve cuántos se encolaron"""
+        now = time.monotonic()
+        submitted = 0
+        seen = set()
+
+        for path in sorted(self.input_dir.glob(self.config.pattern)):
+            if not path.is_file():
+                continue
+            seen.add(path)
+            with self._lock:
+                if path in self._in_flight:
+                    continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue  # Eliminado o movido entre el listado y el stat
+            if self.manifest.is_processed(path.name, stat):
+                self._candidates.pop(path, None)
+                continue
+
+            # Antirrebote: el tamaño y la fecha deben mantenerse durante settle_time
+            signature = (stat.st_size, stat.st_mtime_ns)
+            previous = self._candidates.get(path)
+            if not previous or previous[:2] != signature:
+                self._candidates[path] = (*signature, now)
+                if not ignore_settle:
+                    continue
+            elif not ignore_settle and now - previous[2] < self.config.settle_time:
+                continue
+
+            # Tope de documentos concurrentes: el resto espera al siguiente ciclo
+            with self._lock:
+                if len(self._in_flight) >= self.config.max_workers:
+                    break
+                self._in_flight.add(path)
+            del self._candidates[path]
+            self._executor.submit(self._process, path, stat)
+            submitted += 1
+
+        # Olvidar candidatos que desaparecieron de la carpeta
+        for path in list(self._candidates):
+            if path not in seen:
+                del self._candidates[path]
+        return submitted
+
+    def _output_path(self, stem: str) -> Path:
+        return self.output_dir / EXPORT_OUTPUT_NAMES[self.config.export_format].format(stem)
+
+    def _process(self, path: Path, stat: os.stat_result):
+        service = None
+        output_path = self._output_path(path.stem)
+        log = job_logger(logger, doc=path.name, op=self.config.export_format)
+        start = time.perf_counter()
+        try:
+            service = PDFService(str(path), fsync=self.config.fsync)
+            total_pages = service.get_total_pages()
+            pages_str = self.config.pages.strip()
+            if pages_str:
+                index = service.get_text_index() if PageParser.needs_index(pages_str) else None
+                pages = PageParser.parse(pages_str, index)
+            else:
+                pages = range(1, total_pages + 1)
+
+            page_manager = PageManager()
+            for page_num in pages:
+                if 1 <= page_num <= total_pages:
+                    page_manager.add_page(page_num)
+
+            if self.config.remove_blank:
+                detector = BlankPageDetector(ink_threshold=self.config.blank_threshold)
+                active = [p.page_number for p in page_manager.get_active_pages()]
+                page_manager.delete_pages(service.find_blank_pages(active, detector))
+
+            if not page_manager.get_active_pages():
+                raise ValueError("Ninguna página de la expresión existe en el documento")
+
+            # Si el vigilante se cortó a mitad de este archivo, se continúa donde lo dejó;
+            # si el archivo cambió, su huella cambia y se regenera todo
+            success = service.export(
+                self.config.export_format, page_manager, str(output_path), self.config.image_format,
+                encoding_profile=self.config.encoding_profile,
+                prefer_embedded=self.config.prefer_embedded,
+                incremental=True,
+                deduplicate=self.config.deduplicate,
+                color_mode=self.config.color_mode,
+                split=self.config.split
+            )
+            if not success:
+                raise ValueError("No se pudieron exportar los archivos")
+
+            self.manifest.mark(path.name, stat, "completado", output=str(output_path))
+            log.info("Archivo procesado", extra={
+                "output": str(output_path), "duration_s": round(time.perf_counter() - start, 3)})
+        except Exception as e:
+            # Se registra el error para no reintentar hasta que el archivo cambie
+            self.manifest.mark(path.name, stat, "error", error=str(e))
+            log.error("Error procesando archivo", extra={"error": str(e)})
+        finally:
+            if service:
+                service.close()
+            with self._lock:
+                self._in_flight.discard(path)
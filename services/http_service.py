@@ -0,0 +1,566 @@
+import hashlib
+import json
+import logging
+import queue
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import fitz  # PyMuPDF
+from pypdf.errors import PyPdfError
+
+from .log import get_logger, job_logger
+from .metrics import metrics
+from .page_manager import PageManager
+from .page_parser import PageParser
+from .color_modes import COLOR_MODES, DEFAULT_COLOR_MODE
+from .encoding_profiles import DEFAULT_PROFILE, ENCODING_PROFILES, IMAGE_FORMATS
+from .pdf_split import SplitRule
+from .pdf_service import EXPORT_OUTPUT_NAMES, FOLDER_EXPORT_FORMATS, PDFService
+
+STREAM_CHUNK_SIZE = 64 * 1024
+RESULT_CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".zip": "application/zip",
+    ".txt": "text/plain; charset=utf-8",
+    ".json": "application/json",
+}
+
+logger = get_logger("http_service")
+
+
+def parse_rotations(value) -> Dict[int, int]:
+    """Leer el campo "rotations" ({página: grados}, múltiplos de 90)"""
+    if not isinstance(value, dict):
+        raise ValueError("'rotations' debe ser un objeto {página: grados}")
+    rotations = {}
+    for page, degrees in value.items():
+        try:
+            page_num, angle = int(page), int(degrees)
+        except (TypeError, ValueError):
+            raise ValueError(f"Rotación no válida: {page!r}: {degrees!r}") from None
+        if angle % 90:
+            raise ValueError(f"Rotación no válida para la página {page_num}: {angle} (múltiplo de 90)")
+        rotations[page_num] = angle
+    return rotations
+
+
+class DocumentCache:
+    """Caché LRU de documentos abiertos y previews compartida entre clientes"""
+
+    def __init__(self, max_documents: int = 8, max_previews: int = 256):
+        self.max_documents = max_documents
+        self.max_previews = max_previews
+        self._documents: "OrderedDict[str, PDFService]" = OrderedDict()
+        self._previews: "OrderedDict[tuple, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def document_id(pdf_path: str) -> str:
+        """Identificador estable del documento (ruta, tamaño y fecha de modificación)"""
+        path = Path(pdf_path).resolve()
+        stat = path.stat()
+        key = f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+    def open(self, pdf_path: str) -> tuple:
+        """Abrir un documento o reutilizar el que ya está en caché"""
+        doc_id = self.document_id(pdf_path)
+        with self._lock:
+            service = self._documents.get(doc_id)
+            if service:
+                self._documents.move_to_end(doc_id)
+                return doc_id, service
+
+        # Abrir fuera del lock: el parseo de documentos grandes es lento
+        try:
+            service = PDFService(pdf_path)
+        except (PyPdfError, fitz.FileDataError) as e:
+            raise ValueError(f"No es un PDF válido: {e}") from None
+        with self._lock:
+            if doc_id in self._documents:
+                service = self._documents[doc_id]
+                self._documents.move_to_end(doc_id)
+            else:
+                self._documents[doc_id] = service
+                # Los documentos expulsados no se cierran: un trabajo en cola o en
+                # curso puede seguir usándolos y se liberan al dejar de referenciarse
+                while len(self._documents) > self.max_documents:
+                    evicted_id, _ = self._documents.popitem(last=False)
+                    for key in [k for k in self._previews if k[0] == evicted_id]:
+                        del self._previews[key]
+        return doc_id, service
+
+    def get(self, doc_id: str) -> Optional[PDFService]:
+        """Obtener un documento abierto por su identificador"""
+        with self._lock:
+            service = self._documents.get(doc_id)
+            if service:
+                self._documents.move_to_end(doc_id)
+            return service
+
+    def preview(self, doc_id: str, page_num: int, scale: float = 1.0) -> Optional[bytes]:
+        """Obtener el PNG de previsualización de una página, usando la caché"""
+        key = (doc_id, page_num, scale)
+        with self._lock:
+            data = self._previews.get(key)
+            if data is not None:
+                self._previews.move_to_end(key)
+                return data
+
+        service = self.get(doc_id)
+        if not service:
+            return None
+        img = service.render_page(page_num, scale)
+        if img is None:
+            return None
+
+        buffer = BytesIO()
+        img.save(buffer, format="PNG")
+        data = buffer.getvalue()
+        with self._lock:
+            self._previews[key] = data
+            while len(self._previews) > self.max_previews:
+                self._previews.popitem(last=False)
+        return data
+
+
+@dataclass
+class Job:
+    """Trabajo de extracción o exportación encolado en el servicio"""
+    job_id: str
+    document_id: str
+    operation: str  # "extract" o "export"
+    pages: List[int]
+    export_format: str = "pdf_combined"
+    image_format: str = "PNG"
+    encoding_profile: str = DEFAULT_PROFILE
+    prefer_embedded: bool = False  # Escaneos: copiar la imagen original sin re-rasterizar
+    deduplicate: bool = False  # Guardar una sola vez las páginas idénticas
+    color_mode: str = DEFAULT_COLOR_MODE  # "color", "gray" o "bitonal"
+    split: Optional[SplitRule] = None  # Criterio de división de pdf_split
+    rotations: Dict[int, int] = field(default_factory=dict)
+    # Documento del trabajo: se conserva aunque la caché lo expulse antes de que el trabajo empiece
+    service: Optional[PDFService] = field(default=None, repr=False)
+    status: str = "en_cola"  # en_cola, procesando, completado, error
+    current: int = 0
+    total: int = 0
+    message: str = ""
+    result_path: Optional[str] = None
+    error: Optional[str] = None
+    encoding: Optional[dict] = None  # Tiempo de codificación y bytes por página medidos
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in ("completado", "error")
+
+    def to_dict(self) -> dict:
+        """Estado público del trabajo para el endpoint de consulta"""
+        return {
+            "job_id": self.job_id,
+            "document_id": self.document_id,
+            "operation": self.operation,
+            "format": self.export_format,
+            "status": self.status,
+            "progress": {"current": self.current, "total": self.total},
+            "message": self.message,
+            "error": self.error,
+            "encoding": self.encoding,
+            "result_available": self.status == "completado" and self.result_path is not None,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """Cola de trabajos acotada atendida por un pool de hilos trabajadores
+
+    Los trabajos terminados (y sus resultados) caducan a los `finished_ttl`
+    segundos y, como mucho, se conservan los `max_finished` más recientes.
+    """
+
+    def __init__(self, documents: DocumentCache, work_dir: str,
+                 workers: int = 2, max_pending: int = 16,
+                 finished_ttl: float = 3600, max_finished: int = 100):
+        self.documents = documents
+        self.finished_ttl = finished_ttl
+        self.max_finished = max_finished
+        self.work_dir = Path(work_dir)
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=max_pending)
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"pdf-worker-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, job: Job) -> bool:
+        """Encolar un trabajo; devuelve False si la cola está llena"""
+        self.expire()
+        with self._lock:
+            self._jobs[job.job_id] = job
+        try:
+            self._queue.put_nowait(job)
+            return True
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.job_id]
+            return False
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def remove(self, job_id: str) -> bool:
+        """Eliminar un trabajo terminado y sus archivos de resultado"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or not job.is_finished:
+                return False
+            del self._jobs[job_id]
+        shutil.rmtree(self.work_dir / job_id, ignore_errors=True)
+        return True
+
+    def expire(self) -> int:
+        """Eliminar los trabajos terminados caducados o que exceden max_finished"""
+        now = time.time()
+        with self._lock:
+            finished = sorted((job for job in self._jobs.values() if job.finished_at is not None),
+                              key=lambda job: job.finished_at)
+            excess = max(0, len(finished) - self.max_finished)
+            expired = [job for i, job in enumerate(finished)
+                       if i < excess or now - job.finished_at > self.finished_ttl]
+            for job in expired:
+                del self._jobs[job.job_id]
+        for job in expired:
+            shutil.rmtree(self.work_dir / job.job_id, ignore_errors=True)
+        if expired:
+            logger.info("Trabajos caducados eliminados", extra={"context": {"jobs": len(expired)}})
+        return len(expired)
+
+    def shutdown(self):
+        """Detener los trabajadores cuando terminen los trabajos en curso"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            log = job_logger(logger, job=job.job_id, doc=job.document_id, op=job.operation)
+            try:
+                self._run(job)
+            except Exception as e:
+                job.status = "error"
+                job.error = str(e)
+            finally:
+                job.service = None  # Ya no hace falta retener el documento
+                job.finished_at = time.time()
+                log.info("Trabajo terminado", extra={
+                    "status": job.status,
+                    "format": job.export_format,
+                    "pages": len(job.pages),
+                    "duration_s": round(job.finished_at - job.created_at, 3),
+                    "error": job.error,
+                })
+                self._queue.task_done()
+            self.expire()
+
+    def _run(self, job: Job):
+        service = job.service or self.documents.get(job.document_id)
+        if not service:
+            raise ValueError("El documento ya no está abierto en el servicio")
+
+        job.status = "procesando"
+        job.total = len(job.pages)
+        job_dir = self.work_dir / job.job_id
+        job_dir.mkdir(parents=True, exist_ok=True)
+        base_name = Path(service.pdf_path).stem
+
+        def progress_callback(current, total, status):
+            job.current, job.total, job.message = current, total, status
+            return True
+
+        if job.operation == "extract":
+            output_path = job_dir / f"{base_name}_extraido.pdf"
+            if service.extract(job.pages, str(output_path)) == 0:
+                raise ValueError("No se encontraron páginas válidas para extraer")
+            job.current = job.total
+        else:
+            page_manager = PageManager()
+            for page_num in job.pages:
+                page_manager.add_page(page_num)
+                if job.rotations.get(page_num):
+                    page_manager.rotate_page(page_num, job.rotations[page_num])
+
+            output_path = job_dir / EXPORT_OUTPUT_NAMES[job.export_format].format(base_name)
+
+            success = service.export(
+                job.export_format, page_manager, str(output_path), job.image_format, progress_callback,
+                job.encoding_profile, job.prefer_embedded, deduplicate=job.deduplicate,
+                color_mode=job.color_mode, split=job.split
+            )
+            if not success:
+                raise ValueError("No se pudieron exportar los archivos")
+            if job.export_format in ("images_zip", "images_folder", "images_tar", "images_tiff", "images_pdf"):
+                job.encoding = service.last_encoding_report
+
+            # Las exportaciones a carpeta se empaquetan para descargarlas en un solo flujo
+            if job.export_format in FOLDER_EXPORT_FORMATS:
+                archive = shutil.make_archive(str(output_path), "zip", root_dir=output_path)
+                shutil.rmtree(output_path, ignore_errors=True)
+                output_path = Path(archive)
+
+        job.result_path = str(output_path)
+        job.status = "completado"
+        job.message = "Completado"
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """Rutas REST del servicio de extracción"""
+
+    server: "ExtractionHTTPServer"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method: str):
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        query = parse_qs(url.query)
+        try:
+            if method == "POST" and parts == ["documents"]:
+                return self._open_document()
+            if method == "GET" and len(parts) == 2 and parts[0] == "documents":
+                return self._document_info(parts[1])
+            if (method == "GET" and len(parts) == 5 and parts[0] == "documents"
+                    and parts[2] == "pages" and parts[4] == "preview"):
+                scale = float(query.get("scale", ["1.0"])[0])
+                return self._preview(parts[1], int(parts[3]), scale)
+            if method == "POST" and parts == ["jobs"]:
+                return self._submit_job()
+            if method == "GET" and len(parts) == 2 and parts[0] == "jobs":
+                return self._job_status(parts[1])
+            if method == "GET" and len(parts) == 3 and parts[0] == "jobs" and parts[2] == "result":
+                return self._job_result(parts[1])
+            if method == "DELETE" and len(parts) == 2 and parts[0] == "jobs":
+                return self._delete_job(parts[1])
+            if method == "GET" and parts == ["metrics"]:
+                return self._send_text(200, metrics.to_prometheus(), "text/plain; version=0.0.4")
+            if method == "GET" and parts == ["metrics.json"]:
+                return self._send_text(200, metrics.to_json(), "application/json")
+            self._send_json(404, {"error": "Ruta no encontrada"})
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+        except Exception as e:
+            self._send_json(500, {"error": f"Error interno: {e}"})
+
+    def _open_document(self):
+        body = self._read_json()
+        pdf_path = body.get("path")
+        if not pdf_path:
+            raise ValueError("Falta el campo 'path'")
+        path = Path(pdf_path).resolve()
+        if self.server.allowed_root and self.server.allowed_root not in path.parents:
+            return self._send_json(403, {"error": "Ruta fuera del directorio permitido"})
+        if not path.is_file():
+            return self._send_json(404, {"error": f"No existe el archivo: {pdf_path}"})
+
+        doc_id, service = self.server.documents.open(str(path))
+        self._send_json(201, {"document_id": doc_id, "total_pages": service.get_total_pages()})
+
+    def _document_info(self, doc_id: str):
+        service = self.server.documents.get(doc_id)
+        if not service:
+            return self._send_json(404, {"error": "Documento no encontrado"})
+        self._send_json(200, {
+            "document_id": doc_id,
+            "name": Path(service.pdf_path).name,
+            "total_pages": service.get_total_pages(),
+        })
+
+    def _preview(self, doc_id: str, page_num: int, scale: float):
+        if not self.server.documents.get(doc_id):
+            return self._send_json(404, {"error": "Documento no encontrado"})
+        data = self.server.documents.preview(doc_id, page_num, scale)
+        if data is None:
+            return self._send_json(404, {"error": f"Página {page_num} no disponible"})
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _submit_job(self):
+        body = self._read_json()
+        doc_id = body.get("document_id", "")
+        service = self.server.documents.get(doc_id)
+        if not service:
+            return self._send_json(404, {"error": "Documento no encontrado"})
+
+        operation = body.get("operation", "export")
+        export_format = body.get("format", "pdf_combined")
+        if operation not in ("extract", "export"):
+            raise ValueError(f"Operación desconocida: '{operation}'")
+        if operation == "export" and export_format not in EXPORT_OUTPUT_NAMES:
+            raise ValueError(f"Formato de exportación desconocido: '{export_format}'")
+        image_format = str(body.get("image_format", "PNG")).upper()
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Formato de imagen desconocido: '{image_format}'")
+        encoding_profile = str(body.get("profile", DEFAULT_PROFILE))
+        if encoding_profile not in ENCODING_PROFILES:
+            raise ValueError(f"Perfil de codificación desconocido: '{encoding_profile}'")
+        color_mode = str(body.get("color", DEFAULT_COLOR_MODE))
+        if color_mode not in COLOR_MODES:
+            raise ValueError(f"Modo de color desconocido: '{color_mode}'")
+        split = SplitRule.parse(str(body["split"])) if "split" in body else None
+
+        # Misma sintaxis que el campo de páginas de la interfaz; vacío = todas
+        total_pages = service.get_total_pages()
+        pages_str = str(body.get("pages", "")).strip()
+        if pages_str:
+            # Las búsquedas entre comillas usan el índice de texto (persistido en caché)
+            index = service.get_text_index() if PageParser.needs_index(pages_str) else None
+            pages = PageParser.parse(pages_str, index)
+        else:
+            pages = list(range(1, total_pages + 1))
+        pages = [p for p in pages if 1 <= p <= total_pages]
+        if not pages:
+            raise ValueError("No hay páginas válidas para procesar")
+
+        job = Job(
+            job_id=uuid.uuid4().hex,
+            document_id=doc_id,
+            operation=operation,
+            pages=pages,
+            export_format=export_format,
+            image_format=image_format,
+            encoding_profile=encoding_profile,
+            prefer_embedded=bool(body.get("embedded", False)),
+            deduplicate=bool(body.get("deduplicate", False)),
+            color_mode=color_mode,
+            split=split,
+            rotations=parse_rotations(body.get("rotations", {})),
+            service=service,
+        )
+        if not self.server.jobs.submit(job):
+            return self._send_json(503, {"error": "Cola de trabajos llena, reintenta más tarde"})
+        self._send_json(202, job.to_dict())
+
+    def _job_status(self, job_id: str):
+        job = self.server.jobs.get(job_id)
+        if not job:
+            return self._send_json(404, {"error": "Trabajo no encontrado"})
+        self._send_json(200, job.to_dict())
+
+    def _job_result(self, job_id: str):
+        job = self.server.jobs.get(job_id)
+        if not job:
+            return self._send_json(404, {"error": "Trabajo no encontrado"})
+        if job.status != "completado" or not job.result_path:
+            return self._send_json(409, {"error": "El resultado aún no está disponible"})
+
+        # Descarga en bloques: el resultado nunca se carga completo en memoria
+        result = Path(job.result_path)
+        content_type = RESULT_CONTENT_TYPES.get(result.suffix, "application/octet-stream")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(result.stat().st_size))
+        self.send_header("Content-Disposition", f'attachment; filename="{result.name}"')
+        self.end_headers()
+        with open(result, "rb") as f:
+            shutil.copyfileobj(f, self.wfile, STREAM_CHUNK_SIZE)
+
+    def _delete_job(self, job_id: str):
+        if not self.server.jobs.remove(job_id):
+            return self._send_json(409, {"error": "El trabajo no existe o sigue en curso"})
+        self._send_json(200, {"job_id": job_id, "deleted": True})
+
+    def log_request(self, code="-", size="-"):
+        # Registro de accesos solo en DEBUG: las previews generan muchas peticiones
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Petición HTTP", extra={"context": {
+                "method": self.command, "path": self.path, "status": code}})
+
+    def log_message(self, format, *args):
+        logger.warning(format % args, extra={"context": {"client": self.client_address[0]}})
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length).decode("utf-8"))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON inválido: {e}")
+        if not isinstance(body, dict):
+            raise ValueError("Se esperaba un objeto JSON")
+        return body
+
+    def _send_json(self, status: int, payload: dict):
+        self._send_text(status, json.dumps(payload, ensure_ascii=False), "application/json")
+
+    def _send_text(self, status: int, text: str, content_type: str):
+        data = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class ExtractionHTTPServer(ThreadingHTTPServer):
+    """Servidor HTTP con documentos y cola de trabajos compartidos"""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple, work_dir: Optional[str] = None, workers: int = 2,
+                 max_pending: int = 16, max_documents: int = 8, allowed_root: Optional[str] = None,
+                 job_ttl: float = 3600, max_finished_jobs: int = 100):
+        super().__init__(address, _RequestHandler)
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix="pdf_extractor_")
+        self.allowed_root = Path(allowed_root).resolve() if allowed_root else None
+        self.documents = DocumentCache(max_documents=max_documents)
+        self.jobs = JobQueue(self.documents, self.work_dir, workers=workers, max_pending=max_pending,
+                             finished_ttl=job_ttl, max_finished=max_finished_jobs)
+
+    def server_close(self):
+        super().server_close()
+        self.jobs.shutdown()
+
+
+def serve(host: str = "127.0.0.1", port: int = 8765, **kwargs):
+    """Arrancar el servicio HTTP hasta recibir Ctrl+C"""
+    server = ExtractionHTTPServer((host, port), **kwargs)
+    logger.info("Servicio de extracción escuchando", extra={"context": {
+        "url": f"http://{host}:{port}", "work_dir": server.work_dir}})
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,75 @@
+from typing import BinaryIO, List
+
+PDF_HEADER = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+# Objetos reservados: se escriben al final, cuando ya se conocen todas las páginas
+CATALOG_OBJECT = 1
+PAGES_OBJECT = 2
+
+
+def _number(value: float) -> bytes:
+    return (b"%.3f" % value).rstrip(b"0").rstrip(b".")
+
+
+class StreamingImagePDFWriter:
+    """PDF de solo imágenes ("aplanado") escrito página a página
+
+    Cada página es una imagen ya codificada (JPEG, o filas comprimidas con
+    zlib) que ocupa toda la página. Los objetos se escriben en cuanto llegan
+    y el árbol de páginas y la tabla xref al cerrar, así que nunca hace falta
+    más de una página en memoria.
+    """
+
+    def __init__(self, fileobj: BinaryIO):
+        self.fileobj = fileobj
+        self.position = 0
+        self._offsets = {}
+        self._pages: List[int] = []
+        self._next_object = PAGES_OBJECT + 1
+        self._write(PDF_HEADER)
+
+    def _write(self, data: bytes):
+        self.fileobj.write(data)
+        self.position += len(data)
+
+    def _new_object(self) -> int:
+        number = self._next_object
+        self._next_object += 1
+        return number
+
+    def _object(self, number: int, body: bytes, stream: bytes = None):
+        self._offsets[number] = self.position
+        if stream is None:
+            self._write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+            return
+        self._write(b"%d 0 obj\n%s\nstream\n" % (number, body))
+        self._write(stream)
+        self._write(b"\nendstream\nendobj\n")
+
+    def add_page(self, width: float, height: float, data: bytes, pixel_width: int, pixel_height: int,
+                 grayscale: bool = False, bits: int = 8, image_filter: str = "DCTDecode"):
+        """Añadir una página de width x height puntos cubierta por la imagen codificada data"""
+        image, content, page = self._new_object(), self._new_object(), self._new_object()
+        colorspace = b"DeviceGray" if grayscale else b"DeviceRGB"
+        self._object(image, b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /%s "
+                            b"/BitsPerComponent %d /Filter /%s /Length %d >>"
+                     % (pixel_width, pixel_height, colorspace, bits, image_filter.encode("ascii"), len(data)),
+                     data)
+        drawing = b"q %s 0 0 %s 0 0 cm /Im0 Do Q" % (_number(width), _number(height))
+        self._object(content, b"<< /Length %d >>" % len(drawing), drawing)
+        self._object(page, b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %s %s] "
+                           b"/Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R >>"
+                     % (PAGES_OBJECT, _number(width), _number(height), image, content))
+        self._pages.append(page)
+
+    def close(self):
+        """Escribir el árbol de páginas, el catálogo y la tabla xref"""
+        kids = b" ".join(b"%d 0 R" % page for page in self._pages)
+        self._object(PAGES_OBJECT, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._pages)))
+        self._object(CATALOG_OBJECT, b"<< /Type /Catalog /Pages %d 0 R >>" % PAGES_OBJECT)
+
+        xref_position = self.position
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % self._next_object)
+        self._write(b"".join(b"%010d 00000 n \n" % self._offsets[number]
+                             for number in range(1, self._next_object)))
+        self._write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                    % (self._next_object, CATALOG_OBJECT, xref_position))
@@ -0,0 +1,78 @@
+import json
+import logging
+import os
+import sys
+import time
+
+ROOT_LOGGER = "pdf_extractor"
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger hijo del logger raíz de la aplicación"""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+class ContextAdapter(logging.LoggerAdapter):
+    """Adjunta contexto fijo (documento, operación...) a cada evento"""
+
+    def process(self, msg, kwargs):
+        extra = kwargs.get("extra") or {}
+        kwargs["extra"] = {"context": {**self.extra, **extra}}
+        return msg, kwargs
+
+
+def job_logger(logger: logging.Logger, **context) -> ContextAdapter:
+    """Logger con contexto de trabajo, ej: job_logger(log, doc="a.pdf", op="export")"""
+    return ContextAdapter(logger, context)
+
+
+class JsonFormatter(logging.Formatter):
+    """Un objeto JSON por línea, apto para gestores de servicios y agregadores"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+                  + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        event.update(getattr(record, "context", {}))
+        if record.exc_info:
+            event["exc"] = self.formatException(record.exc_info)
+        return json.dumps(event, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato legible: mensaje seguido de los campos de contexto clave=valor"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        context = getattr(record, "context", None)
+        if context:
+            fields = " ".join(f"{k}={v}" for k, v in context.items())
+            line = f"{line} [{fields}]"
+        return line
+
+
+def configure_logging(level: str = None, json_format: bool = None, stream=None):
+    """Configurar el logging de la aplicación (solo desde los puntos de entrada)
+
+    Por defecto usa PDF_EXTRACTOR_LOG_LEVEL (INFO) y PDF_EXTRACTOR_LOG_JSON=1.
+    """
+    if level is None:
+        level = os.environ.get("PDF_EXTRACTOR_LOG_LEVEL", "INFO")
+    if json_format is None:
+        json_format = os.environ.get("PDF_EXTRACTOR_LOG_JSON") == "1"
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter() if json_format else TextFormatter())
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.handlers[:] = [handler]
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    root.propagate = False
+    return root
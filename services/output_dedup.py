@@ -0,0 +1,104 @@
+import hashlib
+from pathlib import Path
+from typing import Dict, Optional
+
+import fitz  # PyMuPDF
+
+from .pdf_objects import object_source, replace_references, without_back_references
+
+
+def _object_digest(doc: fitz.Document, xref: int, cache: Dict[int, bytes]) -> bytes:
+    """Hash de un objeto y de todo lo que referencia, independiente de los números de xref
+
+    Los generadores de formularios suelen copiar fuentes e imágenes en cada
+    página: objetos distintos con el mismo contenido dan el mismo hash.
+    """
+    if xref in cache:
+        return cache[xref]
+    cache[xref] = b"ciclo:%d" % xref  # Marca provisional ante referencias circulares
+    source = without_back_references(object_source(doc, xref))
+    digest = hashlib.sha1(_canonical(doc, source, cache))
+    if doc.xref_is_stream(xref):
+        digest.update(doc.xref_stream_raw(xref))
+    cache[xref] = digest.digest()
+    return cache[xref]
+
+
+def _canonical(doc: fitz.Document, source: bytes, cache: Dict[int, bytes]) -> bytes:
+    """Sustituir cada referencia por el hash del objeto referenciado"""
+    return replace_references(source, lambda xref: _object_digest(doc, xref, cache).hex().encode("ascii"))
+
+
+def page_render_key(page: fitz.Page, rotation: int = 0, cache: Dict[int, bytes] = None) -> str:
+    """Huella de lo que determina el render de una página
+
+    Dos páginas con el mismo flujo de contenido, recursos equivalentes, las
+    mismas anotaciones, tamaño y rotación se renderizan igual (portadas,
+    plantillas repetidas), así que basta con renderizar la primera. cache
+    guarda los hashes de objetos compartidos entre páginas.
+    """
+    cache = {} if cache is None else cache
+    doc = page.parent
+    digest = hashlib.sha1(page.read_contents())
+
+    # Recursos propios o heredados de un nodo superior del árbol de páginas
+    xref = page.xref
+    kind, resources = doc.xref_get_key(xref, "Resources")
+    while kind == "null":
+        kind, parent = doc.xref_get_key(xref, "Parent")
+        if kind != "xref":
+            break
+        xref = int(parent.split()[0])
+        kind, resources = doc.xref_get_key(xref, "Resources")
+    digest.update(_canonical(doc, resources.encode("latin-1"), cache))
+
+    for annot in page.annots():
+        digest.update(_object_digest(doc, annot.xref, cache))
+    digest.update(repr((tuple(page.mediabox), tuple(page.cropbox), page.rotation, rotation)).encode("ascii"))
+    return digest.hexdigest()
+
+
+class OutputDeduplicator:
+    """Salidas de una exportación de imágenes direccionadas por contenido
+
+    Cada página se busca primero por su huella de render (sin renderizarla) y
+    después por el hash de la imagen codificada; si coincide con una salida ya
+    escrita, se registra como duplicada de esa en lugar de guardarse otra vez.
+    """
+
+    def __init__(self):
+        self._by_render: Dict[str, str] = {}
+        self._by_digest: Dict[bytes, str] = {}
+        self._sizes: Dict[str, int] = {}
+        # Hashes de los objetos del PDF ya visitados (ver page_render_key)
+        self.object_digests: Dict[int, bytes] = {}
+        # Nombre de cada salida duplicada -> nombre de la salida guardada
+        self.duplicates: Dict[str, str] = {}
+
+    def original_for_render(self, render_key: str) -> Optional[str]:
+        return self._by_render.get(render_key)
+
+    def original_for_data(self, data: bytes) -> Optional[str]:
+        return self._by_digest.get(hashlib.sha1(data).digest())
+
+    def add(self, name: str, data: bytes, render_key: Optional[str] = None):
+        """Registrar una salida guardada"""
+        self._by_digest.setdefault(hashlib.sha1(data).digest(), name)
+        self._sizes[name] = len(data)
+        if render_key:
+            self._by_render.setdefault(render_key, name)
+
+    def size(self, name: str) -> int:
+        """Bytes de una salida guardada"""
+        return self._sizes[name]
+
+    def add_duplicate(self, stem: str, original: str, render_key: Optional[str] = None) -> str:
+        """Registrar una salida duplicada; devuelve su nombre (con la extensión del original)"""
+        name = stem + Path(original).suffix
+        self.duplicates[name] = original
+        if render_key:
+            self._by_render.setdefault(render_key, original)
+        return name
+
+    def manifest(self) -> dict:
+        return {"duplicates": self.duplicates}
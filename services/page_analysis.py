@@ -0,0 +1,264 @@
+from dataclasses import dataclass
+from itertools import combinations
+from typing import Iterable, List
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from .metrics import metrics
+from .page_images import has_visible_text
+from .parallel import ordered_map, DEFAULT_WORKERS
+
+# Tamaño fijo de las miniaturas de análisis: permite apilarlas en lotes
+ANALYSIS_WIDTH = 96
+ANALYSIS_HEIGHT = 128
+# Resolución a la que se buscan trazos de tinta: el texto de cuerpo sigue siendo visible
+ANALYSIS_DPI = 50
+# Lado máximo del render de análisis (las páginas gigantes se analizan a menos DPI)
+ANALYSIS_MAX_SIDE = 2000
+
+
+def render_gray_thumbnail(service, page_num: int, width: int = ANALYSIS_WIDTH,
+                          height: int = ANALYSIS_HEIGHT) -> np.ndarray:
+    """Renderizar una página en escala de grises a un tamaño fijo (alto x ancho, uint8)"""
+    page = service._get_fitz_doc()[page_num - 1]
+    rect = page.rect
+    mat = fitz.Matrix(width / rect.width, height / rect.height)
+    with metrics.span("analysis.render"):
+        pix = page.get_pixmap(matrix=mat, colorspace=fitz.csGRAY, alpha=False)
+    samples = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+    thumb = np.full((height, width), 255, dtype=np.uint8)
+    # El redondeo de la matriz puede dar un píxel de más o de menos
+    h, w = min(height, pix.height), min(width, pix.width)
+    thumb[:h, :w] = samples[:h, :w]
+    return thumb
+
+
+def render_ink_grid(service, page_num: int, width: int = ANALYSIS_WIDTH,
+                    height: int = ANALYSIS_HEIGHT) -> np.ndarray:
+    """Renderizar una página en grises a ANALYSIS_DPI y reducirla a una rejilla fija
+
+    Cada celda toma el píxel más oscuro de su zona: un trazo de texto de un
+    píxel de ancho marca su celda entera, mientras que promediarlo con el papel
+    de alrededor (como al renderizar directamente la miniatura) lo borraría.
+    """
+    page = service._get_fitz_doc()[page_num - 1]
+    rect = page.rect
+    # Las páginas gigantes se analizan a menos DPI, pero siempre con un píxel por celda como mínimo
+    zoom = min(ANALYSIS_DPI / 72, ANALYSIS_MAX_SIDE / max(rect.width, rect.height))
+    zoom = max(zoom, (width + 1) / rect.width, (height + 1) / rect.height)
+    with metrics.span("analysis.render"):
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csGRAY, alpha=False)
+    samples = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+    rows = np.linspace(0, pix.height, height + 1).astype(int)[:-1]
+    cols = np.linspace(0, pix.width, width + 1).astype(int)[:-1]
+    return np.minimum.reduceat(np.minimum.reduceat(samples, rows, axis=0), cols, axis=1)
+
+
+def iter_thumbnail_batches(service, pages: List[int], batch_size: int,
+                           workers: int = DEFAULT_WORKERS, progress_callback=None,
+                           size: tuple = (ANALYSIS_WIDTH, ANALYSIS_HEIGHT), render=render_gray_thumbnail):
+    """Renderizar miniaturas en paralelo y entregarlas en lotes (páginas, array N x alto x ancho)"""
+    batch_pages, batch = [], []
+    total = len(pages)
+    render_page = lambda page_num: render(service, page_num, *size)
+    for i, (page_num, thumb) in enumerate(zip(pages, ordered_map(render_page, pages, workers))):
+        batch_pages.append(page_num)
+        batch.append(thumb)
+        if len(batch) >= batch_size:
+            yield batch_pages, np.stack(batch)
+            batch_pages, batch = [], []
+            if progress_callback:
+                progress_callback(i + 1, total, f"Analizando página {page_num}")
+    if batch:
+        yield batch_pages, np.stack(batch)
+
+
+@dataclass
+class BlankPageDetector:
+    """Detector de páginas en blanco
+
+    Una página con texto visible nunca está en blanco. El resto (escaneos,
+    dibujos) se clasifica por estadísticas de su rejilla de tinta en grises
+    (render_ink_grid).
+    """
+    # Fracción máxima de celdas con tinta para considerar la página en blanco
+    # (una celda de la rejilla de 96x128 mide unos 2 mm en A4; una línea de texto marca ~1 %)
+    ink_threshold: float = 0.001
+    # Una celda es tinta si es esta cantidad más oscura que el fondo de la página
+    ink_contrast: int = 60
+    # Desviación típica máxima de los niveles de gris (descarta degradados y fotos)
+    max_std: float = 12.0
+    # Fracción de cada borde ignorada (sombras y bordes del escáner)
+    margin: float = 0.05
+    batch_size: int = 256
+
+    def classify(self, stack: np.ndarray) -> np.ndarray:
+        """Clasificar un lote (N x alto x ancho): True donde la página está en blanco"""
+        n, height, width = stack.shape
+        dy, dx = int(height * self.margin), int(width * self.margin)
+        core = stack[:, dy:height - dy, dx:width - dx].reshape(n, -1)
+
+        # El fondo se estima por página: papel reciclado o escaneos grises no son tinta
+        background = np.median(core, axis=1)
+        ink = core < (background - self.ink_contrast)[:, None]
+        coverage = ink.mean(axis=1)
+        std = core.std(axis=1)
+        return (coverage <= self.ink_threshold) & (std <= self.max_std)
+
+    def detect(self, service, pages: Iterable[int], progress_callback=None,
+               workers: int = DEFAULT_WORKERS) -> List[int]:
+        """Devolver las páginas en blanco de la lista dada"""
+        pages = list(pages)
+        # El texto se mira en la capa de texto: una línea corta no llega a mover las estadísticas
+        with_text = ordered_map(lambda page_num: has_visible_text(service._get_fitz_doc()[page_num - 1]),
+                                pages, workers)
+        candidates = [page_num for page_num, text in zip(pages, with_text) if not text]
+        blank = []
+        batches = iter_thumbnail_batches(service, candidates, self.batch_size, workers, progress_callback,
+                                         render=render_ink_grid)
+        for batch_pages, stack in batches:
+            with metrics.span("analysis.blank_classify"):
+                mask = self.classify(stack)
+            blank.extend(p for p, is_blank in zip(batch_pages, mask) if is_blank)
+        return blank
+
+
+# Huella perceptual: DCT de una miniatura de HASH_RENDER_SIZE² píxeles de la que
+# se conservan las HASH_FREQUENCIES² frecuencias más bajas (menos la continua)
+HASH_RENDER_SIZE = 128
+HASH_FREQUENCIES = 16
+
+
+def _dct_matrix(size: int) -> np.ndarray:
+    """Matriz de la DCT-II ortonormal: D @ X @ D.T transforma un bloque completo"""
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * np.sqrt(2 / size)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT = _dct_matrix(HASH_RENDER_SIZE)
+# Orden fijo y barajado de los bits: frecuencias vecinas están correlacionadas y,
+# juntas en el mismo bloque del índice, llenarían sus cubetas de falsos candidatos
+_HASH_ORDER = np.random.default_rng(0).permutation(HASH_FREQUENCIES ** 2 - 1)
+_popcount = getattr(int, "bit_count", None) or (lambda value: bin(value).count("1"))
+
+
+def dct_features(stack: np.ndarray) -> np.ndarray:
+    """Frecuencias bajas de la DCT (sin la continua) de un lote N x lado x lado"""
+    with metrics.span("analysis.dct"):
+        # La DCT de todo el lote en dos productos de matrices
+        coeffs = _DCT @ stack.astype(np.float32) @ _DCT.T
+        low = coeffs[:, :HASH_FREQUENCIES, :HASH_FREQUENCIES].reshape(len(stack), -1)
+    # La componente continua (brillo medio) no distingue páginas
+    return low[:, 1:]
+
+
+def perceptual_hashes(features: np.ndarray) -> List[int]:
+    """Huellas perceptuales (enteros de un bit por frecuencia) de N páginas
+
+    Cada frecuencia se compara con su mediana en todo el documento, no con la
+    de la propia página: en documentos con la misma maqueta en todas las páginas
+    muchas frecuencias valen casi lo mismo en todas y, con la mediana por página,
+    darían bits constantes que no distinguen nada.
+    """
+    median = np.median(features, axis=0)
+    bits = np.packbits((features > median)[:, _HASH_ORDER], axis=1)
+    return [int.from_bytes(row.tobytes(), "big") for row in bits]
+
+
+class HammingIndex:
+    """Índice de huellas por bloques para buscar vecinos a distancia de Hamming <= r
+
+    La huella se divide en `chunks` bloques: si dos huellas difieren en r bits o
+    menos, por el principio del palomar algún bloque difiere en r // chunks bits
+    o menos. Basta con consultar, en cada bloque, los valores a esa distancia y
+    verificar solo esos candidatos en lugar de comparar todos contra todos.
+    """
+
+    def __init__(self, bits: int, radius: int, chunks: int = None):
+        # Con más de radius / 2 bloques basta con buscar a distancia 0 o 1 en cada uno
+        chunks = chunks or max(16, radius // 2 + 1)
+        self.radius = radius
+        self.chunk_bits = -(-bits // chunks)
+        self.chunks = chunks
+        self._mask = (1 << self.chunk_bits) - 1
+        self._tables = [{} for _ in range(chunks)]
+        self._keys = []
+        chunk_radius = radius // chunks
+        self._flips = [
+            sum(1 << b for b in combo)
+            for k in range(chunk_radius + 1)
+            for combo in combinations(range(self.chunk_bits), k)
+        ]
+
+    def _chunks(self, key: int):
+        for c in range(self.chunks):
+            yield c, (key >> (c * self.chunk_bits)) & self._mask
+
+    def search(self, key: int) -> List[int]:
+        """Posiciones de las huellas añadidas a distancia <= radius"""
+        candidates = set()
+        for c, value in self._chunks(key):
+            table = self._tables[c]
+            for flip in self._flips:
+                bucket = table.get(value ^ flip)
+                if bucket:
+                    candidates.update(bucket)
+        return [i for i in candidates if _popcount(key ^ self._keys[i]) <= self.radius]
+
+    def add(self, key: int) -> int:
+        position = len(self._keys)
+        self._keys.append(key)
+        for c, value in self._chunks(key):
+            self._tables[c].setdefault(value, []).append(position)
+        return position
+
+
+@dataclass
+class DuplicatePageFinder:
+    """Agrupa páginas casi idénticas por su huella perceptual"""
+    # Bits distintos (de HASH_FREQUENCIES²) tolerados entre dos copias de una página
+    max_distance: int = 36
+    batch_size: int = 256
+
+    def page_hashes(self, service, pages: List[int], progress_callback=None,
+                    workers: int = DEFAULT_WORKERS) -> List[int]:
+        batches = iter_thumbnail_batches(service, pages, self.batch_size, workers, progress_callback,
+                                         size=(HASH_RENDER_SIZE, HASH_RENDER_SIZE))
+        # Solo se guardan las frecuencias bajas (1 KB por página), no las miniaturas
+        features = [dct_features(stack) for _, stack in batches]
+        if not features:
+            return []
+        return perceptual_hashes(np.concatenate(features))
+
+    def group(self, pages: List[int], hashes: List[int]) -> List[List[int]]:
+        """Grupos (de 2 o más páginas, ordenados) de huellas cercanas"""
+        index = HammingIndex(HASH_FREQUENCIES ** 2 - 1, self.max_distance)
+        parent = list(range(len(pages)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        with metrics.span("analysis.duplicate_grouping"):
+            # Cada página se verifica solo contra los candidatos del índice
+            for i, key in enumerate(hashes):
+                for j in index.search(key):
+                    parent[find(i)] = find(j)
+                index.add(key)
+
+        groups = {}
+        for i, page_num in enumerate(pages):
+            groups.setdefault(find(i), []).append(page_num)
+        return sorted((sorted(g) for g in groups.values() if len(g) > 1), key=lambda g: g[0])
+
+    def find(self, service, pages: Iterable[int], progress_callback=None,
+             workers: int = DEFAULT_WORKERS) -> List[List[int]]:
+        """Grupos de páginas duplicadas entre las dadas"""
+        pages = list(pages)
+        return self.group(pages, self.page_hashes(service, pages, progress_callback, workers))
@@ -0,0 +1,130 @@
+import math
+from dataclasses import dataclass
+from typing import Optional
+
+import fitz  # PyMuPDF
+
+from .resolution_policy import PDF_POINTS_PER_INCH
+
+# Formatos que se pueden escribir tal cual: cualquier visor los abre
+DIRECT_IMAGE_EXTENSIONS = {"jpeg": "jpg", "png": "png"}
+# Fracción mínima de la página que debe cubrir la imagen para sustituir al render
+MIN_PAGE_COVERAGE = 0.95
+# Tipo de texto invisible (capa OCR) en page.get_texttrace()
+INVISIBLE_TEXT = 3
+
+
+@dataclass
+class EmbeddedImage:
+    """Imagen incrustada lista para escribirse sin re-rasterizar"""
+    xref: int
+    ext: str  # Extensión del archivo de salida ("jpg", "png")
+    data: bytes
+    width: int
+    height: int
+
+
+def has_visible_text(page: fitz.Page) -> bool:
+    """Texto que el render muestra (no la capa invisible del OCR ni solo espacios)"""
+    return any(span["type"] != INVISIBLE_TEXT and any(chr(char[0]).strip() for char in span["chars"])
+               for span in page.get_texttrace())
+
+
+def _has_visible_content(page: fitz.Page) -> bool:
+    """Texto visible o dibujos vectoriales, que el render mostraría sobre la imagen"""
+    # La capa de texto invisible de un escaneo con OCR no cambia el aspecto de la página
+    if has_visible_text(page):
+        return True
+    return bool(page.get_drawings())
+
+
+def single_page_image(page: fitz.Page) -> Optional[EmbeddedImage]:
+    """La imagen de una página que no es más que una imagen (un escaneo), o None
+
+    Solo se acepta cuando escribir la imagen original equivale al render: una
+    única imagen derecha que cubre la página, sin máscara ni otro contenido
+    visible, en escala de grises o RGB y en un formato que cualquier visor abre.
+    """
+    if page.rotation:
+        return None
+    images = page.get_images(full=True)
+    if len(images) != 1:
+        return None
+    xref, smask = images[0][0], images[0][1]
+    if smask:
+        return None
+
+    placements = page.get_image_rects(xref, transform=True)
+    if len(placements) != 1:
+        return None
+    rect, matrix = placements[0]
+    # Sin giros ni espejos: la imagen se ve como está almacenada
+    if matrix.b or matrix.c or matrix.a <= 0 or matrix.d <= 0:
+        return None
+    page_rect = page.rect
+    if (rect & page_rect).get_area() < MIN_PAGE_COVERAGE * page_rect.get_area():
+        return None
+
+    if _has_visible_content(page):
+        return None
+
+    extracted = page.parent.extract_image(xref)
+    ext = DIRECT_IMAGE_EXTENSIONS.get(extracted.get("ext"))
+    # CMYK y otros espacios de color no se ven igual fuera del PDF
+    if not ext or extracted.get("colorspace") not in (1, 3):
+        return None
+    return EmbeddedImage(xref, ext, extracted["image"], extracted["width"], extracted["height"])
+
+
+# Fracción mínima de la página que debe cubrir una imagen para considerarla dominante
+MIN_DOMINANT_COVERAGE = 0.5
+
+
+def dominant_image_dpi(page: fitz.Page) -> Optional[float]:
+    """Resolución efectiva (DPI) de la imagen que domina la página, o None si no hay
+
+    Es la resolución a la que se colocó la imagen: sus píxeles entre el tamaño
+    que ocupa en la página. Renderizar por encima no añade información, salvo
+    que la página tenga además texto visible o dibujos vectoriales (un fondo
+    escaneado bajo texto real): esas páginas no tienen resolución nativa.
+    """
+    page_rect = page.rect
+    best_area, best_dpi = 0.0, None
+    for image in page.get_images(full=True):
+        xref, width, height = image[0], image[2], image[3]
+        for rect, matrix in page.get_image_rects(xref, transform=True):
+            area = (rect & page_rect).get_area()
+            # La matriz lleva el cuadrado unidad de la imagen a la página: sus
+            # filas son los lados de la imagen en puntos (también si está girada)
+            side_x = math.hypot(matrix.a, matrix.b)
+            side_y = math.hypot(matrix.c, matrix.d)
+            if area > best_area and side_x and side_y:
+                best_area = area
+                # Si la imagen no es cuadrada en DPI, se conserva el eje más denso
+                best_dpi = max(width / side_x, height / side_y) * PDF_POINTS_PER_INCH
+    if best_area < MIN_DOMINANT_COVERAGE * page_rect.get_area():
+        return None
+    if _has_visible_content(page):
+        return None
+    return best_dpi
+
+
+def image_file(doc: fitz.Document, xref: int, smask: int = 0) -> tuple:
+    """Archivo de una imagen incrustada: (extensión, bytes)
+
+    Se copia el flujo original cuando cualquier visor lo abre (JPEG, PNG en
+    grises o RGB); el resto (JPEG 2000, JBIG2, CMYK, imágenes con máscara de
+    transparencia) se decodifica y se guarda como PNG.
+    """
+    if not smask:
+        extracted = doc.extract_image(xref)
+        ext = DIRECT_IMAGE_EXTENSIONS.get(extracted.get("ext"))
+        if ext and extracted.get("colorspace") in (1, 3):
+            return ext, extracted["image"]
+
+    pix = fitz.Pixmap(doc, xref)
+    if pix.colorspace and pix.colorspace.n not in (1, 3):
+        pix = fitz.Pixmap(fitz.csRGB, pix)
+    if smask:
+        pix = fitz.Pixmap(pix, fitz.Pixmap(doc, smask))
+    return "png", pix.tobytes("png")
@@ -18,12 +18,12 @@ class PageManager:
         self.pages: Dict[int, PageInfo] = {}
         self.selected_pages: List[int] = []
     
-    def add_page(self, page_number: int, image: Image.Image):
-        """Agregar una página al gestor"""
+    def add_page(self, page_number: int, image: Image.Image = None):
+        """Agregar una página al gestor (la imagen es opcional fuera de la UI)"""
         self.pages[page_number] = PageInfo(
             page_number=page_number,
             original_image=image,
-            rotated_image=image.copy()
+            rotated_image=image.copy() if image else None
         )
         if page_number not in self.selected_pages:
             self.selected_pages.append(page_number)
@@ -55,7 +55,20 @@ class PageManager:
                 self.selected_pages.remove(page_number)
             return True
         return False
-    
+
+    def delete_pages(self, page_numbers) -> int:
+        """Marcar varias páginas como eliminadas de una sola vez; devuelve cuántas cambiaron"""
+        to_delete = {
+            n for n in page_numbers
+            if n in self.pages and not self.pages[n].is_deleted
+        }
+        for page_number in to_delete:
+            self.pages[page_number].is_deleted = True
+        if to_delete:
+            # Una sola pasada en lugar de list.remove() por página
+            self.selected_pages = [n for n in self.selected_pages if n not in to_delete]
+        return len(to_delete)
+
     def restore_page(self, page_number: int):
         """Restaurar una página eliminada"""
         if page_number in self.pages:
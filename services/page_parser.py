@@ -2,13 +2,30 @@ import re
 
 class PageParser:
     @staticmethod
-    def parse(pages_str: str) -> list[int]:
+    def needs_index(pages_str: str) -> bool:
+        """Indica si la expresión incluye búsquedas de texto entre comillas"""
+        return '"' in pages_str
+
+    @staticmethod
+    def parse(pages_str: str, index=None) -> list[int]:
+        """Parsear '1,3,5-7' y búsquedas entre comillas ('"factura 4471"')
+
+        Las búsquedas devuelven las páginas que contienen todas sus palabras y
+        requieren un índice de texto con método search().
+        """
         pages = set()
-        for part in re.split(r',', pages_str):
+        # Los espacios tras cada coma se saltan antes de decidir si el término va entre comillas
+        for part in re.findall(r'\s*("[^"]*"|[^,]+)', pages_str):
             part = part.strip()
             if not part:
                 continue
-            if re.match(r'^\d+-\d+$', part):
+            if part.startswith('"') and (len(part) < 2 or not part.endswith('"')):
+                raise ValueError(f"Comillas sin cerrar: '{part}'")
+            if part.startswith('"'):
+                if index is None:
+                    raise ValueError("La búsqueda por texto requiere el índice del documento")
+                pages.update(index.search(part[1:-1]))
+            elif re.match(r'^\d+-\d+$', part):
                 start, end = map(int, part.split('-'))
                 if start > end:
                     raise ValueError("Rango inválido.")
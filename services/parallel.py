@@ -0,0 +1,25 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator
+
+# Hilos por defecto para el trabajo por página (render, texto, análisis)
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def ordered_map(func: Callable, items: Iterable, workers: int = DEFAULT_WORKERS,
+                window: int = None) -> Iterator:
+    """Como map() pero en un pool de hilos, conservando el orden
+
+    Como mucho `window` resultados (2 por hilo por defecto) están en vuelo o
+    esperando a ser consumidos, así la memoria no crece con el número de páginas.
+    """
+    window = window or workers * 2
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for item in items:
+            in_flight.append(pool.submit(func, item))
+            if len(in_flight) >= window:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
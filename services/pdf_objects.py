@@ -0,0 +1,31 @@
+import re
+from typing import Callable, List
+
+import fitz  # PyMuPDF
+
+# Referencias indirectas ("12 0 R") y las que apuntan hacia arriba en el árbol
+_REFERENCE = re.compile(rb"(\d+) (\d+) R")
+_BACK_REFERENCE = re.compile(rb"/(?:P|Parent) \d+ \d+ R")
+
+
+def object_source(doc: fitz.Document, xref: int) -> bytes:
+    """Diccionario de un objeto del PDF tal como se escribe (sin su flujo)"""
+    return doc.xref_object(xref, compressed=True).encode("latin-1")
+
+
+def without_back_references(source: bytes) -> bytes:
+    """Quitar las referencias al padre (/P, /Parent)
+
+    Seguirlas recorrería el árbol hacia arriba y, desde ahí, todo el documento.
+    """
+    return _BACK_REFERENCE.sub(b"", source)
+
+
+def child_references(source: bytes) -> List[int]:
+    """Objetos a los que apunta un objeto, sin subir por el árbol"""
+    return [int(m.group(1)) for m in _REFERENCE.finditer(without_back_references(source))]
+
+
+def replace_references(source: bytes, replacement: Callable[[int], bytes]) -> bytes:
+    """Sustituir cada referencia por lo que devuelva replacement(xref)"""
+    return _REFERENCE.sub(lambda m: replacement(int(m.group(1))), source)
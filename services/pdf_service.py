@@ -3,67 +3,270 @@ from pypdf import PdfReader, PdfWriter
 import fitz  # PyMuPDF
 from PIL import Image
 import zipfile
+import zlib
 import os
-from typing import List
+import threading
+import logging
+import time
+import json
+import hashlib
+import numpy as np
+from contextlib import ExitStack
+from typing import BinaryIO, Dict, List, Optional
+from io import BytesIO
 from .document_service import DocumentService
 from .page_manager import PageManager, PageInfo
+from .metrics import metrics
+from .log import get_logger, job_logger
+from .resolution_policy import ExportResolutionPolicy
+from .tiled_render import StreamingPNGWriter, DEFAULT_TILE_WORKERS
+from .parallel import ordered_map, DEFAULT_WORKERS
+from .process_render import ProcessRenderer, render_processes_from_env
+from .cache_store import document_fingerprint
+from .text_index import TextIndex
+from .page_analysis import BlankPageDetector, DuplicatePageFinder
+from .page_images import EmbeddedImage, dominant_image_dpi, image_file, single_page_image
+from .encoding_profiles import DEFAULT_PROFILE, EncodingStats, encode_params, png_compress_level
+from .export_checkpoint import ExportCheckpoint
+from .atomic_output import OutputWriter
+from .output_dedup import OutputDeduplicator, page_render_key
+from .export_plan import ExportTarget
+from .export_pipeline import ExportPipeline, PageWork, Stage
+from .export_sinks import (CombinedPDFSink, EncodedPage, FileSink, FolderSink, ImagePDFSink, PageSink, TarSink,
+                           TiffSink, ZipSink, page_file_stem)
+from .pdf_split import SplitRule, safe_title, split_chunks
+from .color_modes import (BITONAL_TIFF_COMPRESSION, DEFAULT_COLOR_MODE, check_color_mode, otsu_threshold,
+                          pack_bitonal, pil_mode, render_colorspace, to_bitonal)
+
+# Nombre de salida por defecto de cada formato de exportación ("{}" = nombre base del PDF)
+EXPORT_OUTPUT_NAMES = {
+    "pdf_combined": "{}.pdf",
+    "pdf_individual": "{}",
+    "images_zip": "{}_imagenes.zip",
+    "images_folder": "{}",
+    "text_txt": "{}.txt",
+    "text_json": "{}.json",
+    "embedded_zip": "{}_imagenes_originales.zip",
+    "embedded_folder": "{}_imagenes_originales",
+    "images_tiff": "{}.tif",
+    "images_pdf": "{}_imagen.pdf",
+    "pdf_split": "{}",
+    "images_tar": "{}_imagenes.tar",
+}
+
+# Formatos cuyo resultado es una carpeta en lugar de un archivo
+FOLDER_EXPORT_FORMATS = {"pdf_individual", "images_folder", "embedded_folder", "pdf_split"}
+
+logger = get_logger("pdf_service")
 
 class PDFService(DocumentService):
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, resolution_policy: ExportResolutionPolicy = None, fsync: str = None,
+                 render_processes: int = None):
         self.pdf_path = pdf_path
+        self.document_name = Path(pdf_path).name
         self.reader = PdfReader(pdf_path)
         self.total_pages = len(self.reader.pages)
+        
+        # Resolución de exportación acotada por un presupuesto de memoria por página
+        self.resolution_policy = resolution_policy or ExportResolutionPolicy.from_env()
+        # DPI efectivo por página de la última exportación de imágenes
+        self.last_export_report: dict = {}
+        # Tiempo de codificación y bytes por página de la última exportación de imágenes
+        self.last_encoding_report: dict = {}
+        # Coste de codificación de cada salida de imágenes del último plan de exportación
+        self.last_plan_report: dict = {}
+        # Archivos generados por la última división (nombre y páginas de cada uno)
+        self.last_split_report: dict = {}
+        # Resolución objetivo de exportación por página (según su imagen dominante)
+        self._target_dpi = {}
+        # Durabilidad de las salidas ("file", "batch", "none"; None = PDF_EXTRACTOR_FSYNC)
+        self.fsync = fsync
+        
+        # Huella del contenido e índice de texto, calculados bajo demanda
+        self._fingerprint = None
+        self._text_index = None
+        self._index_lock = threading.Lock()
+        
+        # pypdf no es seguro entre hilos: serializar el acceso al lector compartido
+        self._reader_lock = threading.RLock()
+        
+        # Un documento PyMuPDF "caliente" por hilo, reutilizado entre renderizados
+        self._fitz_lock = threading.Lock()
+        self._fitz_docs = {}  # ident del hilo -> (hilo, documento)
+        
+        # Procesos de render (None = PDF_EXTRACTOR_RENDER_PROCESSES; 0 = en hilos), creados bajo demanda
+        self.render_processes = render_processes_from_env() if render_processes is None else render_processes
+        self._process_renderer: Optional[ProcessRenderer] = None
+
+    def _get_fitz_doc(self):
+        """Obtener el documento PyMuPDF del hilo actual, abriéndolo si es necesario"""
+        thread = threading.current_thread()
+        with self._fitz_lock:
+            entry = self._fitz_docs.get(thread.ident)
+            if entry and entry[0] is thread:
+                return entry[1]
+            
+            # Cerrar documentos de hilos que ya terminaron antes de abrir otro
+            for ident, (owner, doc) in list(self._fitz_docs.items()):
+                if not owner.is_alive() or ident == thread.ident:
+                    doc.close()
+                    del self._fitz_docs[ident]
+            
+            doc = fitz.open(self.pdf_path)
+            self._fitz_docs[thread.ident] = (thread, doc)
+            return doc
+
+    @property
+    def fingerprint(self) -> str:
+        """Huella del contenido del documento (clave de su caché en disco)"""
+        if self._fingerprint is None:
+            self._fingerprint = document_fingerprint(self.pdf_path)
+        return self._fingerprint
+    
+    def get_text_index(self, progress_callback=None) -> TextIndex:
+        """Índice de texto del documento; lo carga de la caché o lo construye una vez
+        
+        Si otro hilo lo está construyendo, espera a que termine.
+        """
+        with self._index_lock:
+            if self._text_index is None:
+                self._text_index = TextIndex.load_or_build(self, self.fingerprint, progress_callback)
+            return self._text_index
+    
+    def is_text_index_ready(self) -> bool:
+        return self._text_index is not None
+
+    def find_blank_pages(self, pages: List[int] = None, detector: BlankPageDetector = None,
+                         progress_callback=None) -> List[int]:
+        """Páginas en blanco entre las dadas (todas por defecto)"""
+        pages = list(pages) if pages is not None else list(range(1, self.total_pages + 1))
+        detector = detector or BlankPageDetector()
+        start = time.perf_counter()
+        with metrics.span("operation.blank_detection"):
+            blank = detector.detect(self, pages, progress_callback)
+        elapsed = time.perf_counter() - start
+        job_logger(logger, doc=self.document_name, op="blank_detection").info(
+            "Detección de páginas en blanco completada",
+            extra={
+                "pages": len(pages),
+                "blank": len(blank),
+                "duration_s": round(elapsed, 3),
+                "pages_per_s": round(len(pages) / elapsed, 1) if elapsed > 0 else None,
+            },
+        )
+        return blank
+
+    def find_duplicate_pages(self, pages: List[int] = None, finder: DuplicatePageFinder = None,
+                             progress_callback=None) -> List[List[int]]:
+        """Grupos de páginas casi idénticas entre las dadas (todas por defecto)"""
+        pages = list(pages) if pages is not None else list(range(1, self.total_pages + 1))
+        finder = finder or DuplicatePageFinder()
+        start = time.perf_counter()
+        with metrics.span("operation.duplicate_detection"):
+            groups = finder.find(self, pages, progress_callback)
+        elapsed = time.perf_counter() - start
+        job_logger(logger, doc=self.document_name, op="duplicate_detection").info(
+            "Detección de páginas duplicadas completada",
+            extra={
+                "pages": len(pages),
+                "groups": len(groups),
+                "duplicates": sum(len(g) - 1 for g in groups),
+                "duration_s": round(elapsed, 3),
+            },
+        )
+        return groups
+
+    def _get_process_renderer(self) -> Optional[ProcessRenderer]:
+        """Procesos de render del documento, arrancados en el primer render (None si están desactivados)"""
+        if not self.render_processes:
+            return None
+        with self._fitz_lock:
+            if self._process_renderer is None:
+                self._process_renderer = ProcessRenderer(self.pdf_path, self.render_processes)
+            return self._process_renderer
+
+    def close(self):
+        """Cerrar los documentos PyMuPDF abiertos por todos los hilos y los procesos de render"""
+        with self._fitz_lock:
+            for _, doc in self._fitz_docs.values():
+                doc.close()
+            self._fitz_docs.clear()
+            renderer, self._process_renderer = self._process_renderer, None
+        if renderer:
+            renderer.close()
 
     def get_total_pages(self) -> int:
         return self.total_pages
+    
+    def _output(self) -> OutputWriter:
+        """Escritor atómico de las salidas de una operación (ver OutputWriter)"""
+        return OutputWriter(self.fsync)
 
     def extract(self, pages: list[int], output_path: str) -> int:
+        with self._reader_lock, metrics.span("operation.extract"):
+            return self._extract(pages, output_path)
+
+    def _extract(self, pages: list[int], output_path: str) -> int:
+        log = job_logger(logger, doc=self.document_name, op="extract")
+        # Los eventos por página solo existen en DEBUG: fuera del bucle caliente
+        debug = log.isEnabledFor(logging.DEBUG)
+        start = time.perf_counter()
         try:
             writer = PdfWriter()
             pages_found = 0
-            
-            print(f"Intentando extraer páginas: {pages}")
-            print(f"Total de páginas en PDF: {self.total_pages}")
+            out_of_range = 0
+            failed = 0
             
             for page_num in pages:
                 if 1 <= page_num <= self.total_pages:
                     try:
                         writer.add_page(self.reader.pages[page_num - 1])
                         pages_found += 1
-                        print(f"Página {page_num} añadida exitosamente")
+                        if debug:
+                            log.debug("Página añadida", extra={"page": page_num})
                     except Exception as e:
-                        print(f"Error al añadir página {page_num}: {e}")
+                        failed += 1
+                        log.warning("Error al añadir página", extra={"page": page_num, "error": str(e)})
                 else:
-                    print(f"Página {page_num} fuera de rango (1-{self.total_pages})")
+                    out_of_range += 1
+                    if debug:
+                        log.debug("Página fuera de rango", extra={"page": page_num, "total": self.total_pages})
             
             if pages_found > 0:
-                # Crear el directorio si no existe
-                output_dir = Path(output_path).parent
-                output_dir.mkdir(parents=True, exist_ok=True)
-                print(f"Directorio de salida: {output_dir}")
-                
-                # Escribir el archivo
-                with open(output_path, "wb") as f:
+                # Escribir el archivo (el directorio se crea si no existe)
+                with metrics.span("pypdf.write"), self._output() as out, out.open(output_path) as f:
                     writer.write(f)
-                print(f"PDF guardado en: {output_path}")
-            else:
-                print("No se encontraron páginas válidas para extraer")
-                
+            
+            log.info(
+                "Extracción completada" if pages_found else "No se encontraron páginas válidas para extraer",
+                extra={
+                    "requested": len(pages),
+                    "pages": pages_found,
+                    "out_of_range": out_of_range,
+                    "failed": failed,
+                    "output": output_path,
+                    "duration_s": round(time.perf_counter() - start, 3),
+                },
+            )
             return pages_found
             
-        except Exception as e:
-            print(f"Error en extract(): {e}")
-            raise e
+        except Exception:
+            log.error("Error en la extracción", exc_info=True)
+            raise
 
-    def render_page(self, page_num: int, scale: float = 1.0, for_export: bool = False):
-        """Convierte página en imagen PIL para preview o exportación."""
+    def render_page(self, page_num: int, scale: float = 1.0, for_export: bool = False,
+                    color_mode: str = DEFAULT_COLOR_MODE):
+        """Convierte página en imagen PIL para preview o exportación.
+        
+        color_mode: "color" (RGB), "gray" (escala de grises renderizada por PyMuPDF)
+        o "bitonal" (1 bit por píxel, umbral de Otsu sobre la escala de grises).
+        """
         try:
-            # Abrir el documento con PyMuPDF
-            doc = fitz.open(self.pdf_path)
+            # Documento PyMuPDF reutilizado por el hilo actual
+            doc = self._get_fitz_doc()
             
             # Verificar que la página existe (PyMuPDF usa índice basado en 0)
             if page_num < 1 or page_num > len(doc):
-                doc.close()
                 return None
             
             # Obtener la página (convertir a índice basado en 0)
@@ -71,149 +274,693 @@ class PDFService(DocumentService):
             
             # Determinar escalado según el propósito
             if for_export:
-                # Para exportación: alta calidad (300 DPI equivalente)
-                target_scale = 4.17  # 300 DPI / 72 DPI
+                # Para exportación: 300 DPI (o la resolución nativa de un escaneo) salvo
+                # que la página exceda el presupuesto de memoria
+                target_scale, effective_dpi = self.resolution_policy.scale_for(
+                    page.rect.width, page.rect.height, dpi=self.page_target_dpi(page_num)
+                )
             else:
                 # Para preview: calidad moderada pero eficiente
                 target_scale = 2.0 if scale == 1.0 else scale
             
-            # Crear una matriz de transformación para el escalado
-            mat = fitz.Matrix(target_scale, target_scale)
-            
-            # Renderizar la página como imagen con alta calidad
-            pix = page.get_pixmap(matrix=mat, alpha=False)  # Sin canal alfa para mejor compresión
+            renderer = self._get_process_renderer()
+            if renderer:
+                # Render en otro proceso: la imagen llega por memoria compartida (ver ProcessRenderer)
+                img = renderer.render(page, target_scale, color_mode)
+            else:
+                # Crear una matriz de transformación para el escalado
+                mat = fitz.Matrix(target_scale, target_scale)
+                
+                # Renderizar la página como imagen con alta calidad
+                colorspace = render_colorspace(color_mode)
+                with metrics.span("render.rasterize"):
+                    # Sin canal alfa para mejor compresión
+                    pix = page.get_pixmap(matrix=mat, colorspace=colorspace, alpha=False)
+                
+                # Convertir a PIL Image directamente desde las muestras
+                # (sin codificar un PNG intermedio, que duplicaba memoria y tiempo)
+                with metrics.span("render.to_pil"):
+                    img = Image.frombytes(pil_mode(colorspace), (pix.width, pix.height), pix.samples)
+                pix = None
             
-            # Convertir a bytes PNG
-            img_data = pix.tobytes("png")
+            if for_export:
+                # Los codificadores escriben este DPI en los metadatos del archivo
+                img.info["dpi"] = (effective_dpi, effective_dpi)
             
-            # Convertir a PIL Image
-            from io import BytesIO
-            img = Image.open(BytesIO(img_data))
+            if color_mode == "bitonal":
+                with metrics.span("render.threshold"):
+                    img = to_bitonal(img)
             
             # Solo redimensionar si es para preview
             if not for_export and img.width > 300:
                 ratio = 300 / img.width
                 new_height = int(img.height * ratio)
-                img = img.resize((300, new_height), Image.Resampling.LANCZOS)
+                with metrics.span("render.resize"):
+                    img = img.resize((300, new_height), Image.Resampling.LANCZOS)
             
-            doc.close()
             return img
             
         except Exception as e:
-            print(f"Error renderizando página {page_num}: {e}")
+            job_logger(logger, doc=self.document_name, op="render").warning(
+                "Error renderizando página", extra={"page": page_num, "error": str(e)})
             return None
     
-    def export_as_images_zip(self, page_manager: PageManager, output_path: str, 
-                            image_format: str = "PNG", progress_callback=None) -> bool:
-        """Exportar páginas como imágenes en un archivo ZIP"""
+    def page_target_dpi(self, page_num: int) -> float:
+        """Resolución de exportación de una página: la nativa de su imagen dominante,
+        acotada por la política, o la nominal si no tiene una"""
+        policy = self.resolution_policy
+        if not policy.match_native:
+            return policy.dpi
+        target = self._target_dpi.get(page_num)
+        if target is None:
+            with metrics.span("render.native_dpi"):
+                native = dominant_image_dpi(self._get_fitz_doc()[page_num - 1])
+            target = self._target_dpi[page_num] = policy.target_dpi(native)
+        return target
+    
+    def extract_page_image(self, page_num: int) -> Optional[EmbeddedImage]:
+        """Imagen original de una página escaneada (una sola imagen que la cubre), o None"""
+        with metrics.span("embedded.extract"):
+            return single_page_image(self._get_fitz_doc()[page_num - 1])
+    
+    def _should_tile(self, page_num: int, image_format: str) -> bool:
+        """Páginas que exceden el presupuesto y pueden escribirse por franjas"""
+        policy = self.resolution_policy
+        if policy.mode != "tile" or image_format.upper() != "PNG":
+            return False
+        rect = self._get_fitz_doc()[page_num - 1].rect
+        return policy.exceeds_budget(rect.width, rect.height, dpi=self.page_target_dpi(page_num))
+    
+    def render_page_tiled(self, page_num: int, output: BinaryIO, rotation: int = 0,
+                          dpi: float = None, workers: int = DEFAULT_TILE_WORKERS,
+                          compress_level: int = 6, color_mode: str = DEFAULT_COLOR_MODE) -> float:
+        """Renderizar una página por franjas en paralelo y escribirla como PNG en `output`
+        
+        La memoria máxima depende del tamaño de franja, no del tamaño de la página.
+        En modo bitonal el umbral se calcula una vez sobre un render a 72 DPI, para
+        que todas las franjas usen el mismo. Devuelve el DPI usado.
+        """
+        dpi = dpi or self.page_target_dpi(page_num)
+        scale = dpi / 72
+        # La rotación va en la matriz: las franjas ya salen en la orientación final
+        mat = fitz.Matrix(scale, scale).prerotate(rotation)
+        inverse = ~mat
+        page_rect = self._get_fitz_doc()[page_num - 1].rect
+        bounds = (page_rect * mat).irect
+        width, height = bounds.width, bounds.height
+        strip_rows = max(1, self.resolution_policy.tile_pixels // width)
+        colorspace = render_colorspace(color_mode)
+        mode = pil_mode(colorspace)
+        threshold = None
+        if color_mode == "bitonal":
+            with metrics.span("render.threshold"):
+                preview = self._get_fitz_doc()[page_num - 1].get_pixmap(colorspace=colorspace, alpha=False)
+                threshold = otsu_threshold(np.frombuffer(preview.samples, dtype=np.uint8))
+        
+        def render_strip(y0: int) -> tuple:
+            rows = min(strip_rows, height - y0)
+            # Franja en coordenadas de salida llevada a coordenadas de página
+            clip = fitz.Rect(bounds.x0, bounds.y0 + y0, bounds.x1, bounds.y0 + y0 + rows) * inverse
+            page = self._get_fitz_doc()[page_num - 1]
+            with metrics.span("render.rasterize_tile"):
+                pix = page.get_pixmap(matrix=mat, clip=clip, colorspace=colorspace, alpha=False)
+            if (pix.width, pix.height) == (width, rows):
+                samples = pix.samples
+            else:
+                # El redondeo del clip puede sumar o restar un píxel: ajustar al tamaño exacto
+                strip = Image.new(mode, (width, rows), "white")
+                strip.paste(Image.frombytes(mode, (pix.width, pix.height), pix.samples), (0, 0))
+                samples = strip.tobytes()
+            if threshold is not None:
+                gray = np.frombuffer(samples, dtype=np.uint8).reshape(rows, width)
+                samples = pack_bitonal(gray, threshold)
+            return rows, samples
+        
+        writer = StreamingPNGWriter(output, width, height, dpi, compress_level=compress_level,
+                                    channels=colorspace.n, bit_depth=1 if threshold is not None else 8)
+        # Franjas renderizadas en paralelo y escritas en orden con ventana acotada
+        for rows, samples in ordered_map(render_strip, range(0, height, strip_rows), workers):
+            with metrics.span("encode.png_strip"):
+                writer.write_rows(samples, rows)
+        writer.close()
+        return dpi
+    
+    def _encode_image(self, img: Image.Image, image_format: str, profile: str = DEFAULT_PROFILE,
+                      stats: EncodingStats = None) -> bytes:
+        """Codificar una imagen con los parámetros del perfil para su formato"""
+        params = encode_params(profile, image_format)
+        if img.mode == "1" and image_format.upper() == "TIFF":
+            params["compression"] = BITONAL_TIFF_COMPRESSION
+        img_buffer = BytesIO()
+        start = time.perf_counter()
+        with metrics.span(f"encode.{image_format.lower()}"):
+            img.save(img_buffer, format=image_format.upper(), dpi=img.info.get("dpi", (72, 72)), **params)
+        data = img_buffer.getvalue()
+        if stats:
+            stats.add(time.perf_counter() - start, len(data))
+        return data
+    
+    def _embedded_for_export(self, page_info: PageInfo, prefer_embedded: bool) -> Optional[EmbeddedImage]:
+        """Imagen original utilizable en la exportación (sin rotación pedida por el usuario)"""
+        if not prefer_embedded or page_info.rotation:
+            return None
         try:
-            active_pages = page_manager.get_active_pages()
-            if not active_pages:
-                return False
-            
-            base_name = Path(self.pdf_path).stem
+            return self.extract_page_image(page_info.page_number)
+        except Exception as e:
+            # Ante cualquier rareza del PDF se vuelve al render normal
+            logger.debug("Imagen incrustada no utilizable",
+                         extra={"context": {"page": page_info.page_number, "error": str(e)}})
+            return None
+    
+    def _render_key(self, page_info: PageInfo, dedup: OutputDeduplicator) -> str:
+        return page_render_key(self._get_fitz_doc()[page_info.page_number - 1], page_info.rotation,
+                               dedup.object_digests)
+    
+    def _duplicate_of(self, dedup: Optional[OutputDeduplicator], stats: EncodingStats, stem: str,
+                      render_key: str = None, data: bytes = None) -> Optional[tuple]:
+        """(nombre, original) si la página repite una salida ya guardada, o None
+        
+        Sin data se busca por la huella de render, antes de renderizar; con data,
+        por el hash de la imagen codificada. Los duplicados quedan registrados.
+        """
+        if not dedup:
+            return None
+        original = dedup.original_for_render(render_key) if data is None else dedup.original_for_data(data)
+        if not original:
+            return None
+        stats.add_duplicate(dedup.size(original))
+        return dedup.add_duplicate(stem, original, render_key), original
+    
+    def _report_encoding(self, operation: str, stats: EncodingStats):
+        """Guardar y registrar el coste de codificación medido con el perfil usado"""
+        self.last_encoding_report = stats.as_dict()
+        if stats.pages or stats.embedded_pages or stats.duplicate_pages:
+            job_logger(logger, doc=self.document_name, op=operation).info(
+                "Codificación de imágenes", extra=self.last_encoding_report)
+    
+    def _report_export_resolution(self, operation: str, dpi_report: dict):
+        """Guardar y registrar el DPI efectivo usado en cada página exportada"""
+        self.last_export_report = dpi_report
+        if not dpi_report:
+            return
+        capped = {
+            p: dpi for p, dpi in dpi_report.items()
+            if self.resolution_policy.is_capped(dpi, self.page_target_dpi(p))
+        }
+        log = job_logger(logger, doc=self.document_name, op=operation)
+        if capped:
+            # Páginas sobredimensionadas: se avisa para que no pase desapercibido
+            log.warning("Resolución reducida por presupuesto de memoria", extra={
+                "pages": sorted(capped),
+                "min_dpi": round(min(capped.values()), 1),
+                "max_pixels": self.resolution_policy.max_pixels,
+            })
+        else:
+            # Escaneos exportados a su resolución nativa en lugar de la nominal
+            native = [p for p in dpi_report if self.page_target_dpi(p) != self.resolution_policy.dpi]
+            log.info("Resolución de exportación", extra={
+                "pages": len(dpi_report),
+                "dpi": round(self.resolution_policy.dpi, 1),
+                "native_pages": len(native),
+                "min_dpi": round(min(dpi_report.values()), 1),
+            })
+    
+    def _page_stages(self, outputs: List[tuple], stats: Dict[tuple, EncodingStats], prefer_embedded: bool,
+                     workers: int) -> List[Stage]:
+        """Etapas render → transformación → codificación para las salidas (target, sink)
+        
+        Cada página se renderiza una vez por modo de color (el blanco y negro se
+        umbraliza a partir de los grises) y se codifica una vez por clave de
+        codificación, aunque la compartan varias salidas.
+        """
+        def takes_embedded(target: ExportTarget, sink: PageSink) -> bool:
+            # La imagen original solo sirve a destinos de un archivo por página y en color
+            return prefer_embedded and isinstance(sink, FileSink) and target.color_mode == DEFAULT_COLOR_MODE
+        
+        def render(work: PageWork) -> PageWork:
+            if work.skipped or work.duplicate:
+                return work
+            page_number = work.page_info.page_number
+            if any(takes_embedded(target, sink) for target, sink in outputs):
+                work.embedded = self._embedded_for_export(work.page_info, True)
+            for index, (target, sink) in enumerate(outputs):
+                if not sink.needs_image or (work.embedded and takes_embedded(target, sink)):
+                    continue
+                # Páginas gigantes: el destino las escribe por franjas, sin bitmap completo
+                if isinstance(sink, FileSink) and self._should_tile(page_number, target.image_format):
+                    work.tiled.add(index)
+                    continue
+                if target.render_mode not in work.images:
+                    work.images[target.render_mode] = self.render_page(page_number, for_export=True,
+                                                                       color_mode=target.render_mode)
+            return work
+        
+        def transform(work: PageWork) -> PageWork:
+            rotation = work.page_info.rotation
+            for mode, img in work.images.items():
+                if img is not None and rotation != 0:
+                    with metrics.span("transform.rotate"):
+                        work.images[mode] = img.rotate(-rotation, expand=True)
+            gray = work.images.get("gray")
+            if gray is not None and any(target.color_mode == "bitonal" for target, _ in outputs):
+                with metrics.span("render.threshold"):
+                    work.images["bitonal"] = to_bitonal(gray)
+            return work
+        
+        def encode(work: PageWork) -> PageWork:
+            for index, (target, sink) in enumerate(outputs):
+                key = target.encoding_key
+                if key in work.encoded or not sink.needs_image or index in work.tiled:
+                    continue
+                if work.embedded and takes_embedded(target, sink):
+                    work.encoded[key] = EncodedPage(work.embedded.data, work.embedded.ext)
+                    stats[key].add_embedded(len(work.embedded.data))
+                    continue
+                img = work.images.get(target.color_mode)
+                if img is not None:
+                    work.encoded[key] = self._encode_page(img, key[0], target.encoding_profile, stats[key])
+            # Los bitmaps ya no hacen falta: se liberan antes de esperar el turno de escritura
+            work.images.clear()
+            return work
+        
+        return [Stage("render", render, workers),
+                Stage("transform", transform, max(1, workers // 2)),
+                Stage("encode", encode, workers)]
+    
+    def _run_page_export(self, outputs: List[tuple], active_pages: List[PageInfo], progress_callback=None,
+                         workers: int = DEFAULT_WORKERS, prefer_embedded: bool = False,
+                         dedup: OutputDeduplicator = None, checkpoint: ExportCheckpoint = None) -> tuple:
+        """Exportar las páginas a cada destino de outputs [(ExportTarget, PageSink)] con el pipeline
+        
+        Las etapas corren en sus propios hilos (ver ExportPipeline) y la escritura
+        en los destinos, en el hilo que llama y en el orden de active_pages. Con
+        dedup, las páginas que se renderizan igual que una anterior se resuelven
+        como duplicadas sin renderizarse; con checkpoint, las salidas vigentes de
+        una exportación anterior se omiten. Devuelve (dpi por página,
+        {clave de codificación: EncodingStats}, páginas omitidas).
+        """
+        base_name = Path(self.pdf_path).stem
+        total_pages = len(active_pages)
+        dpi_report = {}
+        skipped = 0
+        stats = {
+            target.encoding_key: EncodingStats(target.encoding_profile,
+                                               "JPEG" if target.encoding_key[0] == "PDF" else target.encoding_key[0],
+                                               target.color_mode)
+            for target, _ in outputs
+        }
+        stages = self._page_stages(outputs, stats, prefer_embedded, workers)
+        
+        def source():
+            # Decisiones que dependen del orden: se toman aquí, en un único hilo
+            seen_keys = set()
+            for page_info in active_pages:
+                work = PageWork(page_info)
+                work.skipped = checkpoint.completed(page_info) if checkpoint else None
+                if dedup and not work.skipped:
+                    work.render_key = self._render_key(page_info, dedup)
+                    work.duplicate = work.render_key in seen_keys
+                    seen_keys.add(work.render_key)
+                yield work
+        
+        for i, work in enumerate(ExportPipeline(stages).run(source())):
+            page_info = work.page_info
+            if progress_callback:
+                progress_callback(i, total_pages, f"Procesando página {page_info.page_number}")
             
-            with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                total_pages = len(active_pages)
-                
-                for i, page_info in enumerate(active_pages):
-                    if progress_callback:
-                        progress_callback(i, total_pages, f"Procesando página {page_info.page_number}")
-                    
-                    # Renderizar página en alta calidad para exportación
-                    high_quality_img = self.render_page(page_info.page_number, for_export=True)
-                    
-                    if high_quality_img:
-                        # Aplicar rotación si es necesaria
-                        if page_info.rotation != 0:
-                            high_quality_img = high_quality_img.rotate(-page_info.rotation, expand=True)
-                        
-                        # Crear nombre de archivo para la imagen
-                        img_filename = f"{base_name}_pagina_{page_info.page_number:03d}.{image_format.lower()}"
-                        
-                        # Guardar imagen en memoria con configuraciones de calidad
-                        from io import BytesIO
-                        img_buffer = BytesIO()
-                        
-                        # Configuraciones de calidad por formato
-                        if image_format.upper() == 'JPEG':
-                            high_quality_img.save(img_buffer, format=image_format, quality=95, optimize=True)
-                        elif image_format.upper() == 'PNG':
-                            high_quality_img.save(img_buffer, format=image_format, optimize=True, compress_level=6)
-                        else:  # TIFF
-                            high_quality_img.save(img_buffer, format=image_format, compression='lzw')
-                        
-                        # Agregar al ZIP
-                        zip_file.writestr(img_filename, img_buffer.getvalue())
-                
-                # Progreso final: guardando archivo
+            # Salidas vigentes de una exportación anterior (interrumpida o no)
+            if work.skipped:
+                skipped += 1
                 if progress_callback:
-                    progress_callback(total_pages, total_pages, "Guardando archivo ZIP...")
+                    progress_callback(i + 1, total_pages, f"Ya exportada: {work.skipped}")
+                continue
+            
+            # Duplicada de una página cuya imagen no llegó a guardarse: se procesa aquí
+            if work.duplicate and not dedup.original_for_render(work.render_key):
+                work.duplicate = False
+                for stage in stages:
+                    work = stage.func(work)
+            
+            name = None
+            for index, (target, sink) in enumerate(outputs):
+                page = work.encoded.get(target.encoding_key)
+                if page and page.dpi:
+                    dpi_report[page_info.page_number] = page.dpi
+                if not isinstance(sink, FileSink):
+                    if sink.needs_image and page is None:
+                        raise ValueError(f"No se pudo renderizar la página {page_info.page_number}")
+                    sink.add(page_info, page)
+                    continue
                 
-            # Progreso completado
-            if progress_callback:
-                progress_callback(total_pages, total_pages, "Completado")
+                stem = page_file_stem(base_name, page_info.page_number)
+                key_stats = stats[target.encoding_key]
+                data = page.data if page else None
+                duplicate = self._duplicate_of(dedup, key_stats, stem, work.render_key) if work.duplicate else None
+                if not duplicate and index in work.tiled:
+                    name = f"{stem}.png"
+                    with sink.open_stream(name) as stream:
+                        dpi_report[page_info.page_number] = self.render_page_tiled(
+                            page_info.page_number, stream, page_info.rotation,
+                            compress_level=png_compress_level(target.encoding_profile), color_mode=target.color_mode
+                        )
+                elif not duplicate:
+                    if page is None:
+                        # render_page ya registró el fallo: la página queda fuera
+                        continue
+                    duplicate = self._duplicate_of(dedup, key_stats, stem, work.render_key, data)
+                    if not duplicate:
+                        name = f"{stem}.{page.extension}"
+                        sink.write(name, data)
+                        if dedup:
+                            dedup.add(name, data, work.render_key)
+                if duplicate:
+                    name = duplicate[0]
+                    sink.link(*duplicate)
+                if checkpoint:
+                    checkpoint.record(page_info, name, data)
             
-            return True
+            if progress_callback and name:
+                progress_callback(i + 1, total_pages, f"Guardada: {name}")
+        
+        return dpi_report, stats, skipped
+    
+    def _export_images(self, operation: str, page_manager: PageManager, sink: FileSink, image_format: str,
+                       progress_callback, encoding_profile: str, prefer_embedded: bool, deduplicate: bool,
+                       color_mode: str, workers: int = DEFAULT_WORKERS, checkpoint: ExportCheckpoint = None) -> bool:
+        """Exportar las páginas seleccionadas como un archivo de imagen por página en sink"""
+        active_pages = page_manager.get_active_pages()
+        if not active_pages:
+            return False
+        
+        target = ExportTarget(operation, "", image_format, encoding_profile, color_mode)
+        prefer_embedded = target.color_mode == DEFAULT_COLOR_MODE and prefer_embedded
+        dedup = OutputDeduplicator() if deduplicate else None
+        dpi_report, stats, skipped = self._run_page_export([(target, sink)], active_pages, progress_callback,
+                                                           workers, prefer_embedded, dedup, checkpoint)
+        
+        # Equivalencias de las páginas duplicadas, en destinos sin enlaces
+        if dedup and dedup.duplicates and not sink.links:
+            sink.write(f"{sink.base_name}_duplicadas.json",
+                       json.dumps(dedup.manifest(), indent=2, ensure_ascii=False).encode("utf-8"))
+        
+        total_pages = len(active_pages)
+        if progress_callback:
+            progress_callback(total_pages, total_pages, "Completado")
+        
+        self._report_incremental(operation, skipped, total_pages)
+        self._report_export_resolution(operation, dpi_report)
+        self._report_encoding(operation, stats[target.encoding_key])
+        return True
+    
+    def export_images_to(self, page_manager: PageManager, sink: FileSink, image_format: str = "PNG",
+                         progress_callback=None, encoding_profile: str = DEFAULT_PROFILE,
+                         prefer_embedded: bool = False, deduplicate: bool = False,
+                         color_mode: str = DEFAULT_COLOR_MODE, workers: int = DEFAULT_WORKERS) -> bool:
+        """Exportar las páginas como imágenes a cualquier destino de archivos (ver export_sinks)
+        
+        Por ejemplo MemorySink para obtenerlas sin tocar disco o StdoutSink para
+        pasarlas como TAR a otro proceso. Quien llama cierra el destino.
+        """
+        try:
+            return self._export_images("images", page_manager, sink, image_format, progress_callback,
+                                       encoding_profile, prefer_embedded, deduplicate, color_mode, workers)
+        except Exception:
+            job_logger(logger, doc=self.document_name, op="images").error(
+                "Error exportando imágenes", exc_info=True)
+            return False
+    
+    def export_as_images_zip(self, page_manager: PageManager, output_path: str, 
+                            image_format: str = "PNG", progress_callback=None,
+                            encoding_profile: str = DEFAULT_PROFILE, prefer_embedded: bool = False,
+                            deduplicate: bool = False, color_mode: str = DEFAULT_COLOR_MODE) -> bool:
+        """Exportar páginas como imágenes en un archivo ZIP
+        
+        Con prefer_embedded, las páginas escaneadas se guardan con su imagen
+        original (sin re-rasterizar ni recodificar) en su formato propio.
+        
+        Con deduplicate, las páginas idénticas a otra ya guardada (por su huella
+        de render o por el hash de la imagen) no se guardan otra vez: el ZIP
+        incluye un "{nombre}_duplicadas.json" que indica a qué imagen equivale cada una.
+        
+        color_mode: ver render_page. Los TIFF de 1 bit se comprimen con CCITT G4; la
+        imagen incrustada de los escaneos solo se usa en color.
+        """
+        try:
+            # Sin páginas no se crea el archivo de salida
+            if not page_manager.get_active_pages():
+                return False
+            with self._output() as out, out.open(output_path) as f:
+                sink = ZipSink(f, Path(self.pdf_path).stem)
+                try:
+                    success = self._export_images("images_zip", page_manager, sink, image_format, progress_callback,
+                                                  encoding_profile, prefer_embedded, deduplicate, color_mode)
+                finally:
+                    # También si falla: el archivo se cierra antes de descartar el temporal
+                    sink.close()
+            return success
             
-        except Exception as e:
-            print(f"Error exportando como ZIP: {e}")
+        except Exception:
+            job_logger(logger, doc=self.document_name, op="images_zip").error(
+                "Error exportando como ZIP", exc_info=True)
             return False
     
-    def export_as_images_folder(self, page_manager: PageManager, output_folder: str, 
-                               image_format: str = "PNG", progress_callback=None) -> bool:
-        """Exportar páginas como imágenes en una carpeta"""
+    def export_as_images_tar(self, page_manager: PageManager, output_path: str,
+                             image_format: str = "PNG", progress_callback=None,
+                             encoding_profile: str = DEFAULT_PROFILE, prefer_embedded: bool = False,
+                             deduplicate: bool = False, color_mode: str = DEFAULT_COLOR_MODE) -> bool:
+        """Exportar páginas como imágenes en un TAR (opciones: ver export_as_images_zip)
+        
+        Sin compresión añadida: las imágenes ya van comprimidas. Las páginas
+        duplicadas se guardan como enlaces duros dentro del TAR.
+        """
         try:
-            active_pages = page_manager.get_active_pages()
-            if not active_pages:
+            # Sin páginas no se crea el archivo de salida
+            if not page_manager.get_active_pages():
                 return False
+            with self._output() as out, out.open(output_path) as f:
+                sink = TarSink(f, Path(self.pdf_path).stem)
+                try:
+                    success = self._export_images("images_tar", page_manager, sink, image_format, progress_callback,
+                                                  encoding_profile, prefer_embedded, deduplicate, color_mode)
+                finally:
+                    # También si falla: el archivo se cierra antes de descartar el temporal
+                    sink.close()
+            return success
             
-            # Crear carpeta si no existe
+        except Exception:
+            job_logger(logger, doc=self.document_name, op="images_tar").error(
+                "Error exportando como TAR", exc_info=True)
+            return False
+    
+    def _checkpoint(self, output_folder: str, operation: str, incremental: bool,
+                    **settings) -> Optional[ExportCheckpoint]:
+        """Manifiesto de salidas de una exportación a carpeta (ver ExportCheckpoint)
+        
+        Solo existe en modo incremental: una exportación normal no lo lee ni lo toca.
+        """
+        if not incremental:
+            return None
+        return ExportCheckpoint(output_folder, operation, {"fingerprint": self.fingerprint, **settings})
+    
+    def _report_incremental(self, operation: str, skipped: int, total_pages: int):
+        if skipped:
+            job_logger(logger, doc=self.document_name, op=operation).info(
+                "Exportación incremental", extra={"skipped": skipped, "regenerated": total_pages - skipped,
+                                                  "pages": total_pages})
+    
+    def export_as_images_folder(self, page_manager: PageManager, output_folder: str, 
+                               image_format: str = "PNG", progress_callback=None,
+                               encoding_profile: str = DEFAULT_PROFILE, prefer_embedded: bool = False,
+                               incremental: bool = False, deduplicate: bool = False,
+                               color_mode: str = DEFAULT_COLOR_MODE) -> bool:
+        """Exportar páginas como imágenes en una carpeta (prefer_embedded, color_mode: ver export_as_images_zip)
+        
+        Con incremental solo se generan las imágenes que faltan en la carpeta o
+        cuya página, rotación, formato o perfil cambió desde que se escribieron:
+        reanuda una exportación interrumpida o repite una ya hecha tras un cambio.
+        
+        Con deduplicate, cada página idéntica a otra ya guardada se publica como
+        enlace duro a esa imagen (o como copia si el sistema de archivos no admite enlaces).
+        """
+        try:
+            if not page_manager.get_active_pages():
+                return False
+            prefer_embedded = check_color_mode(color_mode) == DEFAULT_COLOR_MODE and prefer_embedded
             Path(output_folder).mkdir(parents=True, exist_ok=True)
+            checkpoint = self._checkpoint(output_folder, "images_folder", incremental,
+                                          image_format=image_format.upper(), encoding_profile=encoding_profile,
+                                          prefer_embedded=prefer_embedded, color_mode=color_mode)
+            # Sincronizar el último grupo de imágenes al terminar
+            with self._output() as out:
+                sink = FolderSink(out, output_folder, Path(self.pdf_path).stem)
+                return self._export_images("images_folder", page_manager, sink, image_format, progress_callback,
+                                           encoding_profile, prefer_embedded, deduplicate, color_mode,
+                                           checkpoint=checkpoint)
             
-            base_name = Path(self.pdf_path).stem
+        except Exception:
+            job_logger(logger, doc=self.document_name, op="images_folder").error(
+                "Error exportando a carpeta", exc_info=True)
+            return False
+    
+    def _encode_page(self, img: Image.Image, image_format: str, profile: str = DEFAULT_PROFILE,
+                     stats: EncodingStats = None) -> EncodedPage:
+        """Codificar una página para un destino de exportación
+        
+        image_format "PDF" es una página de un PDF de imágenes: JPEG con la calidad
+        del perfil o, en blanco y negro, filas de 1 bit comprimidas con zlib.
+        """
+        if image_format == "PDF" and img.mode == "1":
+            start = time.perf_counter()
+            with metrics.span("encode.flate"):
+                data = zlib.compress(img.tobytes(), png_compress_level(profile))
+            if stats:
+                stats.add(time.perf_counter() - start, len(data))
+        else:
+            data = self._encode_image(img, "JPEG" if image_format == "PDF" else image_format, profile, stats)
+        return EncodedPage(data, image_format.lower(), img.mode, img.size, img.info["dpi"][0])
+    
+    def _export_single_file(self, operation: str, sink_class, image_format: str, page_manager: PageManager,
+                            output_path: str, progress_callback, encoding_profile: str, color_mode: str,
+                            workers: int) -> bool:
+        """Renderizar las páginas en el pipeline y añadirlas en orden a un único archivo (TIFF o PDF)"""
+        active_pages = sorted(page_manager.get_active_pages(), key=lambda x: x.page_number)
+        if not active_pages:
+            return False
+        target = ExportTarget(operation, output_path, image_format, encoding_profile, color_mode)
+        
+        with self._output() as out, out.open(output_path, "w+b") as f:
+            sink = sink_class(f)
+            dpi_report, stats, _ = self._run_page_export([(target, sink)], active_pages, progress_callback, workers)
+            sink.close()
+        
+        total_pages = len(active_pages)
+        if progress_callback:
+            progress_callback(total_pages, total_pages, "Completado")
+        
+        self._report_export_resolution(operation, dpi_report)
+        self._report_encoding(operation, stats[target.encoding_key])
+        return True
+    
+    def export_as_multipage_tiff(self, page_manager: PageManager, output_path: str, progress_callback=None,
+                                 encoding_profile: str = DEFAULT_PROFILE, color_mode: str = DEFAULT_COLOR_MODE,
+                                 workers: int = DEFAULT_WORKERS) -> bool:
+        """Exportar las páginas seleccionadas como un único TIFF multipágina
+        
+        Las páginas se renderizan y codifican en paralelo, cada una como un TIFF
+        independiente (CCITT G4 en blanco y negro), y se añaden al archivo en
+        orden en cuanto están listas: en memoria solo están las páginas en vuelo.
+        """
+        try:
+            return self._export_single_file("images_tiff", TiffSink, "TIFF", page_manager, output_path,
+                                            progress_callback, encoding_profile, color_mode, workers)
+        except Exception:
+            job_logger(logger, doc=self.document_name, op="images_tiff").error(
+                "Error exportando TIFF multipágina", exc_info=True)
+            return False
+    
+    def export_as_image_pdf(self, page_manager: PageManager, output_path: str, progress_callback=None,
+                            encoding_profile: str = DEFAULT_PROFILE, color_mode: str = DEFAULT_COLOR_MODE,
+                            workers: int = DEFAULT_WORKERS) -> bool:
+        """Exportar las páginas seleccionadas como un PDF de solo imágenes ("aplanado")
+        
+        Cada página se renderiza y codifica en paralelo (ver _encode_page) y se
+        escribe en streaming con el tamaño de la página original.
+        """
+        try:
+            return self._export_single_file("images_pdf", ImagePDFSink, "PDF", page_manager, output_path,
+                                            progress_callback, encoding_profile, color_mode, workers)
+        except Exception:
+            job_logger(logger, doc=self.document_name, op="images_pdf").error(
+                "Error exportando PDF de imágenes", exc_info=True)
+            return False
+    
+    def _plan_sink(self, target: ExportTarget, out: OutputWriter, stack: ExitStack) -> PageSink:
+        """Destino de una salida del plan; su archivo queda abierto en stack hasta publicarse"""
+        base_name = Path(self.pdf_path).stem
+        if target.export_format == "images_folder":
+            return FolderSink(out, target.output_path, base_name)
+        f = stack.enter_context(out.open(target.output_path, "w+b"))
+        if target.export_format == "images_zip":
+            return ZipSink(f, base_name)
+        if target.export_format == "images_tar":
+            return TarSink(f, base_name)
+        if target.export_format == "images_tiff":
+            return TiffSink(f)
+        if target.export_format == "images_pdf":
+            return ImagePDFSink(f)
+        return CombinedPDFSink(f, self.reader, self._reader_lock)
+    
+    def export_plan(self, page_manager: PageManager, targets: List[ExportTarget], progress_callback=None,
+                    workers: int = DEFAULT_WORKERS) -> Dict[str, bool]:
+        """Generar varias salidas de la misma selección; devuelve {ruta de salida: éxito}
+        
+        Las salidas de imágenes (images_zip, images_folder, images_tar,
+        images_tiff, images_pdf) y el PDF único se alimentan de una sola pasada
+        del pipeline: cada página se renderiza una vez por modo de color y la
+        imagen se reparte entre los codificadores, que también se comparten
+        entre salidas con el mismo formato, perfil y color. El resto de formatos
+        se exportan a continuación reutilizando el documento ya abierto.
+        
+        Si la pasada compartida falla, ninguno de sus archivos se publica (las
+        carpetas conservan las imágenes ya escritas). last_plan_report guarda el
+        coste de codificación de cada salida de imágenes.
+        """
+        results = {}
+        log = job_logger(logger, doc=self.document_name, op="export_plan")
+        start = time.perf_counter()
+        active_pages = sorted(page_manager.get_active_pages(), key=lambda x: x.page_number)
+        shared = [t for t in targets if t.rendered or t.export_format == "pdf_combined"]
+        rendered = [t for t in shared if t.rendered]
+        
+        if shared and active_pages:
             total_pages = len(active_pages)
-            
-            for i, page_info in enumerate(active_pages):
+            try:
+                with ExitStack() as stack:
+                    out = stack.enter_context(self._output())
+                    outputs = [(t, self._plan_sink(t, out, stack)) for t in shared]
+                    try:
+                        dpi_report, stats, _ = self._run_page_export(outputs, active_pages, progress_callback,
+                                                                     workers)
+                    finally:
+                        # Cerrar cada destino antes de publicar (o descartar) su archivo
+                        for _, sink in outputs:
+                            sink.close()
                 if progress_callback:
-                    progress_callback(i, total_pages, f"Procesando página {page_info.page_number}")
-                
-                # Renderizar página en alta calidad para exportación
-                high_quality_img = self.render_page(page_info.page_number, for_export=True)
-                
-                if high_quality_img:
-                    # Aplicar rotación si es necesaria
-                    if page_info.rotation != 0:
-                        high_quality_img = high_quality_img.rotate(-page_info.rotation, expand=True)
-                    
-                    # Crear nombre de archivo para la imagen
-                    img_filename = f"{base_name}_pagina_{page_info.page_number:03d}.{image_format.lower()}"
-                    img_path = Path(output_folder) / img_filename
-                    
-                    # Guardar imagen con configuraciones de calidad
-                    if image_format.upper() == 'JPEG':
-                        high_quality_img.save(img_path, format=image_format, quality=95, optimize=True)
-                    elif image_format.upper() == 'PNG':
-                        high_quality_img.save(img_path, format=image_format, optimize=True, compress_level=6)
-                    else:  # TIFF
-                        high_quality_img.save(img_path, format=image_format, compression='lzw')
-                    
-                    # Progreso actualizado después de guardar cada imagen
-                    if progress_callback:
-                        progress_callback(i + 1, total_pages, f"Guardada: {img_filename}")
-            
-            # Progreso completado
-            if progress_callback:
-                progress_callback(total_pages, total_pages, "Completado")
-            
-            return True
+                    progress_callback(total_pages, total_pages, "Completado")
+                success = True
+            except Exception:
+                log.error("Error en la pasada compartida del plan de exportación", exc_info=True)
+                success = False
             
-        except Exception as e:
-            print(f"Error exportando a carpeta: {e}")
-            return False
+            results.update({t.output_path: success for t in shared})
+            if success and rendered:
+                self._report_export_resolution("export_plan", dpi_report)
+                for key_stats in {t.encoding_key: stats[t.encoding_key] for t in rendered}.values():
+                    self._report_encoding("export_plan", key_stats)
+                self.last_plan_report = {t.output_path: stats[t.encoding_key].as_dict() for t in rendered}
+        else:
+            results.update({t.output_path: False for t in shared})
+        
+        # Formatos que no se alimentan del render: cada uno con su exportador
+        for target in targets:
+            if target in shared:
+                continue
+            results[target.output_path] = self._export(
+                target.export_format, page_manager, target.output_path, target.image_format,
+                progress_callback, target.encoding_profile, color_mode=target.color_mode, split=target.split)
+        
+        log.info("Plan de exportación completado", extra={
+            "pages": len(active_pages),
+            "formats": [t.export_format for t in targets],
+            "shared_pass": len(shared),
+            "failed": [path for path, ok in results.items() if not ok],
+            "duration_s": round(time.perf_counter() - start, 3),
+        })
+        return results
     
-    def export_individual_pdfs(self, page_manager: PageManager, output_folder: str, progress_callback=None) -> bool:
-        """Exportar cada página como PDF individual"""
+    def export_individual_pdfs(self, page_manager: PageManager, output_folder: str, progress_callback=None,
+                               incremental: bool = False) -> bool:
+        """Exportar cada página como PDF individual (incremental: ver export_as_images_folder)"""
         try:
             active_pages = page_manager.get_active_pages()
             if not active_pages:
@@ -224,40 +971,117 @@ class PDFService(DocumentService):
             
             base_name = Path(self.pdf_path).stem
             total_pages = len(active_pages)
+            checkpoint = self._checkpoint(output_folder, "pdf_individual", incremental, format="PDF")
+            skipped = 0
+            out = self._output()
             
             for i, page_info in enumerate(active_pages):
                 if progress_callback:
                     progress_callback(i, total_pages, f"Procesando página {page_info.page_number}")
                 
+                # Salidas vigentes de una exportación anterior (interrumpida o no)
+                done = checkpoint and checkpoint.completed(page_info)
+                if done:
+                    skipped += 1
+                    if progress_callback:
+                        progress_callback(i + 1, total_pages, f"Ya exportado: {done}")
+                    continue
+                
                 # Crear un nuevo PDF para esta página
                 writer = PdfWriter()
-                page = self.reader.pages[page_info.page_number - 1]
+                with self._reader_lock, metrics.span("pypdf.add_page"):
+                    page = writer.add_page(self.reader.pages[page_info.page_number - 1])
                 
-                # Aplicar rotación si es necesaria
+                # Rotar la copia del writer para no alterar el lector compartido
                 if page_info.rotation != 0:
                     page.rotate(page_info.rotation)
                 
-                writer.add_page(page)
-                
                 # Guardar PDF individual
                 pdf_filename = f"{base_name}_pagina_{page_info.page_number:03d}.pdf"
                 pdf_path = Path(output_folder) / pdf_filename
                 
-                with open(pdf_path, "wb") as f:
+                with self._reader_lock, metrics.span("pypdf.write"), out.open(pdf_path) as f:
                     writer.write(f)
+                if checkpoint:
+                    checkpoint.record(page_info, pdf_filename)
                 
                 # Progreso actualizado después de guardar cada PDF
                 if progress_callback:
                     progress_callback(i + 1, total_pages, f"Guardado: {pdf_filename}")
             
+            # Sincronizar el último grupo de PDFs
+            out.close()
+            
             # Progreso completado
             if progress_callback:
                 progress_callback(total_pages, total_pages, "Completado")
             
+            self._report_incremental("pdf_individual", skipped, total_pages)
             return True
             
-        except Exception as e:
-            print(f"Error exportando PDFs individuales: {e}")
+        except Exception:
+            job_logger(logger, doc=self.document_name, op="pdf_individual").error(
+                "Error exportando PDFs individuales", exc_info=True)
+            return False
+    
+    def export_split_pdfs(self, page_manager: PageManager, output_folder: str, rule: SplitRule = None,
+                          progress_callback=None) -> bool:
+        """Dividir las páginas seleccionadas en varios PDF según rule (ver SplitRule)
+        
+        Una sola pasada por el lector: las páginas se recorren en orden y cada
+        tramo se escribe en cuanto se completa. Dentro de un tramo las fuentes e
+        imágenes compartidas se copian una vez, y el lector conserva los objetos
+        ya leídos para los tramos siguientes.
+        """
+        try:
+            active_pages = sorted(page_manager.get_active_pages(), key=lambda x: x.page_number)
+            if not active_pages:
+                return False
+            
+            rule = rule or SplitRule()
+            pages_by_number = {page_info.page_number: page_info for page_info in active_pages}
+            base_name = Path(self.pdf_path).stem
+            total_pages = len(active_pages)
+            done = 0
+            outputs = []
+            
+            with self._output() as out:
+                chunks = split_chunks(self._get_fitz_doc(), list(pages_by_number), rule)
+                for index, (title, page_numbers) in enumerate(chunks, start=1):
+                    writer = PdfWriter()
+                    for page_number in page_numbers:
+                        if progress_callback:
+                            progress_callback(done, total_pages, f"Procesando página {page_number}")
+                        with self._reader_lock, metrics.span("pypdf.add_page"):
+                            page = writer.add_page(self.reader.pages[page_number - 1])
+                        
+                        # Rotar la copia del writer para no alterar el lector compartido
+                        rotation = pages_by_number[page_number].rotation
+                        if rotation != 0:
+                            page.rotate(rotation)
+                        done += 1
+                    
+                    label = f"_{safe_title(title)}" if title and safe_title(title) else ""
+                    pdf_filename = f"{base_name}_parte_{index:03d}{label}.pdf"
+                    with self._reader_lock, metrics.span("pypdf.write"), \
+                            out.open(Path(output_folder) / pdf_filename) as f:
+                        writer.write(f)
+                    outputs.append({"name": pdf_filename, "pages": page_numbers})
+                    
+                    if progress_callback:
+                        progress_callback(done, total_pages, f"Guardado: {pdf_filename}")
+            
+            if progress_callback:
+                progress_callback(total_pages, total_pages, "Completado")
+            
+            self.last_split_report = {"rule": str(rule), "files": outputs}
+            job_logger(logger, doc=self.document_name, op="pdf_split").info(
+                "PDF dividido", extra={"rule": str(rule), "files": len(outputs), "pages": total_pages})
+            return True
+            
+        except Exception:
+            job_logger(logger, doc=self.document_name, op="pdf_split").error(
+                "Error dividiendo el PDF", exc_info=True)
             return False
     
     def export_combined_pdf(self, page_manager: PageManager, output_path: str, progress_callback=None) -> bool:
@@ -277,22 +1101,19 @@ class PDFService(DocumentService):
                 if progress_callback:
                     progress_callback(i, total_pages, f"Procesando página {page_info.page_number}")
                 
-                page = self.reader.pages[page_info.page_number - 1]
+                with self._reader_lock, metrics.span("pypdf.add_page"):
+                    page = writer.add_page(self.reader.pages[page_info.page_number - 1])
                 
-                # Aplicar rotación si es necesaria
+                # Rotar la copia del writer para no alterar el lector compartido
                 if page_info.rotation != 0:
                     page.rotate(page_info.rotation)
-                
-                writer.add_page(page)
-            
-            # Crear directorio si no existe
-            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
             
-            # Guardar PDF combinado
+            # Guardar PDF combinado (el directorio se crea si no existe)
             if progress_callback:
                 progress_callback(total_pages, total_pages, "Guardando PDF combinado...")
             
-            with open(output_path, "wb") as f:
+            with self._reader_lock, metrics.span("pypdf.write"), self._output() as out, \
+                    out.open(output_path) as f:
                 writer.write(f)
             
             # Progreso completado
@@ -301,6 +1122,216 @@ class PDFService(DocumentService):
             
             return True
             
-        except Exception as e:
-            print(f"Error exportando PDF combinado: {e}")
+        except Exception:
+            job_logger(logger, doc=self.document_name, op="pdf_combined").error(
+                "Error exportando PDF combinado", exc_info=True)
             return False
+    
+    def _page_text(self, page_info: PageInfo, as_blocks: bool):
+        """Extraer el texto de una página (en el hilo que llama)"""
+        page = self._get_fitz_doc()[page_info.page_number - 1]
+        with metrics.span("text.extract"):
+            if not as_blocks:
+                return page.get_text("text")
+            blocks = []
+            for block in page.get_text("dict")["blocks"]:
+                if block.get("type") != 0:  # Solo bloques de texto
+                    continue
+                lines = ["".join(span["text"] for span in line["spans"]) for line in block["lines"]]
+                blocks.append({"bbox": [round(v, 2) for v in block["bbox"]], "text": "\n".join(lines)})
+            return blocks
+    
+    def export_text(self, page_manager: PageManager, output_path: str, text_format: str = "txt",
+                    progress_callback=None, workers: int = DEFAULT_WORKERS) -> bool:
+        """Exportar el texto de las páginas seleccionadas como TXT o JSON por bloques
+        
+        La extracción corre en paralelo y cada página se escribe en cuanto está lista,
+        así que la memoria no depende del número de páginas.
+        """
+        try:
+            active_pages = sorted(page_manager.get_active_pages(), key=lambda x: x.page_number)
+            if not active_pages:
+                return False
+            
+            total_pages = len(active_pages)
+            as_json = text_format == "json"
+            
+            with self._output() as out, out.open(output_path, "w", encoding="utf-8") as f:
+                if as_json:
+                    f.write('{"document": %s, "pages": [\n' % json.dumps(self.document_name, ensure_ascii=False))
+                
+                def extract(page_info: PageInfo):
+                    return page_info, self._page_text(page_info, as_json)
+                
+                for i, (page_info, content) in enumerate(ordered_map(extract, active_pages, workers)):
+                    if progress_callback:
+                        progress_callback(i, total_pages, f"Extrayendo texto de página {page_info.page_number}")
+                    
+                    if as_json:
+                        entry = {"page": page_info.page_number, "rotation": page_info.rotation, "blocks": content}
+                        f.write(("," if i else "") + json.dumps(entry, ensure_ascii=False) + "\n")
+                    else:
+                        f.write(f"===== Página {page_info.page_number} =====\n{content.rstrip()}\n\n")
+                
+                if as_json:
+                    f.write("]}\n")
+            
+            # Progreso completado
+            if progress_callback:
+                progress_callback(total_pages, total_pages, "Completado")
+            
+            return True
+            
+        except Exception:
+            job_logger(logger, doc=self.document_name, op=f"text_{text_format}").error(
+                "Error exportando texto", exc_info=True)
+            return False
+    
+    def export_embedded_images(self, page_manager: PageManager, output_path: str, as_zip: bool = True,
+                               progress_callback=None, workers: int = DEFAULT_WORKERS) -> bool:
+        """Exportar una sola vez cada imagen incrustada en las páginas seleccionadas
+        
+        Las imágenes compartidas entre páginas (un logotipo en cada página) se
+        descartan por xref sin extraerlas, y las repetidas como objetos distintos,
+        por hash del contenido. La extracción corre en paralelo y cada imagen se
+        escribe en cuanto está lista.
+        """
+        operation = "embedded_zip" if as_zip else "embedded_folder"
+        log = job_logger(logger, doc=self.document_name, op=operation)
+        try:
+            active_pages = sorted(page_manager.get_active_pages(), key=lambda x: x.page_number)
+            if not active_pages:
+                return False
+            
+            base_name = Path(self.pdf_path).stem
+            total_pages = len(active_pages)
+            counts = {"references": 0, "xref_duplicates": 0, "hash_duplicates": 0,
+                      "images": 0, "failed": 0, "bytes": 0}
+            
+            def unique_images():
+                # Recorrido perezoso: ordered_map pide imágenes a medida que hay hueco
+                seen_xrefs = set()
+                for i, page_info in enumerate(active_pages):
+                    if progress_callback:
+                        progress_callback(i, total_pages, f"Imágenes de la página {page_info.page_number}")
+                    page = self._get_fitz_doc()[page_info.page_number - 1]
+                    for image in page.get_images(full=True):
+                        counts["references"] += 1
+                        if image[0] in seen_xrefs:
+                            counts["xref_duplicates"] += 1
+                            continue
+                        seen_xrefs.add(image[0])
+                        yield page_info.page_number, image[0], image[1]
+            
+            def extract(item):
+                page_num, xref, smask = item
+                try:
+                    with metrics.span("embedded.extract"):
+                        ext, data = image_file(self._get_fitz_doc(), xref, smask)
+                except Exception as e:
+                    log.warning("Imagen incrustada ilegible", extra={"page": page_num, "xref": xref, "error": str(e)})
+                    return None
+                return page_num, xref, ext, data, hashlib.sha1(data).digest()
+            
+            with ExitStack() as stack:
+                out = stack.enter_context(self._output())
+                if as_zip:
+                    # Las imágenes ya vienen comprimidas: se guardan sin deflate
+                    zip_file = stack.enter_context(zipfile.ZipFile(
+                        stack.enter_context(out.open(output_path)), "w", zipfile.ZIP_STORED))
+                    write = zip_file.writestr
+                else:
+                    Path(output_path).mkdir(parents=True, exist_ok=True)
+                    write = lambda name, data: out.write_bytes(Path(output_path) / name, data)
+                
+                seen_hashes = set()
+                for result in ordered_map(extract, unique_images(), workers):
+                    if result is None:
+                        counts["failed"] += 1
+                        continue
+                    page_num, xref, ext, data, digest = result
+                    if digest in seen_hashes:
+                        counts["hash_duplicates"] += 1
+                        continue
+                    seen_hashes.add(digest)
+                    with metrics.span(f"{'zip' if as_zip else 'folder'}.write"):
+                        write(f"{base_name}_pagina_{page_num:03d}_imagen_{xref}.{ext}", data)
+                    counts["images"] += 1
+                    counts["bytes"] += len(data)
+            
+            if progress_callback:
+                progress_callback(total_pages, total_pages, "Completado")
+            
+            log.info("Imágenes incrustadas exportadas", extra={"pages": total_pages, **counts})
+            return True
+            
+        except Exception:
+            log.error("Error exportando imágenes incrustadas", exc_info=True)
+            return False
+    
+    def export(self, export_format: str, page_manager: PageManager, output_path: str,
+               image_format: str = "PNG", progress_callback=None,
+               encoding_profile: str = DEFAULT_PROFILE, prefer_embedded: bool = False,
+               incremental: bool = False, deduplicate: bool = False,
+               color_mode: str = DEFAULT_COLOR_MODE, split: SplitRule = None) -> bool:
+        """Exportar según la clave de formato usada por ExportOptions
+        
+        incremental solo afecta a las exportaciones a carpeta de páginas
+        (images_folder, pdf_individual): regenera solo las salidas que cambiaron.
+        deduplicate y color_mode solo afectan a las exportaciones de imágenes de páginas,
+        y split (criterio de división) solo a pdf_split.
+        """
+        start = time.perf_counter()
+        with metrics.span(f"operation.export.{export_format}"):
+            success = self._export(export_format, page_manager, output_path, image_format,
+                                   progress_callback, encoding_profile, prefer_embedded, incremental,
+                                   deduplicate, color_mode, split)
+        
+        # Un único evento resumen por exportación
+        job_logger(logger, doc=self.document_name, op=export_format).info(
+            "Exportación completada" if success else "Exportación fallida",
+            extra={
+                "pages": len(page_manager.get_active_pages()),
+                "image_format": image_format,
+                "encoding_profile": encoding_profile,
+                "color_mode": color_mode,
+                "output": output_path,
+                "duration_s": round(time.perf_counter() - start, 3),
+            },
+        )
+        return success
+    
+    def _export(self, export_format: str, page_manager: PageManager, output_path: str,
+                image_format: str, progress_callback, encoding_profile: str = DEFAULT_PROFILE,
+                prefer_embedded: bool = False, incremental: bool = False, deduplicate: bool = False,
+                color_mode: str = DEFAULT_COLOR_MODE, split: SplitRule = None) -> bool:
+        if export_format == "pdf_combined":
+            return self.export_combined_pdf(page_manager, output_path, progress_callback)
+        elif export_format == "pdf_individual":
+            return self.export_individual_pdfs(page_manager, output_path, progress_callback, incremental)
+        elif export_format == "pdf_split":
+            return self.export_split_pdfs(page_manager, output_path, split, progress_callback)
+        elif export_format == "images_zip":
+            return self.export_as_images_zip(page_manager, output_path, image_format,
+                                             progress_callback, encoding_profile, prefer_embedded, deduplicate,
+                                             color_mode)
+        elif export_format == "images_folder":
+            return self.export_as_images_folder(page_manager, output_path, image_format,
+                                                progress_callback, encoding_profile, prefer_embedded, incremental,
+                                                deduplicate, color_mode)
+        elif export_format == "images_tar":
+            return self.export_as_images_tar(page_manager, output_path, image_format,
+                                             progress_callback, encoding_profile, prefer_embedded, deduplicate,
+                                             color_mode)
+        elif export_format in ("text_txt", "text_json"):
+            return self.export_text(page_manager, output_path, export_format[len("text_"):], progress_callback)
+        elif export_format == "images_tiff":
+            return self.export_as_multipage_tiff(page_manager, output_path, progress_callback,
+                                                 encoding_profile, color_mode)
+        elif export_format == "images_pdf":
+            return self.export_as_image_pdf(page_manager, output_path, progress_callback,
+                                            encoding_profile, color_mode)
+        elif export_format in ("embedded_zip", "embedded_folder"):
+            return self.export_embedded_images(page_manager, output_path, export_format == "embedded_zip",
+                                               progress_callback)
+        raise ValueError(f"Formato de exportación desconocido: '{export_format}'")
@@ -0,0 +1,151 @@
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import fitz  # PyMuPDF
+
+from .pdf_objects import child_references, object_source
+
+# Criterios de división de un PDF: cada N páginas de la selección, por los
+# marcadores hasta un nivel del índice o por un tamaño máximo de archivo (MB)
+SPLIT_MODES = ("pages", "bookmarks", "size")
+DEFAULT_SPLIT_MODE = "pages"
+
+# Bytes fijos por archivo (cabecera, catálogo, árbol de páginas, xref) y por página en la xref
+_FILE_OVERHEAD = 1024
+_XREF_ENTRY = 20
+
+
+@dataclass(frozen=True)
+class SplitRule:
+    """Cómo dividir la selección: mode ("pages", "bookmarks", "size") y su valor
+
+    value es el número de páginas por archivo, el nivel máximo de marcador
+    (1 = capítulos) o el tamaño máximo de cada archivo en MB.
+    """
+    mode: str = DEFAULT_SPLIT_MODE
+    value: float = 1
+
+    def __post_init__(self):
+        if self.mode not in SPLIT_MODES:
+            raise ValueError(f"Criterio de división desconocido: '{self.mode}'")
+        if self.value <= 0 or (self.mode != "size" and self.value != int(self.value)):
+            raise ValueError(f"Valor de división no válido para '{self.mode}': {self.value}")
+
+    @classmethod
+    def parse(cls, text: str) -> "SplitRule":
+        """Leer un criterio escrito como "pages:10", "bookmarks:1" o "size:5" """
+        mode, _, value = text.strip().partition(":")
+        try:
+            number = float(value) if value.strip() else 1
+        except ValueError:
+            raise ValueError(f"Criterio de división no válido: '{text}'") from None
+        return cls(mode.strip(), number)
+
+    @property
+    def max_bytes(self) -> int:
+        return int(self.value * 1024 * 1024)
+
+    def __str__(self) -> str:
+        return f"{self.mode}:{self.value:g}"
+
+
+def safe_title(title: str, max_length: int = 60) -> str:
+    """Título de marcador utilizable en un nombre de archivo"""
+    title = re.sub(r"[^\w\- ]+", "", title).strip()
+    return re.sub(r"\s+", "_", title)[:max_length]
+
+
+class _ObjectSizes:
+    """Bytes y referencias de cada objeto del PDF, calculados una vez para todo el documento"""
+
+    def __init__(self, doc: fitz.Document):
+        self.doc = doc
+        self._sizes: Dict[int, int] = {}
+        self._children: Dict[int, List[int]] = {}
+
+    def _visit(self, xref: int) -> List[int]:
+        if xref not in self._children:
+            source = object_source(self.doc, xref)
+            size = len(source)
+            if self.doc.xref_is_stream(xref):
+                size += len(self.doc.xref_stream_raw(xref))
+            self._sizes[xref] = size + _XREF_ENTRY
+            self._children[xref] = child_references(source)
+        return self._children[xref]
+
+    def page_objects(self, page_number: int) -> Set[int]:
+        """Objetos que una página arrastra al copiarse: ella misma, contenido, recursos y anotaciones"""
+        pending = [self.doc.page_xref(page_number - 1)]
+        seen = set()
+        while pending:
+            xref = pending.pop()
+            if xref in seen or not 0 < xref < self.doc.xref_length():
+                continue
+            seen.add(xref)
+            pending.extend(self._visit(xref))
+        return seen
+
+    def size(self, xrefs) -> int:
+        return sum(self._sizes[xref] for xref in xrefs)
+
+
+def _bookmark_starts(doc: fitz.Document, level: int) -> Tuple[List[int], List[str]]:
+    """Páginas donde empieza cada marcador de nivel <= level, con su título (el primero si coinciden)"""
+    starts: Dict[int, str] = {}
+    for entry_level, title, page_number in doc.get_toc(simple=True):
+        if entry_level <= level and page_number >= 1:
+            starts.setdefault(page_number, title)
+    pages = sorted(starts)
+    return pages, [starts[page] for page in pages]
+
+
+def split_chunks(doc: fitz.Document, page_numbers: List[int], rule: SplitRule) \
+        -> Iterator[Tuple[Optional[str], List[int]]]:
+    """Repartir las páginas (en orden) en tramos según rule; genera (título, páginas)
+
+    Es perezoso: cada tramo se entrega en cuanto se completa, así que quien lo
+    consume puede escribirlo mientras se recorren las páginas siguientes. El
+    título solo existe al dividir por marcadores (None antes del primero).
+
+    Por tamaño, cada página cuenta sus objetos (contenido, fuentes, imágenes)
+    una sola vez por tramo: las páginas que comparten recursos caben más en un
+    mismo archivo. Una página que por sí sola supera el límite va en su propio
+    archivo.
+    """
+    if rule.mode == "pages":
+        size = int(rule.value)
+        for start in range(0, len(page_numbers), size):
+            yield None, page_numbers[start:start + size]
+        return
+
+    if rule.mode == "bookmarks":
+        starts, titles = _bookmark_starts(doc, int(rule.value))
+        current, chunk = None, []
+        for page_number in page_numbers:
+            section = bisect_right(starts, page_number) - 1
+            if chunk and section != current:
+                yield (titles[current] if current >= 0 else None), chunk
+                chunk = []
+            current = section
+            chunk.append(page_number)
+        if chunk:
+            yield (titles[current] if current >= 0 else None), chunk
+        return
+
+    sizes = _ObjectSizes(doc)
+    limit = rule.max_bytes
+    chunk, chunk_objects, chunk_size = [], set(), _FILE_OVERHEAD
+    for page_number in page_numbers:
+        objects = sizes.page_objects(page_number)
+        added = sizes.size(objects - chunk_objects)
+        if chunk and chunk_size + added > limit:
+            yield None, chunk
+            chunk, chunk_objects, chunk_size = [], set(), _FILE_OVERHEAD
+            added = sizes.size(objects)
+        chunk.append(page_number)
+        chunk_objects |= objects
+        chunk_size += added
+    if chunk:
+        yield None, chunk
@@ -0,0 +1,206 @@
+import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from collections import OrderedDict
+from typing import List, Tuple
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from .color_modes import pil_mode, render_colorspace
+from .metrics import metrics
+
+# Margen al crear un segmento: una página algo mayor que la anterior no obliga a crear otro
+_SEGMENT_SLACK = 1.25
+
+# Segmentos que cada proceso de render mantiene abiertos; los más antiguos se
+# cierran para no retener memoria de segmentos que el pool ya descartó
+_WORKER_SEGMENTS = 8
+
+# Estado de cada proceso de render: su documento y los segmentos ya abiertos
+_worker_doc = None
+_worker_segments: "OrderedDict[str, shared_memory.SharedMemory]" = OrderedDict()
+
+# Segmentos de pools cerrados que alguna imagen aún mira (ya borrados del sistema)
+_lingering_segments: List[shared_memory.SharedMemory] = []
+
+
+def render_processes_from_env() -> int:
+    """Procesos de render (PDF_EXTRACTOR_RENDER_PROCESSES); 0 = render en hilos"""
+    return max(0, int(os.environ.get("PDF_EXTRACTOR_RENDER_PROCESSES", "0")))
+
+
+def _init_worker(pdf_path: str):
+    global _worker_doc
+    _worker_doc = fitz.open(pdf_path)
+
+
+def _worker_segment(name: str) -> shared_memory.SharedMemory:
+    # Cada segmento se abre una vez por proceso: el pool los recicla entre páginas
+    segment = _worker_segments.get(name)
+    if segment is None:
+        segment = _worker_segments[name] = shared_memory.SharedMemory(name=name)
+        while len(_worker_segments) > _WORKER_SEGMENTS:
+            _worker_segments.popitem(last=False)[1].close()
+    _worker_segments.move_to_end(name)
+    return segment
+
+
+def _render_into(page_num: int, scale: float, color_mode: str, segment_name: str,
+                 capacity: int) -> Tuple[int, int, int]:
+    """Renderizar una página y copiar sus muestras al segmento; devuelve (ancho, alto, bytes)
+
+    Si no caben, no se copia nada: ancho y alto son 0 y bytes, lo que hace falta.
+    """
+    page = _worker_doc[page_num - 1]
+    pix = page.get_pixmap(matrix=fitz.Matrix(scale, scale), colorspace=render_colorspace(color_mode),
+                          alpha=False)
+    size = pix.stride * pix.height
+    if size > capacity:
+        return 0, 0, size
+    _worker_segment(segment_name).buf[:size] = pix.samples_mv
+    return pix.width, pix.height, size
+
+
+class SharedPixmapPool:
+    """Segmentos de memoria compartida reciclados entre renderizados
+
+    Un segmento está ocupado mientras se renderiza en él y mientras viva la
+    imagen que lo mira; al liberarse vuelve al pool (como mucho `keep`
+    libres) y la siguiente página que quepa lo reutiliza sin crear ni mapear
+    memoria nueva.
+
+    Un segmento descartado se borra del sistema en el acto, pero su mapeo solo
+    se cierra cuando ninguna imagen lo mira: la imagen avisa al desaparecer,
+    antes de soltar su vista del búfer, así que hasta entonces el segmento
+    queda retenido y se cierra en la siguiente operación del pool.
+    """
+
+    def __init__(self, keep: int):
+        self.keep = keep
+        self._free: List[shared_memory.SharedMemory] = []
+        self._retired: List[shared_memory.SharedMemory] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def acquire(self, size: int) -> shared_memory.SharedMemory:
+        self._reap()
+        with self._lock:
+            fitting = [segment for segment in self._free if segment.size >= size]
+            if fitting:
+                segment = min(fitting, key=lambda s: s.size)
+                self._free.remove(segment)
+                return segment
+        with metrics.span("shm.create"):
+            return shared_memory.SharedMemory(create=True, size=int(size * _SEGMENT_SLACK))
+
+    def release(self, segment: shared_memory.SharedMemory):
+        self._reap()
+        with self._lock:
+            if not self._closed and len(self._free) < self.keep:
+                self._free.append(segment)
+                return
+            # Pool lleno: descartar el más pequeño de los dos
+            if self._free and not self._closed:
+                smallest = min(self._free, key=lambda s: s.size)
+                if smallest.size < segment.size:
+                    self._free.remove(smallest)
+                    self._free.append(segment)
+                    segment = smallest
+        self._discard(segment)
+
+    def _discard(self, segment: shared_memory.SharedMemory):
+        segment.unlink()
+        if not self._try_close(segment):
+            with self._lock:
+                # Con el pool cerrado nadie volverá a intentarlo: se conserva hasta el final
+                (_lingering_segments if self._closed else self._retired).append(segment)
+
+    @staticmethod
+    def _try_close(segment: shared_memory.SharedMemory) -> bool:
+        try:
+            segment.close()
+            return True
+        except BufferError:
+            # Aún hay una vista viva del búfer
+            return False
+
+    def _reap(self):
+        """Cerrar los segmentos retenidos cuyas imágenes ya soltaron el búfer"""
+        with self._lock:
+            retired, self._retired = self._retired, []
+        still_open = [segment for segment in retired if not self._try_close(segment)]
+        if still_open:
+            with self._lock:
+                self._retired.extend(still_open)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            free, self._free = self._free, []
+        for segment in free:
+            self._discard(segment)
+        self._reap()
+        with self._lock:
+            lingering, self._retired = self._retired, []
+        # Imágenes que sobreviven al pool: sus segmentos se conservan mientras viva el proceso
+        _lingering_segments.extend(lingering)
+
+
+class ProcessRenderer:
+    """Render de páginas en procesos aparte, devuelto por memoria compartida
+
+    Cada proceso abre el documento una vez y copia las muestras de cada
+    pixmap a un segmento del pool: los ~25 MB de una página a 300 DPI no se
+    serializan ni pasan por una tubería. En escala de grises la imagen PIL
+    que se devuelve mira directamente el segmento (PIL mapea los búferes de
+    8 bits), así que codificarla, umbralizarla o reducirla lee la memoria que
+    escribió el proceso; el segmento vuelve al pool cuando la imagen deja de
+    usarse. En color PIL guarda 4 bytes por píxel, así que la imagen se
+    desempaqueta una vez desde el segmento y este se libera en el acto.
+    """
+
+    def __init__(self, pdf_path: str, processes: int):
+        self.processes = processes
+        # "spawn": hacer fork de un proceso con hilos (interfaz, servidor) no es seguro
+        self._executor = ProcessPoolExecutor(max_workers=processes, mp_context=get_context("spawn"),
+                                             initializer=_init_worker, initargs=(pdf_path,))
+        self.pool = SharedPixmapPool(keep=2 * processes)
+        # Un servicio que se descarta sin cerrar no deja segmentos en /dev/shm
+        self._finalizer = weakref.finalize(self, self.pool.close)
+
+    def render(self, page: fitz.Page, scale: float, color_mode: str) -> Image.Image:
+        """Imagen de la página (RGB o L según color_mode) renderizada en otro proceso"""
+        colorspace = render_colorspace(color_mode)
+        # Tamaño previsto del pixmap; si el proceso necesita más, se repite con el exacto
+        rect = page.rect * fitz.Matrix(scale, scale)
+        size = (int(rect.width) + 1) * colorspace.n * (int(rect.height) + 1)
+        segment = self.pool.acquire(size)
+        try:
+            with metrics.span("render.process"):
+                width, height, size = self._executor.submit(
+                    _render_into, page.number + 1, scale, color_mode, segment.name, segment.size).result()
+                if not width:
+                    self.pool.release(segment)
+                    segment = self.pool.acquire(size)
+                    width, height, size = self._executor.submit(
+                        _render_into, page.number + 1, scale, color_mode, segment.name, segment.size).result()
+        except BaseException:
+            self.pool.release(segment)
+            raise
+
+        mode = pil_mode(colorspace)
+        with metrics.span("render.to_pil"):
+            img = Image.frombuffer(mode, (width, height), segment.buf[:size], "raw", mode, size // height, 1)
+        if img.readonly:
+            # Imagen mapeada sobre el segmento: vuelve al pool cuando la imagen desaparezca
+            weakref.finalize(img, self.pool.release, segment)
+        else:
+            self.pool.release(segment)
+        return img
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._finalizer()
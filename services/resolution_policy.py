@@ -0,0 +1,86 @@
+import math
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from .tiled_render import DEFAULT_TILE_PIXELS
+
+# Resolución nominal de exportación y unidad de PDF (puntos por pulgada)
+EXPORT_DPI = 300
+PDF_POINTS_PER_INCH = 72
+
+# ~100 megapíxeles: unos 300 MB en RGB, suficiente para A3 a 300 DPI
+DEFAULT_MAX_PIXELS = 100_000_000
+
+
+@dataclass
+class ExportResolutionPolicy:
+    """Política de resolución de exportación con presupuesto de memoria por página"""
+    dpi: float = EXPORT_DPI
+    max_pixels: Optional[int] = DEFAULT_MAX_PIXELS
+    max_bytes: Optional[int] = None  # Presupuesto del bitmap sin comprimir
+    min_dpi: float = 72  # Nunca bajar de esta resolución al recortar
+    # "tile": las páginas que exceden el presupuesto se renderizan por franjas a
+    # resolución completa cuando el formato admite escritura en streaming (PNG);
+    # "cap": siempre se reduce la escala
+    mode: str = "tile"
+    tile_pixels: int = DEFAULT_TILE_PIXELS
+    # Páginas escaneadas: exportar a la resolución nativa de su imagen dominante,
+    # acotada entre native_min_dpi y native_max_dpi (None = dpi), en lugar de
+    # sobremuestrear un escaneo de 150 DPI a 300
+    match_native: bool = True
+    native_min_dpi: float = 100
+    native_max_dpi: Optional[float] = None
+
+    @classmethod
+    def from_env(cls) -> "ExportResolutionPolicy":
+        """Política por defecto, ajustable con variables PDF_EXTRACTOR_*"""
+        policy = cls()
+        megapixels = os.environ.get("PDF_EXTRACTOR_MAX_MEGAPIXELS")
+        if megapixels:
+            policy.max_pixels = int(float(megapixels) * 1_000_000)
+        policy.mode = os.environ.get("PDF_EXTRACTOR_OVERSIZE_MODE", policy.mode)
+        policy.match_native = os.environ.get("PDF_EXTRACTOR_NATIVE_DPI", "1") != "0"
+        if os.environ.get("PDF_EXTRACTOR_NATIVE_MIN_DPI"):
+            policy.native_min_dpi = float(os.environ["PDF_EXTRACTOR_NATIVE_MIN_DPI"])
+        if os.environ.get("PDF_EXTRACTOR_NATIVE_MAX_DPI"):
+            policy.native_max_dpi = float(os.environ["PDF_EXTRACTOR_NATIVE_MAX_DPI"])
+        return policy
+
+    def target_dpi(self, native_dpi: Optional[float] = None) -> float:
+        """Resolución objetivo de una página según la de su imagen dominante (si la hay)"""
+        if not self.match_native or not native_dpi:
+            return self.dpi
+        ceiling = self.native_max_dpi or self.dpi
+        return min(ceiling, max(self.native_min_dpi, native_dpi))
+
+    def pixel_budget(self, channels: int = 3) -> Optional[float]:
+        """Máximo de píxeles permitido por página (None = sin límite)"""
+        limits = []
+        if self.max_pixels:
+            limits.append(self.max_pixels)
+        if self.max_bytes:
+            limits.append(self.max_bytes / channels)
+        return min(limits) if limits else None
+
+    def exceeds_budget(self, width_pt: float, height_pt: float, channels: int = 3,
+                       dpi: Optional[float] = None) -> bool:
+        """Indica si la página a la resolución objetivo (nominal por defecto) no cabe en el presupuesto"""
+        budget = self.pixel_budget(channels)
+        scale = (dpi or self.dpi) / PDF_POINTS_PER_INCH
+        return bool(budget) and (width_pt * scale) * (height_pt * scale) > budget
+
+    def scale_for(self, width_pt: float, height_pt: float, channels: int = 3,
+                  dpi: Optional[float] = None) -> tuple:
+        """Escala y DPI efectivo para una página de width_pt x height_pt puntos"""
+        dpi = dpi or self.dpi
+        budget = self.pixel_budget(channels)
+        if budget:
+            pixels = (width_pt * dpi / PDF_POINTS_PER_INCH) * (height_pt * dpi / PDF_POINTS_PER_INCH)
+            if pixels > budget:
+                # El área crece con el cuadrado de la escala
+                dpi = max(self.min_dpi, dpi * math.sqrt(budget / pixels))
+        return dpi / PDF_POINTS_PER_INCH, dpi
+
+    def is_capped(self, effective_dpi: float, target_dpi: Optional[float] = None) -> bool:
+        return effective_dpi < (target_dpi or self.dpi)
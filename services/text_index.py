@@ -0,0 +1,119 @@
+import gzip
+import json
+import os
+import re
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, List
+
+from .cache_store import document_cache_dir
+from .log import get_logger, job_logger
+from .parallel import ordered_map, DEFAULT_WORKERS
+
+logger = get_logger("text_index")
+
+INDEX_FILENAME = "text_index.json.gz"
+INDEX_VERSION = 1
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Palabras en minúsculas y sin acentos ("Página" y "pagina" coinciden)"""
+    normalized = unicodedata.normalize("NFKD", text.lower())
+    stripped = "".join(c for c in normalized if not unicodedata.combining(c))
+    return TOKEN_RE.findall(stripped)
+
+
+class TextIndex:
+    """Índice invertido palabra -> páginas de un documento"""
+
+    def __init__(self, fingerprint: str, total_pages: int, postings: Dict[str, List[int]] = None):
+        self.fingerprint = fingerprint
+        self.total_pages = total_pages
+        self.postings = postings or {}
+
+    @classmethod
+    def empty(cls) -> "TextIndex":
+        return cls(fingerprint="", total_pages=0)
+
+    def search(self, query: str) -> List[int]:
+        """Páginas que contienen todas las palabras de la consulta"""
+        tokens = set(tokenize(query))
+        if not tokens:
+            return []
+        lists = sorted((self.postings.get(t, []) for t in tokens), key=len)
+        # Intersección empezando por la lista más corta
+        result = set(lists[0])
+        for pages in lists[1:]:
+            if not result:
+                break
+            result.intersection_update(pages)
+        return sorted(result)
+
+    @classmethod
+    def build(cls, service, fingerprint: str, progress_callback=None,
+              workers: int = DEFAULT_WORKERS) -> "TextIndex":
+        """Construir el índice extrayendo el texto de todas las páginas en paralelo"""
+        total_pages = service.get_total_pages()
+        postings: Dict[str, List[int]] = {}
+
+        def page_tokens(page_num: int):
+            page = service._get_fitz_doc()[page_num - 1]
+            return page_num, set(tokenize(page.get_text("text")))
+
+        # Las páginas llegan en orden, así cada lista de postings queda ordenada
+        for page_num, tokens in ordered_map(page_tokens, range(1, total_pages + 1), workers):
+            for token in tokens:
+                postings.setdefault(token, []).append(page_num)
+            if progress_callback:
+                progress_callback(page_num, total_pages, f"Indexando página {page_num}")
+
+        return cls(fingerprint, total_pages, postings)
+
+    def save(self, path: Path):
+        """Guardar el índice comprimido con escritura atómica"""
+        data = {
+            "version": INDEX_VERSION,
+            "fingerprint": self.fingerprint,
+            "total_pages": self.total_pages,
+            "postings": self.postings,
+        }
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path, fingerprint: str):
+        """Cargar un índice guardado; None si no existe o no corresponde"""
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != INDEX_VERSION or data.get("fingerprint") != fingerprint:
+            return None
+        return cls(fingerprint, data["total_pages"], data["postings"])
+
+    @classmethod
+    def load_or_build(cls, service, fingerprint: str, progress_callback=None) -> "TextIndex":
+        """Índice desde la caché del documento, o construido y guardado en ella"""
+        path = document_cache_dir(fingerprint) / INDEX_FILENAME
+        index = cls.load(path, fingerprint)
+        if index is not None:
+            return index
+
+        log = job_logger(logger, doc=service.document_name, op="index")
+        start = time.perf_counter()
+        index = cls.build(service, fingerprint, progress_callback)
+        try:
+            index.save(path)
+        except OSError as e:
+            log.warning("No se pudo guardar el índice de texto", extra={"error": str(e)})
+        log.info("Índice de texto construido", extra={
+            "pages": index.total_pages,
+            "terms": len(index.postings),
+            "duration_s": round(time.perf_counter() - start, 3),
+        })
+        return index
@@ -0,0 +1,83 @@
+import struct
+import zlib
+from typing import BinaryIO, Optional
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+INCHES_PER_METER = 39.3701
+
+# Píxeles por franja: ~4 MP son ~12 MB en RGB; con la ventana de franjas en
+# vuelo (2 por hilo) la memoria queda acotada por el tamaño de franja
+DEFAULT_TILE_PIXELS = 4_000_000
+DEFAULT_TILE_WORKERS = 4
+
+
+# Tipo de color PNG según los canales: escala de grises o RGB
+PNG_COLOR_TYPES = {1: 0, 3: 2}
+
+
+class StreamingPNGWriter:
+    """Codificador PNG por franjas de filas: nunca necesita el bitmap completo
+
+    Admite RGB y escala de grises de 8 bits, y 1 bit por píxel (filas empaquetadas).
+    """
+
+    def __init__(self, fileobj: BinaryIO, width: int, height: int, dpi: Optional[float] = None,
+                 compress_level: int = 6, chunk_size: int = 256 * 1024,
+                 channels: int = 3, bit_depth: int = 8):
+        self.fileobj = fileobj
+        self.width = width
+        self.height = height
+        self.stride = (width * channels * bit_depth + 7) // 8
+        self.chunk_size = chunk_size
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = []
+        self._pending_size = 0
+
+        fileobj.write(PNG_SIGNATURE)
+        # Sin entrelazado
+        color_type = PNG_COLOR_TYPES[channels]
+        self._write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0))
+        if dpi:
+            ppm = int(round(dpi * INCHES_PER_METER))
+            self._write_chunk(b"pHYs", struct.pack(">IIB", ppm, ppm, 1))
+
+    def _write_chunk(self, tag: bytes, data: bytes):
+        self.fileobj.write(struct.pack(">I", len(data)))
+        self.fileobj.write(tag)
+        self.fileobj.write(data)
+        self.fileobj.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(tag)) & 0xFFFFFFFF))
+
+    def _flush_idat(self):
+        if self._pending:
+            self._write_chunk(b"IDAT", b"".join(self._pending))
+            self._pending.clear()
+            self._pending_size = 0
+
+    def write_rows(self, samples: bytes, rows: int):
+        """Añadir `rows` filas consecutivas (stride bytes por fila)"""
+        if len(samples) != self.stride * rows:
+            raise ValueError("El tamaño de la franja no coincide con el ancho de la imagen")
+        if self.rows_written + rows > self.height:
+            raise ValueError("Se escribieron más filas que el alto de la imagen")
+
+        # Cada fila va precedida de su tipo de filtro (0 = ninguno)
+        view = memoryview(samples)
+        raw = b"".join(
+            b"\x00" + view[i:i + self.stride] for i in range(0, len(samples), self.stride)
+        )
+        compressed = self._compressor.compress(raw)
+        if compressed:
+            self._pending.append(compressed)
+            self._pending_size += len(compressed)
+            if self._pending_size >= self.chunk_size:
+                self._flush_idat()
+        self.rows_written += rows
+
+    def close(self):
+        """Terminar el flujo comprimido y escribir el final del PNG"""
+        if self.rows_written != self.height:
+            raise ValueError(f"PNG incompleto: {self.rows_written} de {self.height} filas")
+        self._pending.append(self._compressor.flush())
+        self._flush_idat()
+        self._write_chunk(b"IEND", b"")
@@ -0,0 +1,73 @@
+import io
+
+import fitz  # PyMuPDF
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+A4 = (595, 842)
+LINE = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt"
+
+
+def scan_jpeg(text: str = None, dpi: int = 150, paper: int = 235, noise: float = 4.0,
+              position: tuple = (150, 200), font_size: int = 21) -> bytes:
+    """Escaneo sintético de una página A4: papel gris con ruido y, opcionalmente, una línea de texto"""
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    rng = np.random.default_rng(0)
+    pixels = np.clip(rng.normal(paper, noise, (height, width)), 0, 255).astype(np.uint8)
+    img = Image.fromarray(pixels, "L")
+    if text:
+        ImageDraw.Draw(img).text(position, text, fill=20, font=ImageFont.load_default(size=font_size))
+    buffer = io.BytesIO()
+    img.save(buffer, "JPEG", quality=80)
+    return buffer.getvalue()
+
+
+def text_pdf(path, pages: int = 3) -> str:
+    """PDF de texto con una palabra distinta en cada página ("pagina1", "pagina2"...)"""
+    doc = fitz.open()
+    for i in range(1, pages + 1):
+        page = doc.new_page(width=A4[0], height=A4[1])
+        page.insert_text((72, 100), f"pagina{i} {LINE}", fontsize=10)
+    doc.save(str(path))
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Caché de documentos (índices de texto) aislada por prueba"""
+    path = tmp_path / "cache"
+    monkeypatch.setenv("PDF_EXTRACTOR_CACHE_DIR", str(path))
+    return path
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """Construir un PDF con una función por página que dibuja sobre una página A4 vacía"""
+    def make(*builders, name: str = "doc.pdf") -> str:
+        doc = fitz.open()
+        for build in builders:
+            page = doc.new_page(width=A4[0], height=A4[1])
+            if build:
+                build(page)
+        path = tmp_path / name
+        doc.save(str(path))
+        return str(path)
+    return make
+
+
+@pytest.fixture
+def text_doc(tmp_path) -> str:
+    return text_pdf(tmp_path / "texto.pdf")
+
+
+def page_manager(pages, rotations: dict = None):
+    """Selección de páginas como la que arma la interfaz, con rotaciones opcionales"""
+    from services.page_manager import PageManager
+
+    manager = PageManager()
+    for page_num in pages:
+        manager.add_page(page_num)
+        if rotations and rotations.get(page_num):
+            manager.rotate_page(page_num, rotations[page_num])
+    return manager
@@ -0,0 +1,114 @@
+import os
+import zipfile
+
+import pytest
+from pypdf import PdfWriter
+
+from services import atomic_output
+from services.atomic_output import OutputWriter
+from services.pdf_service import PDFService
+from tests.conftest import page_manager, text_pdf
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Orden de las llamadas a fsync de archivos, fsync de carpetas y renombrados"""
+    calls = []
+    real_replace = os.replace
+    monkeypatch.setattr(atomic_output.os, "fsync", lambda fd: calls.append("fsync"))
+    monkeypatch.setattr(atomic_output, "_fsync_dir", lambda folder: calls.append("dir"))
+    monkeypatch.setattr(atomic_output.os, "replace",
+                        lambda src, dst: (calls.append("replace"), real_replace(src, dst)))
+    return calls
+
+
+def test_output_is_published_on_success(tmp_path):
+    path = tmp_path / "sub" / "salida.pdf"
+    with OutputWriter("none") as out, out.open(path) as f:
+        f.write(b"contenido")
+        assert not path.exists()
+    assert path.read_bytes() == b"contenido"
+    assert os.listdir(path.parent) == ["salida.pdf"]
+
+
+def test_failure_keeps_the_previous_output(tmp_path):
+    path = tmp_path / "salida.pdf"
+    path.write_bytes(b"anterior")
+    with pytest.raises(RuntimeError), OutputWriter("none") as out, out.open(path) as f:
+        f.write(b"a medias")
+        raise RuntimeError("corte")
+    assert path.read_bytes() == b"anterior"
+    assert os.listdir(tmp_path) == ["salida.pdf"]
+
+
+def test_text_mode(tmp_path):
+    with OutputWriter("none") as out, out.open(tmp_path / "a.txt", "w", encoding="utf-8") as f:
+        f.write("página")
+    assert (tmp_path / "a.txt").read_text(encoding="utf-8") == "página"
+
+
+def test_file_mode_syncs_content_before_rename_and_folder_after(tmp_path, calls):
+    with OutputWriter("file") as out:
+        out.write_bytes(tmp_path / "a", b"a")
+        out.write_bytes(tmp_path / "b", b"b")
+    assert calls == ["fsync", "replace", "dir"] * 2
+
+
+def test_batch_mode_groups_folder_syncs(tmp_path, calls):
+    with OutputWriter("batch", batch_size=2) as out:
+        for name in "abc":
+            out.write_bytes(tmp_path / name, b"x")
+        assert calls == ["fsync", "replace", "fsync", "replace", "dir", "fsync", "replace"]
+    # close() sincroniza el último grupo
+    assert calls[-1] == "dir"
+
+
+def test_none_mode_never_syncs(tmp_path, calls):
+    with OutputWriter("none") as out:
+        out.write_bytes(tmp_path / "a", b"a")
+    assert calls == ["replace"]
+
+
+def test_mode_from_env(monkeypatch):
+    monkeypatch.setenv("PDF_EXTRACTOR_FSYNC", "file")
+    assert OutputWriter().fsync == "file"
+    with pytest.raises(ValueError):
+        OutputWriter("siempre")
+
+
+def test_link_shares_the_file(tmp_path):
+    source = tmp_path / "a.png"
+    source.write_bytes(b"imagen")
+    with OutputWriter("none") as out:
+        out.link(source, tmp_path / "b.png")
+    assert os.path.samefile(source, tmp_path / "b.png")
+
+
+def test_link_falls_back_to_a_copy(tmp_path, monkeypatch):
+    source = tmp_path / "a.png"
+    source.write_bytes(b"imagen")
+
+    def no_links(src, dst):
+        raise OSError("sin enlaces duros")
+    monkeypatch.setattr(atomic_output.os, "link", no_links)
+    with OutputWriter("none") as out:
+        out.link(source, tmp_path / "b.png")
+    assert (tmp_path / "b.png").read_bytes() == b"imagen"
+    assert not os.path.samefile(source, tmp_path / "b.png")
+
+
+def test_failed_exports_leave_previous_outputs(tmp_path, monkeypatch):
+    service = PDFService(text_pdf(tmp_path / "doc.pdf"), fsync="none")
+    combined, archive = tmp_path / "combinado.pdf", tmp_path / "imagenes.zip"
+    assert service.export_combined_pdf(page_manager([1, 2]), str(combined))
+    assert service.export_as_images_zip(page_manager([1]), str(archive))
+    before = combined.read_bytes(), archive.read_bytes()
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("disco lleno")
+    monkeypatch.setattr(PdfWriter, "write", broken)
+    monkeypatch.setattr(zipfile.ZipFile, "writestr", broken)
+    assert not service.export_combined_pdf(page_manager([1]), str(combined))
+    assert not service.export_as_images_zip(page_manager([1, 2]), str(archive))
+    assert (combined.read_bytes(), archive.read_bytes()) == before
+    assert sorted(os.listdir(tmp_path)) == ["combinado.pdf", "doc.pdf", "imagenes.zip"]
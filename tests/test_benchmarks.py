@@ -0,0 +1,56 @@
+import fitz  # PyMuPDF
+import pytest
+
+from benchmarks.run import compare, run_case
+from benchmarks.synthetic import SYNTHETIC_VERSION, cached_pdf, generate_pdf
+
+
+@pytest.mark.parametrize("kind", ["text", "vector", "scanned"])
+def test_generate_pdf(tmp_path, kind):
+    doc = fitz.open(generate_pdf(kind, 3, str(tmp_path / f"{kind}.pdf")))
+    assert doc.page_count == 3
+    assert all(page.get_text() or page.get_images() for page in doc)
+
+
+def test_scanned_pages_have_their_own_images(tmp_path):
+    doc = fitz.open(generate_pdf("scanned", 4, str(tmp_path / "scanned.pdf")))
+    xrefs = {page.get_images()[0][0] for page in doc}
+    assert len(xrefs) == 4
+
+
+def test_generation_is_deterministic(tmp_path):
+    first = fitz.open(generate_pdf("text", 2, str(tmp_path / "a.pdf")))
+    second = fitz.open(generate_pdf("text", 2, str(tmp_path / "b.pdf")))
+    assert [p.get_text() for p in first] == [p.get_text() for p in second]
+
+
+def test_cached_pdf_is_versioned_and_reused(tmp_path):
+    path = cached_pdf("text", 2, str(tmp_path))
+    assert path.endswith(f"text_2_v{SYNTHETIC_VERSION}.pdf")
+    mtime = (tmp_path / path).stat().st_mtime_ns
+    assert cached_pdf("text", 2, str(tmp_path)) == path
+    assert (tmp_path / path).stat().st_mtime_ns == mtime
+    with pytest.raises(ValueError):
+        generate_pdf("fotos", 1, str(tmp_path / "x.pdf"))
+
+
+def test_compare_reports_regressions():
+    baseline = {"cases": {"text-10": {"open": {"median_s": 1.0}, "export": {"median_s": 2.0}}}}
+    results = {"cases": {"text-10": {"open": {"median_s": 1.1}, "export": {"median_s": 2.5},
+                                     "nuevo": {"median_s": 9.0}}}}
+    regressions = compare(results, baseline, threshold=0.15)
+    assert len(regressions) == 1 and regressions[0].startswith("text-10/export")
+    assert results["cases"]["text-10"]["open"]["baseline_ratio"] == pytest.approx(1.1)
+    assert "baseline_ratio" not in results["cases"]["text-10"]["nuevo"]
+
+
+def test_run_case_measures_every_operation(tmp_path):
+    pdf_path = cached_pdf("scanned", 2, str(tmp_path))
+    out_dir = tmp_path / "salida"
+    out_dir.mkdir()
+    results = run_case(pdf_path, 2, out_dir, repeat=1, max_render_pages=1)
+    assert set(results) == {"open", "render_thumbnail", "render_300dpi", "render_300dpi_processes",
+                            "export_combined_pdf", "export_individual_pdfs", "export_images_zip",
+                            "export_images_folder", "export_plan"}
+    assert results["render_300dpi"]["pages"] == 1
+    assert results["export_combined_pdf"]["pages"] == 2
@@ -0,0 +1,82 @@
+import io
+import zipfile
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from services.color_modes import (check_color_mode, otsu_threshold, pack_bitonal, pil_mode, render_colorspace,
+                                  to_bitonal)
+from services.pdf_service import PDFService
+from tests.conftest import page_manager, text_pdf
+
+
+def test_otsu_separates_ink_from_paper():
+    rng = np.random.default_rng(0)
+    ink = rng.normal(40, 10, 2000)
+    paper = rng.normal(220, 10, 20000)
+    gray = np.clip(np.concatenate([ink, paper]), 0, 255).astype(np.uint8).reshape(100, 220)
+    threshold = otsu_threshold(gray)
+    assert np.mean(gray.ravel()[:2000] <= threshold) > 0.99
+    assert np.mean(gray.ravel()[2000:] > threshold) > 0.99
+
+
+def test_single_tone_page_is_all_background():
+    gray = np.full((10, 10), 255, dtype=np.uint8)
+    assert pack_bitonal(gray, otsu_threshold(gray)) == b"\xff\xc0" * 10
+
+
+def test_pack_bitonal_rows():
+    gray = np.array([[0, 255, 255, 0, 0, 0, 0, 0, 255]], dtype=np.uint8)
+    # Cada fila se completa hasta el byte; 1 = blanco
+    assert pack_bitonal(gray, 128) == bytes([0b01100000, 0b10000000])
+
+
+def test_to_bitonal_keeps_size_and_metadata():
+    img = Image.new("RGB", (30, 20), "white")
+    img.paste((0, 0, 0), (0, 0, 10, 20))
+    img.info["dpi"] = (300, 300)
+    bitonal = to_bitonal(img)
+    assert (bitonal.mode, bitonal.size, bitonal.info["dpi"]) == ("1", (30, 20), (300, 300))
+    assert bitonal.getpixel((5, 5)) == 0 and bitonal.getpixel((25, 5)) == 255
+
+
+def test_color_mode_helpers():
+    assert pil_mode(render_colorspace("color")) == "RGB"
+    assert pil_mode(render_colorspace("gray")) == pil_mode(render_colorspace("bitonal")) == "L"
+    with pytest.raises(ValueError):
+        check_color_mode("sepia")
+
+
+@pytest.mark.parametrize("color_mode, mode", [("color", "RGB"), ("gray", "L"), ("bitonal", "1")])
+def test_render_page_modes(text_doc, color_mode, mode):
+    img = PDFService(text_doc).render_page(1, for_export=True, color_mode=color_mode)
+    assert img.mode == mode
+    assert img.width == pytest.approx(595 * 300 / 72, abs=1)
+
+
+def export_tiff(tmp_path, color_mode) -> bytes:
+    service = PDFService(text_pdf(tmp_path / "doc.pdf", pages=1))
+    output = tmp_path / f"{color_mode}.zip"
+    assert service.export_as_images_zip(page_manager([1]), str(output), "TIFF", color_mode=color_mode)
+    with zipfile.ZipFile(output) as zf:
+        return zf.read("doc_pagina_001.tiff")
+
+
+def test_bitonal_tiff_uses_group4_and_is_smallest(tmp_path):
+    sizes = {mode: len(export_tiff(tmp_path, mode)) for mode in ("color", "gray", "bitonal")}
+    img = Image.open(io.BytesIO(export_tiff(tmp_path, "bitonal")))
+    assert (img.mode, img.info["compression"]) == ("1", "group4")
+    assert sizes["bitonal"] * 10 < sizes["gray"] < sizes["color"]
+
+
+def test_bitonal_tiled_render_matches_full_render(text_doc):
+    service = PDFService(text_doc)
+    output = io.BytesIO()
+    service.render_page_tiled(1, output, color_mode="bitonal")
+    tiled = np.asarray(Image.open(io.BytesIO(output.getvalue())).convert("L"))
+    full = np.asarray(service.render_page(1, for_export=True, color_mode="bitonal").convert("L"))
+    assert tiled.shape == full.shape
+    # Las franjas usan el umbral de una vista previa: solo cambian los bordes suavizados de las letras
+    ink = np.count_nonzero(full == 0)
+    assert ink and np.count_nonzero(tiled == 0) == pytest.approx(ink, rel=0.1)
@@ -0,0 +1,81 @@
+import random
+
+import numpy as np
+import pytest
+
+from services.page_analysis import (HASH_FREQUENCIES, DuplicatePageFinder, HammingIndex, dct_features,
+                                    perceptual_hashes)
+from services.pdf_service import PDFService
+
+BITS = HASH_FREQUENCIES ** 2 - 1
+
+
+def flip_bits(key: int, count: int, rng: random.Random) -> int:
+    for bit in rng.sample(range(BITS), count):
+        key ^= 1 << bit
+    return key
+
+
+@pytest.mark.parametrize("radius", [0, 5, 36])
+def test_hamming_index_matches_brute_force(radius):
+    rng = random.Random(radius)
+    keys = []
+    for _ in range(150):
+        # Mezcla de huellas nuevas y variantes cercanas de huellas anteriores
+        if keys and rng.random() < 0.5:
+            keys.append(flip_bits(rng.choice(keys), rng.randint(0, radius + 3), rng))
+        else:
+            keys.append(rng.getrandbits(BITS))
+
+    index = HammingIndex(BITS, radius)
+    for i, key in enumerate(keys):
+        expected = {j for j in range(i) if bin(key ^ keys[j]).count("1") <= radius}
+        assert set(index.search(key)) == expected
+        assert index.add(key) == i
+
+
+def test_dct_features_ignore_brightness():
+    rng = np.random.default_rng(0)
+    stack = rng.integers(0, 200, (3, 128, 128)).astype(np.uint8)
+    features = dct_features(stack)
+    assert features.shape == (3, BITS)
+    brighter = dct_features(stack + np.uint8(40))
+    assert np.allclose(features, brighter, atol=1e-2)
+
+
+def test_perceptual_hashes_use_document_median():
+    features = np.array([[1.0, 5.0], [3.0, 1.0], [2.0, 3.0]])
+    # Con _HASH_ORDER barajado solo importa cuántos bits quedan por encima de la mediana
+    hashes = perceptual_hashes(np.pad(features, ((0, 0), (0, BITS - 2))))
+    assert [bin(h).count("1") for h in hashes] == [1, 1, 0]
+
+
+def test_group_joins_transitive_neighbours():
+    finder = DuplicatePageFinder(max_distance=2)
+    hashes = [0b0000, 0b0011, 0b1111, 0b111 << 100]
+    assert finder.group([1, 2, 3, 4], hashes) == [[1, 2, 3]]
+
+
+def report(seed: int):
+    """Página de texto con un número y una disposición de líneas propios de la semilla"""
+    def build(page):
+        rng = random.Random(seed)
+        y = 80 + rng.randint(0, 200)
+        for _ in range(rng.randint(5, 40)):
+            page.insert_text((72 + rng.randint(0, 60), y), "importe total " * rng.randint(2, 6), fontsize=10)
+            y += 14
+            if y > 800:
+                break
+    return build
+
+
+def cover(page):
+    page.draw_rect((72, 72, 520, 300), fill=(0.2, 0.3, 0.8))
+    page.insert_text((100, 400), "Portada", fontsize=40)
+
+
+def test_find_duplicate_pages(make_pdf):
+    path = make_pdf(cover, *[report(seed) for seed in range(8)], cover, report(3))
+    service = PDFService(path)
+    assert service.find_duplicate_pages() == [[1, 10], [5, 11]]
+    assert service.find_duplicate_pages(range(2, 10)) == []
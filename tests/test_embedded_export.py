@@ -0,0 +1,100 @@
+import io
+import zipfile
+
+import fitz  # PyMuPDF
+import pytest
+from PIL import Image
+
+from services.pdf_service import PDFService
+from tests.conftest import A4, page_manager, scan_jpeg
+
+LOGO = scan_jpeg(dpi=30)
+
+
+def png_with_alpha() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGBA", (40, 30), (200, 30, 30, 128)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def catalog(path, photos: int = 3) -> str:
+    """Catálogo: una foto distinta por página y el mismo logotipo (un solo objeto) en todas"""
+    doc = fitz.open()
+    logo = 0
+    for i in range(photos):
+        page = doc.new_page(width=A4[0], height=A4[1])
+        page.insert_image(fitz.Rect(72, 200, 500, 700), stream=scan_jpeg(f"Foto {i}", dpi=40))
+        logo = page.insert_image(fitz.Rect(20, 20, 80, 80), stream=LOGO, xref=logo)
+    doc.save(str(path))
+    return str(path)
+
+
+def read_zip(path) -> dict:
+    with zipfile.ZipFile(path) as zf:
+        return {name: zf.read(name) for name in zf.namelist()}
+
+
+def test_shared_image_is_written_once(tmp_path):
+    service = PDFService(catalog(tmp_path / "catalogo.pdf"))
+    output = tmp_path / "imagenes.zip"
+    assert service.export_embedded_images(page_manager([1, 2, 3]), str(output))
+    files = read_zip(output)
+    assert len(files) == 4
+    assert sum(data == LOGO for data in files.values()) == 1
+    # Cada imagen se nombra por la primera página en que aparece
+    assert sorted(name.split("_imagen_")[0] for name in files) == ["catalogo_pagina_001"] * 2 + [
+        "catalogo_pagina_002", "catalogo_pagina_003"]
+    assert all(name.endswith(".jpg") for name in files)
+
+
+def test_identical_content_in_distinct_objects_is_written_once(tmp_path):
+    # Dos documentos con el mismo logotipo unidos: dos objetos con los mismos bytes
+    merged = fitz.open()
+    for _ in range(2):
+        part = fitz.open()
+        part.new_page(width=A4[0], height=A4[1]).insert_image(fitz.Rect(20, 20, 80, 80), stream=LOGO)
+        merged.insert_pdf(part)
+    path = tmp_path / "unido.pdf"
+    merged.save(str(path))
+    assert len({image[0] for page in merged for image in page.get_images()}) == 2
+
+    output = tmp_path / "imagenes.zip"
+    assert PDFService(str(path)).export_embedded_images(page_manager([1, 2]), str(output))
+    assert list(read_zip(output).values()) == [LOGO]
+
+
+def test_only_selected_pages_are_walked(tmp_path):
+    output = tmp_path / "imagenes.zip"
+    assert PDFService(catalog(tmp_path / "catalogo.pdf")).export_embedded_images(page_manager([3]), str(output))
+    assert sorted(name.split("_imagen_")[0] for name in read_zip(output)) == ["catalogo_pagina_003"] * 2
+
+
+def test_masked_image_is_saved_as_png(make_pdf, tmp_path):
+    path = make_pdf(lambda page: page.insert_image(fitz.Rect(72, 72, 272, 222), stream=png_with_alpha()))
+    output = tmp_path / "imagenes.zip"
+    assert PDFService(path).export_embedded_images(page_manager([1]), str(output))
+    (name, data), = read_zip(output).items()
+    assert name.endswith(".png")
+    img = Image.open(io.BytesIO(data))
+    assert img.mode == "RGBA" and img.size == (40, 30)
+
+
+def test_folder_export(tmp_path):
+    output = tmp_path / "carpeta"
+    assert PDFService(catalog(tmp_path / "catalogo.pdf")).export_embedded_images(
+        page_manager([1, 2, 3]), str(output), as_zip=False, workers=1)
+    assert len(list(output.iterdir())) == 4
+    assert sum(file.read_bytes() == LOGO for file in output.iterdir()) == 1
+
+
+@pytest.mark.parametrize("build", [None, lambda page: page.insert_text((72, 72), "Sin imágenes")])
+def test_pages_without_images_produce_an_empty_archive(make_pdf, tmp_path, build):
+    output = tmp_path / "imagenes.zip"
+    assert PDFService(make_pdf(build)).export_embedded_images(page_manager([1]), str(output))
+    assert read_zip(output) == {}
+
+
+def test_empty_selection_creates_nothing(tmp_path):
+    output = tmp_path / "imagenes.zip"
+    assert not PDFService(catalog(tmp_path / "catalogo.pdf")).export_embedded_images(page_manager([]), str(output))
+    assert not output.exists()
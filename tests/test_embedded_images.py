@@ -0,0 +1,83 @@
+import fitz  # PyMuPDF
+import pytest
+
+from services.export_sinks import MemorySink
+from services.page_images import single_page_image
+from services.pdf_service import PDFService
+from tests.conftest import page_manager, scan_jpeg
+
+SCAN = scan_jpeg("Hola mundo")
+
+
+def scanned(page):
+    page.insert_image(page.rect, stream=SCAN)
+
+
+def scanned_with_ocr(page):
+    scanned(page)
+    page.insert_text((150, 200), "Hola mundo", render_mode=3)
+
+
+def scanned_with_text(page):
+    scanned(page)
+    page.insert_text((72, 800), "Sello de registro")
+
+
+def first_page(path) -> fitz.Page:
+    return fitz.open(path)[0]
+
+
+def test_scanned_page_yields_original_stream(make_pdf):
+    image = single_page_image(first_page(make_pdf(scanned)))
+    assert image.ext == "jpg"
+    assert image.data == SCAN
+    assert (image.width, image.height) == (int(8.27 * 150), int(11.69 * 150))
+
+
+def test_invisible_ocr_layer_is_allowed(make_pdf):
+    assert single_page_image(first_page(make_pdf(scanned_with_ocr))).data == SCAN
+
+
+@pytest.mark.parametrize("build", [
+    scanned_with_text,
+    lambda page: (scanned(page), page.draw_line((72, 72), (300, 72))),
+    lambda page: page.insert_image(fitz.Rect(0, 0, 300, 400), stream=SCAN),
+    lambda page: (page.insert_image(fitz.Rect(0, 0, 595, 421), stream=SCAN),
+                  page.insert_image(fitz.Rect(0, 421, 595, 842), stream=scan_jpeg())),
+    lambda page: page.insert_image(page.rect, stream=SCAN, rotate=180),
+    lambda page: page.insert_text((72, 72), "Solo texto"),
+], ids=["texto", "dibujo", "parcial", "dos_imagenes", "girada", "sin_imagen"])
+def test_mixed_pages_are_rejected(make_pdf, build):
+    assert single_page_image(first_page(make_pdf(build))) is None
+
+
+def test_rotated_page_is_rejected(make_pdf):
+    page = first_page(make_pdf(lambda page: (scanned(page), page.set_rotation(90))))
+    assert single_page_image(page) is None
+
+
+def export(path, pages, prefer_embedded=True, rotations=None, **options):
+    service = PDFService(path)
+    sink = MemorySink("doc")
+    assert service.export_images_to(page_manager(pages, rotations), sink, "PNG",
+                                    prefer_embedded=prefer_embedded, **options)
+    return sink.files, service.last_encoding_report
+
+
+def test_export_writes_scans_directly_and_renders_the_rest(make_pdf):
+    files, report = export(make_pdf(scanned, scanned_with_text, scanned_with_ocr), [1, 2, 3])
+    assert sorted(files) == ["doc_pagina_001.jpg", "doc_pagina_002.png", "doc_pagina_003.jpg"]
+    assert files["doc_pagina_001.jpg"] == files["doc_pagina_003.jpg"] == SCAN
+    assert (report["embedded_pages"], report["embedded_bytes"]) == (2, 2 * len(SCAN))
+    assert report["pages"] == 1
+
+
+@pytest.mark.parametrize("options", [
+    {"prefer_embedded": False},
+    {"rotations": {1: 90}},
+    {"color_mode": "gray"},
+], ids=["desactivado", "rotada", "grises"])
+def test_export_falls_back_to_rendering(make_pdf, options):
+    files, report = export(make_pdf(scanned), [1], **options)
+    assert list(files) == ["doc_pagina_001.png"]
+    assert report["embedded_pages"] == 0
@@ -0,0 +1,66 @@
+import io
+
+import pytest
+from PIL import Image
+
+from services.encoding_profiles import (ENCODING_PROFILES, IMAGE_FORMATS, EncodingStats, encode_params,
+                                        png_compress_level)
+from services.export_sinks import MemorySink
+from services.pdf_service import PDFService
+from tests.conftest import page_manager, text_pdf
+
+
+def test_every_profile_covers_every_format():
+    for profile in ENCODING_PROFILES:
+        for image_format in IMAGE_FORMATS:
+            assert isinstance(encode_params(profile, image_format.lower()), dict)
+    assert png_compress_level("fast") < png_compress_level("smallest")
+
+
+def test_encode_params_are_copies():
+    params = encode_params("balanced", "JPEG")
+    params["quality"] = 1
+    assert encode_params("balanced", "JPEG")["quality"] == 95
+
+
+@pytest.mark.parametrize("profile, image_format", [("turbo", "PNG"), ("fast", "GIF")])
+def test_unknown_profile_or_format(profile, image_format):
+    with pytest.raises(ValueError):
+        encode_params(profile, image_format)
+
+
+def test_encoding_stats():
+    stats = EncodingStats("fast", "PNG")
+    stats.add(0.2, 1000)
+    stats.add(0.4, 3000)
+    stats.add_duplicate(500)
+    report = stats.as_dict()
+    assert (report["pages"], report["bytes"], report["bytes_per_page"]) == (2, 4000, 2000)
+    assert report["encode_ms_per_page"] == pytest.approx(300.0)
+    assert (report["duplicate_pages"], report["duplicate_bytes"]) == (1, 500)
+    assert EncodingStats("fast", "PNG").as_dict()["bytes_per_page"] == 0
+
+
+def export(service, image_format, profile):
+    sink = MemorySink("a")
+    assert service.export_images_to(page_manager([1, 2]), sink, image_format, encoding_profile=profile)
+    return sink.files, service.last_encoding_report
+
+
+@pytest.mark.parametrize("image_format, extension", [("PNG", "png"), ("JPEG", "jpeg"), ("TIFF", "tiff"),
+                                                      ("WEBP", "webp")])
+def test_profiles_encode_every_format(tmp_path, image_format, extension):
+    service = PDFService(text_pdf(tmp_path / "a.pdf", pages=2))
+    files, report = export(service, image_format, "fast")
+    assert sorted(files) == [f"a_pagina_001.{extension}", f"a_pagina_002.{extension}"]
+    img = Image.open(io.BytesIO(files[f"a_pagina_001.{extension}"]))
+    assert img.format == ("JPEG" if image_format == "JPEG" else image_format)
+    assert (report["profile"], report["format"], report["pages"]) == ("fast", image_format, 2)
+    assert report["bytes"] == sum(len(data) for data in files.values())
+
+
+def test_smallest_profile_is_smaller(tmp_path):
+    service = PDFService(text_pdf(tmp_path / "a.pdf", pages=2))
+    fast = export(service, "PNG", "fast")[1]["bytes"]
+    smallest = export(service, "PNG", "smallest")[1]["bytes"]
+    assert smallest < fast
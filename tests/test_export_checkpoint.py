@@ -0,0 +1,173 @@
+import json
+import os
+
+import pytest
+
+from services.export_checkpoint import CHECKPOINT_NAME, ExportCheckpoint
+from services.page_manager import PageInfo
+from services.pdf_service import PDFService
+from tests.conftest import page_manager, text_pdf
+
+SETTINGS = {"fingerprint": "abc", "format": "PNG"}
+
+
+def write_output(folder, page: int, data: bytes = b"imagen") -> PageInfo:
+    page_info = PageInfo(page)
+    (folder / f"p{page}.png").write_bytes(data)
+    return page_info
+
+
+def recorded(folder, pages=(1, 2)) -> ExportCheckpoint:
+    checkpoint = ExportCheckpoint(str(folder), "images_folder", SETTINGS)
+    for page in pages:
+        checkpoint.record(write_output(folder, page), f"p{page}.png")
+    return checkpoint
+
+
+def test_recorded_outputs_survive_a_restart(tmp_path):
+    recorded(tmp_path)
+    checkpoint = ExportCheckpoint(str(tmp_path), "images_folder", SETTINGS)
+    assert checkpoint.completed(PageInfo(1)) == "p1.png"
+    assert checkpoint.completed(PageInfo(2)) == "p2.png"
+    assert checkpoint.completed(PageInfo(3)) is None
+
+
+def test_cut_last_line_is_ignored(tmp_path):
+    recorded(tmp_path)
+    manifest = tmp_path / CHECKPOINT_NAME
+    manifest.write_text(manifest.read_text()[:-20], encoding="utf-8")
+    checkpoint = ExportCheckpoint(str(tmp_path), "images_folder", SETTINGS)
+    assert checkpoint.completed(PageInfo(1)) == "p1.png"
+    assert checkpoint.completed(PageInfo(2)) is None
+    # El manifiesto se reescribe sin la línea cortada
+    assert len(manifest.read_text().splitlines()) == 2
+
+
+def test_manifest_of_another_operation_starts_over(tmp_path):
+    recorded(tmp_path)
+    assert ExportCheckpoint(str(tmp_path), "pdf_individual", SETTINGS).completed(PageInfo(1)) is None
+
+
+@pytest.mark.parametrize("change", [
+    lambda path: path.unlink(),
+    lambda path: path.write_bytes(b"otra"),
+    lambda path: path.write_bytes(b"IMAGEN"),
+], ids=["borrada", "otro_tamano", "mismo_tamano"])
+def test_damaged_outputs_are_regenerated(tmp_path, change):
+    recorded(tmp_path)
+    change(tmp_path / "p1.png")
+    checkpoint = ExportCheckpoint(str(tmp_path), "images_folder", SETTINGS)
+    assert checkpoint.completed(PageInfo(1)) is None
+    assert checkpoint.completed(PageInfo(2)) == "p2.png"
+
+
+def test_touched_output_with_same_content_is_kept(tmp_path):
+    recorded(tmp_path)
+    os.utime(tmp_path / "p1.png", ns=(0, 0))
+    assert ExportCheckpoint(str(tmp_path), "images_folder", SETTINGS).completed(PageInfo(1)) == "p1.png"
+
+
+def test_record_hashes_given_data_or_file(tmp_path):
+    checkpoint = ExportCheckpoint(str(tmp_path), "images_folder", SETTINGS)
+    checkpoint.record(write_output(tmp_path, 1), "p1.png", b"imagen")
+    checkpoint.record(write_output(tmp_path, 2), "p2.png")
+    entries = [json.loads(line) for line in (tmp_path / CHECKPOINT_NAME).read_text().splitlines()[1:]]
+    assert entries[0]["sha1"] == entries[1]["sha1"]
+    assert [entry["size"] for entry in entries] == [6, 6]
+
+
+def export_folder(service, folder, pages, incremental=True, **options) -> list:
+    """Exportar a carpeta y devolver los nombres que se omitieron por estar vigentes"""
+    messages = []
+    assert service.export_as_images_folder(page_manager(pages, options.pop("rotations", None)), str(folder),
+                                           "PNG", lambda done, total, message: messages.append(message),
+                                           incremental=incremental, **options)
+    return [message.split(": ")[1] for message in messages if message.startswith("Ya exportada")]
+
+
+def test_interrupted_export_resumes_with_the_missing_tail(tmp_path):
+    service = PDFService(text_pdf(tmp_path / "doc.pdf", pages=4))
+    folder = tmp_path / "salida"
+    # Corte tras dos páginas: solo quedan sus archivos y sus líneas en el manifiesto
+    assert export_folder(service, folder, [1, 2]) == []
+    assert export_folder(service, folder, [1, 2, 3, 4]) == ["doc_pagina_001.png", "doc_pagina_002.png"]
+    assert sorted(path.name for path in folder.iterdir()) == [
+        CHECKPOINT_NAME, *(f"doc_pagina_00{page}.png" for page in range(1, 5))]
+    assert export_folder(service, folder, [1, 2, 3, 4]) == [f"doc_pagina_00{page}.png" for page in range(1, 5)]
+
+
+def test_normal_export_does_not_touch_the_manifest(tmp_path):
+    service = PDFService(text_pdf(tmp_path / "doc.pdf", pages=2))
+    folder = tmp_path / "salida"
+    export_folder(service, folder, [1, 2], incremental=False)
+    assert not (folder / CHECKPOINT_NAME).exists()
+
+    export_folder(service, folder, [1])
+    manifest = (folder / CHECKPOINT_NAME).read_text()
+    export_folder(service, folder, [1, 2], incremental=False)
+    assert (folder / CHECKPOINT_NAME).read_text() == manifest
+
+
+def test_individual_pdfs_resume(tmp_path):
+    service = PDFService(text_pdf(tmp_path / "doc.pdf", pages=3))
+    folder = tmp_path / "salida"
+    assert service.export_individual_pdfs(page_manager([1, 2]), str(folder), incremental=True)
+    (folder / "doc_pagina_002.pdf").unlink()
+
+    messages = []
+    assert service.export_individual_pdfs(page_manager([1, 2, 3]), str(folder),
+                                          lambda done, total, message: messages.append(message), incremental=True)
+    assert [message for message in messages if message.startswith(("Ya", "Guardado"))] == [
+        "Ya exportado: doc_pagina_001.pdf", "Guardado: doc_pagina_002.pdf", "Guardado: doc_pagina_003.pdf"]
+
+
+def test_output_key_covers_page_rotation_and_settings(tmp_path):
+    checkpoint = ExportCheckpoint(str(tmp_path), "images_folder", SETTINGS)
+    keys = {checkpoint.output_key(PageInfo(1)), checkpoint.output_key(PageInfo(2)),
+            checkpoint.output_key(PageInfo(1, rotation=90)),
+            ExportCheckpoint(str(tmp_path), "images_folder", {**SETTINGS, "format": "JPEG"}).output_key(PageInfo(1)),
+            ExportCheckpoint(str(tmp_path), "images_folder", {**SETTINGS, "fingerprint": "xyz"}).output_key(
+                PageInfo(1))}
+    assert len(keys) == 5
+
+
+def test_rotating_one_page_reexports_only_that_page(tmp_path):
+    service = PDFService(text_pdf(tmp_path / "doc.pdf", pages=3))
+    folder = tmp_path / "salida"
+    export_folder(service, folder, [1, 2, 3])
+    assert export_folder(service, folder, [1, 2, 3], rotations={2: 90}) == ["doc_pagina_001.png",
+                                                                            "doc_pagina_003.png"]
+    assert export_folder(service, folder, [1, 2, 3], rotations={2: 90}) == [
+        "doc_pagina_001.png", "doc_pagina_002.png", "doc_pagina_003.png"]
+    # Deshacer el giro vuelve a generar la página
+    assert "doc_pagina_002.png" not in export_folder(service, folder, [1, 2, 3])
+
+
+@pytest.mark.parametrize("options", [{"encoding_profile": "smallest"}, {"color_mode": "gray"}],
+                         ids=["perfil", "color"])
+def test_changed_settings_reexport_everything(tmp_path, options):
+    service = PDFService(text_pdf(tmp_path / "doc.pdf", pages=2))
+    folder = tmp_path / "salida"
+    export_folder(service, folder, [1, 2])
+    assert export_folder(service, folder, [1, 2], **options) == []
+    assert len(export_folder(service, folder, [1, 2], **options)) == 2
+
+
+def test_changed_document_reexports_everything(tmp_path):
+    folder = tmp_path / "salida"
+    export_folder(PDFService(text_pdf(tmp_path / "doc.pdf", pages=2)), folder, [1, 2])
+    # Mismo nombre, otro contenido: la huella del documento cambia
+    changed = PDFService(text_pdf(tmp_path / "doc.pdf", pages=3))
+    assert export_folder(changed, folder, [1, 2]) == []
+
+
+def test_rotated_individual_pdf_is_reexported(tmp_path):
+    service = PDFService(text_pdf(tmp_path / "doc.pdf", pages=2))
+    folder = tmp_path / "salida"
+    assert service.export_individual_pdfs(page_manager([1, 2]), str(folder), incremental=True)
+
+    messages = []
+    assert service.export_individual_pdfs(page_manager([1, 2], {1: 180}), str(folder),
+                                          lambda done, total, message: messages.append(message), incremental=True)
+    assert [message for message in messages if message.startswith(("Ya", "Guardado"))] == [
+        "Guardado: doc_pagina_001.pdf", "Ya exportado: doc_pagina_002.pdf"]
@@ -0,0 +1,147 @@
+import io
+import random
+import sys
+import tarfile
+import threading
+import time
+
+import pytest
+
+from services.export_pipeline import ExportPipeline, Stage
+from services.export_sinks import MemorySink, StdoutSink, TarSink
+from services.pdf_service import PDFService
+from tests.conftest import page_manager, text_pdf
+
+
+def jitter(func):
+    """Etapa que tarda un tiempo aleatorio: los elementos terminan desordenados"""
+    def stage(item):
+        time.sleep(random.random() / 200)
+        return func(item)
+    return stage
+
+
+def pipeline_threads() -> list:
+    return [thread for thread in threading.enumerate() if thread.name.startswith("pipeline-")]
+
+
+def test_items_arrive_in_order_through_every_stage():
+    pipeline = ExportPipeline([Stage("doble", jitter(lambda x: x * 2), 4),
+                               Stage("suma", jitter(lambda x: x + 1), 3)])
+    assert list(pipeline.run(range(50))) == [x * 2 + 1 for x in range(50)]
+    assert not pipeline_threads()
+
+
+def test_stage_error_is_raised_at_its_turn():
+    def fail_on_five(x):
+        if x == 5:
+            raise ValueError("página 5")
+        return x
+
+    received = []
+    with pytest.raises(ValueError, match="página 5"):
+        for item in ExportPipeline([Stage("falla", jitter(fail_on_five), 4)]).run(range(20)):
+            received.append(item)
+    assert received == [0, 1, 2, 3, 4]
+    assert not pipeline_threads()
+
+
+def test_source_error_is_raised_after_earlier_items():
+    def source():
+        yield from range(3)
+        raise OSError("lector roto")
+
+    received = []
+    with pytest.raises(OSError):
+        for item in ExportPipeline([Stage("copia", lambda x: x, 2)]).run(source()):
+            received.append(item)
+    assert received == [0, 1, 2]
+
+
+def test_slow_consumer_bounds_items_in_flight():
+    produced = []
+
+    def source():
+        for i in range(40):
+            produced.append(i)
+            yield i
+
+    pipeline = ExportPipeline([Stage("copia", lambda x: x, 2)], window=4)
+    for consumed, _ in enumerate(pipeline.run(source()), start=1):
+        time.sleep(0.005)
+        assert len(produced) <= consumed + pipeline.window
+    assert len(produced) == 40
+
+
+def test_abandoned_run_stops_the_threads():
+    items = ExportPipeline([Stage("copia", jitter(lambda x: x), 3)]).run(range(1000))
+    assert next(items) == 0
+    items.close()
+    assert not pipeline_threads()
+
+
+def test_memory_sink_links():
+    sink = MemorySink("a")
+    sink.write("a_pagina_001.png", b"imagen")
+    sink.link("a_pagina_002.png", "a_pagina_001.png")
+    with sink.open_stream("a_pagina_003.png") as stream:
+        stream.write(b"franjas")
+    assert sink.files == {"a_pagina_001.png": b"imagen", "a_pagina_002.png": b"imagen",
+                          "a_pagina_003.png": b"franjas"}
+
+
+def test_stdout_sink_streams_a_tar(monkeypatch):
+    stdout = io.TextIOWrapper(io.BytesIO())
+    monkeypatch.setattr(sys, "stdout", stdout)
+    sink = StdoutSink("a")
+    sink.write("a_pagina_001.png", b"imagen")
+    sink.link("a_pagina_002.png", "a_pagina_001.png")
+    sink.close()
+    with tarfile.open(fileobj=io.BytesIO(stdout.buffer.getvalue())) as tf:
+        assert tf.getnames() == ["a_pagina_001.png", "a_pagina_002.png"]
+        assert tf.getmember("a_pagina_002.png").islnk()
+
+
+def test_tar_sink_never_seeks():
+    class Pipe(io.BytesIO):
+        def seekable(self):
+            return False
+
+        def seek(self, *args):
+            raise io.UnsupportedOperation("tubería")
+
+    pipe = Pipe()
+    sink = TarSink(pipe, "a")
+    sink.write("a.png", b"x" * 1000)
+    sink.close()
+    assert tarfile.open(fileobj=io.BytesIO(pipe.getvalue())).extractfile("a.png").read() == b"x" * 1000
+
+
+def test_export_writes_pages_in_selection_order(tmp_path):
+    service = PDFService(text_pdf(tmp_path / "doc.pdf", pages=6))
+    order = []
+    sink = MemorySink("doc")
+    write = sink.write
+    sink.write = lambda name, data: (order.append(name), write(name, data))
+    assert service.export_images_to(page_manager([6, 2, 4, 1]), sink, "JPEG", workers=4)
+    assert order == [f"doc_pagina_00{page}.jpeg" for page in (6, 2, 4, 1)]
+
+
+def test_export_error_is_reported_and_stops(tmp_path, monkeypatch):
+    service = PDFService(text_pdf(tmp_path / "doc.pdf", pages=4))
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("codificador roto")
+    monkeypatch.setattr(service, "_encode_page", broken)
+    sink = MemorySink("doc")
+    assert not service.export_images_to(page_manager([1, 2, 3, 4]), sink, "PNG")
+    assert sink.files == {}
+    assert not pipeline_threads()
+
+
+@pytest.mark.parametrize("export", ["export_as_images_zip", "export_as_images_tar"])
+def test_empty_selection_creates_no_archive(tmp_path, export):
+    service = PDFService(text_pdf(tmp_path / "doc.pdf", pages=2))
+    output = tmp_path / "salida"
+    assert not getattr(service, export)(page_manager([]), str(output))
+    assert not output.exists()
@@ -0,0 +1,104 @@
+import zipfile
+from collections import Counter
+
+import pytest
+from pypdf import PdfReader
+
+from services.export_plan import ExportTarget
+from services.pdf_service import PDFService
+from tests.conftest import page_manager, text_pdf
+
+
+def test_target_keys():
+    zip_png = ExportTarget("images_zip", "a.zip", "png")
+    assert zip_png.image_format == "PNG" and zip_png.rendered
+    assert zip_png.encoding_key == ExportTarget("images_folder", "a").encoding_key == ("PNG", "balanced", "color")
+    assert ExportTarget("images_tiff", "a.tiff", color_mode="bitonal").encoding_key == ("TIFF", "balanced",
+                                                                                         "bitonal")
+    assert ExportTarget("images_zip", "a.zip", color_mode="bitonal").render_mode == "gray"
+    assert not ExportTarget("pdf_combined", "a.pdf").rendered
+    with pytest.raises(ValueError):
+        ExportTarget("images_zip", "a.zip", color_mode="sepia")
+
+
+@pytest.fixture
+def service(tmp_path) -> PDFService:
+    return PDFService(text_pdf(tmp_path / "doc.pdf", pages=3))
+
+
+def counting(service, monkeypatch) -> Counter:
+    """Contar los render por (página, modo) y las codificaciones por formato"""
+    calls = Counter()
+    render_page, encode_page = service.render_page, service._encode_page
+
+    def render(page_num, *args, color_mode="color", **kwargs):
+        calls[page_num, color_mode] += 1
+        return render_page(page_num, *args, color_mode=color_mode, **kwargs)
+
+    def encode(img, image_format, *args, **kwargs):
+        calls[image_format] += 1
+        return encode_page(img, image_format, *args, **kwargs)
+    monkeypatch.setattr(service, "render_page", render)
+    monkeypatch.setattr(service, "_encode_page", encode)
+    return calls
+
+
+def read_zip(path) -> dict:
+    with zipfile.ZipFile(path) as zf:
+        return {name: zf.read(name) for name in zf.namelist()}
+
+
+def test_one_render_per_page_and_mode(service, tmp_path, monkeypatch):
+    calls = counting(service, monkeypatch)
+    targets = [ExportTarget("images_zip", str(tmp_path / "a.zip")),
+               ExportTarget("images_folder", str(tmp_path / "carpeta")),
+               ExportTarget("images_tiff", str(tmp_path / "a.tiff"), color_mode="bitonal"),
+               ExportTarget("images_pdf", str(tmp_path / "a_imagenes.pdf"), color_mode="gray"),
+               ExportTarget("pdf_combined", str(tmp_path / "combinado.pdf"))]
+    results = service.export_plan(page_manager([1, 2, 3], {2: 90}), targets)
+    assert all(results.values()) and len(results) == 5
+    # Color para PNG; una única imagen en grises para el TIFF de 1 bit y el PDF de imágenes
+    assert calls == Counter({**{(page, mode): 1 for page in (1, 2, 3) for mode in ("color", "gray")},
+                             "PNG": 3, "TIFF": 3, "PDF": 3})
+    assert set(service.last_plan_report) == {t.output_path for t in targets[:4]}
+
+
+def test_outputs_match_single_exports(tmp_path):
+    pdf = text_pdf(tmp_path / "doc.pdf", pages=3)
+    manager = page_manager([1, 3], {3: 180})
+    plan = tmp_path / "plan"
+    assert all(PDFService(pdf).export_plan(manager, [
+        ExportTarget("images_zip", str(plan / "a.zip"), "JPEG", "fast"),
+        ExportTarget("images_folder", str(plan / "carpeta"), "JPEG", "fast"),
+        ExportTarget("pdf_combined", str(plan / "combinado.pdf")),
+        ExportTarget("text_txt", str(plan / "texto.txt")),
+    ]).values())
+
+    single = PDFService(pdf)
+    assert single.export_as_images_zip(manager, str(tmp_path / "a.zip"), "JPEG", encoding_profile="fast")
+    assert single.export_text(manager, str(tmp_path / "texto.txt"))
+    assert read_zip(plan / "a.zip") == read_zip(tmp_path / "a.zip")
+    assert {path.name: path.read_bytes() for path in (plan / "carpeta").iterdir()} == read_zip(tmp_path / "a.zip")
+    assert (plan / "texto.txt").read_text(encoding="utf-8") == (tmp_path / "texto.txt").read_text(encoding="utf-8")
+    combined = PdfReader(plan / "combinado.pdf")
+    assert [page.rotation for page in combined.pages] == [0, 180]
+
+
+def test_failed_shared_pass_publishes_nothing(service, tmp_path, monkeypatch):
+    render_page = service.render_page
+    monkeypatch.setattr(service, "render_page",
+                        lambda page_num, *args, **kwargs: None if page_num == 2 else render_page(page_num, *args,
+                                                                                               **kwargs))
+    tiff, archive, text = tmp_path / "a.tiff", tmp_path / "a.zip", tmp_path / "texto.txt"
+    results = service.export_plan(page_manager([1, 2, 3]), [
+        ExportTarget("images_tiff", str(tiff)), ExportTarget("images_zip", str(archive)),
+        ExportTarget("text_txt", str(text))])
+    assert results == {str(tiff): False, str(archive): False, str(text): True}
+    assert not tiff.exists() and not archive.exists()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["doc.pdf", "texto.txt"]
+
+
+def test_empty_selection(service, tmp_path):
+    results = service.export_plan(page_manager([]), [ExportTarget("images_zip", str(tmp_path / "a.zip")),
+                                                     ExportTarget("pdf_individual", str(tmp_path / "pdfs"))])
+    assert results == {str(tmp_path / "a.zip"): False, str(tmp_path / "pdfs"): False}
@@ -0,0 +1,79 @@
+import json
+import os
+import time
+
+import pytest
+
+from services.folder_watcher import FolderWatcher, ProcessedManifest, WatchConfig
+from services.pdf_service import PDFService
+from tests.conftest import text_pdf
+
+
+@pytest.fixture
+def folders(tmp_path):
+    input_dir, output_dir = tmp_path / "entrada", tmp_path / "salida"
+    input_dir.mkdir()
+    return input_dir, output_dir
+
+
+def manifest(output_dir):
+    return json.loads((output_dir / ".procesados.json").read_text(encoding="utf-8"))
+
+
+def test_once_processes_existing_files(folders):
+    input_dir, output_dir = folders
+    text_pdf(input_dir / "a.pdf", pages=3)
+    text_pdf(input_dir / "b.pdf", pages=2)
+    (input_dir / "roto.pdf").write_text("no soy un PDF")
+    (input_dir / "notas.txt").write_text("ignorado")
+
+    FolderWatcher(WatchConfig(str(input_dir), str(output_dir), pages="2-5", poll_interval=0.01)).run(once=True)
+
+    assert PDFService(str(output_dir / "a.pdf")).get_total_pages() == 2
+    assert PDFService(str(output_dir / "b.pdf")).get_total_pages() == 1
+    entries = manifest(output_dir)
+    assert sorted(entries) == ["a.pdf", "b.pdf", "roto.pdf"]
+    assert entries["a.pdf"]["status"] == "completado"
+    assert entries["roto.pdf"]["status"] == "error"
+
+
+def test_processed_files_are_skipped_until_they_change(folders):
+    input_dir, output_dir = folders
+    source = text_pdf(input_dir / "a.pdf")
+    config = WatchConfig(str(input_dir), str(output_dir), poll_interval=0.01)
+    FolderWatcher(config).run(once=True)
+    first = manifest(output_dir)["a.pdf"]
+
+    watcher = FolderWatcher(config)
+    assert watcher.scan_once(ignore_settle=True) == 0
+
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    FolderWatcher(config).run(once=True)
+    assert manifest(output_dir)["a.pdf"]["key"] != first["key"]
+
+
+def test_files_wait_until_they_settle(folders):
+    input_dir, output_dir = folders
+    text_pdf(input_dir / "a.pdf")
+    watcher = FolderWatcher(WatchConfig(str(input_dir), str(output_dir), settle_time=0.2))
+    try:
+        assert watcher.scan_once() == 0  # Recién visto
+        assert watcher.scan_once() == 0  # Aún no lleva settle_time sin cambios
+        time.sleep(0.25)
+        assert watcher.scan_once() == 1
+    finally:
+        watcher._executor.shutdown(wait=True)
+    assert manifest(output_dir)["a.pdf"]["status"] == "completado"
+
+
+def test_invalid_page_expression_fails_at_start(folders):
+    input_dir, output_dir = folders
+    with pytest.raises(ValueError):
+        FolderWatcher(WatchConfig(str(input_dir), str(output_dir), pages="3-1"))
+
+
+def test_unreadable_manifest_starts_empty(tmp_path):
+    path = tmp_path / "procesados.json"
+    path.write_text("{roto")
+    assert not ProcessedManifest(str(path)).is_processed("a.pdf", os.stat(path))
@@ -0,0 +1,114 @@
+import json
+import threading
+import time
+import zipfile
+from http.client import HTTPConnection
+
+import pytest
+
+from services.http_service import DocumentCache, ExtractionHTTPServer, Job, JobQueue, parse_rotations
+from services.pdf_service import PDFService
+from tests.conftest import text_pdf
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = ExtractionHTTPServer(("127.0.0.1", 0), work_dir=str(tmp_path / "trabajo"), max_documents=1)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, path, body=None):
+    connection = HTTPConnection(*server.server_address, timeout=30)
+    connection.request(method, path, json.dumps(body) if body is not None else None,
+                       {"Content-Type": "application/json"})
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    content_type = response.getheader("Content-Type", "")
+    return response.status, json.loads(data) if content_type.startswith("application/json") else data
+
+
+def wait_job(server, job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status, job = request(server, "GET", f"/jobs/{job_id}")
+        if job["status"] in ("completado", "error"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError("El trabajo no terminó a tiempo")
+
+
+def test_parse_rotations():
+    assert parse_rotations({"1": 90, "3": "-180"}) == {1: 90, 3: -180}
+    for value in ([90], {"a": 90}, {"1": 45}, {"1": None}):
+        with pytest.raises(ValueError):
+            parse_rotations(value)
+
+
+def test_open_document_errors(server, tmp_path):
+    not_pdf = tmp_path / "notas.pdf"
+    not_pdf.write_text("no soy un PDF")
+    empty = tmp_path / "vacio.pdf"
+    empty.write_bytes(b"")
+    assert request(server, "POST", "/documents", {"path": str(not_pdf)})[0] == 400
+    assert request(server, "POST", "/documents", {"path": str(empty)})[0] == 400
+    assert request(server, "POST", "/documents", {"path": str(tmp_path / "no_existe.pdf")})[0] == 404
+    assert request(server, "POST", "/documents", {})[0] == 400
+
+
+def test_export_job_roundtrip(server, tmp_path):
+    status, doc = request(server, "POST", "/documents", {"path": text_pdf(tmp_path / "a.pdf", pages=4)})
+    assert status == 201 and doc["total_pages"] == 4
+    status, job = request(server, "POST", "/jobs", {
+        "document_id": doc["document_id"], "pages": "2-3", "format": "images_zip", "color": "gray",
+        "rotations": {"2": 90}})
+    assert status == 202
+    assert wait_job(server, job["job_id"])["status"] == "completado"
+    status, data = request(server, "GET", f"/jobs/{job['job_id']}/result")
+    assert status == 200
+    result = tmp_path / "resultado.zip"
+    result.write_bytes(data)
+    assert len(zipfile.ZipFile(result).namelist()) == 2
+    assert request(server, "DELETE", f"/jobs/{job['job_id']}")[0] == 200
+    assert request(server, "GET", f"/jobs/{job['job_id']}")[0] == 404
+
+
+def test_invalid_job_requests(server, tmp_path):
+    _, doc = request(server, "POST", "/documents", {"path": text_pdf(tmp_path / "a.pdf")})
+    for body in ({"format": "desconocido"}, {"rotations": [90]}, {"rotations": {"1": 45}},
+                 {"pages": "9-12"}, {"color": "sepia"}, {"split": "foo:2"}):
+        assert request(server, "POST", "/jobs", {"document_id": doc["document_id"], **body})[0] == 400
+    assert request(server, "POST", "/jobs", {"document_id": "nada"})[0] == 404
+
+
+def test_job_survives_document_eviction(tmp_path):
+    # La caché está vacía: el trabajo solo tiene su propia referencia al documento
+    queue = JobQueue(DocumentCache(max_documents=1), str(tmp_path / "trabajo"), workers=1)
+    service = PDFService(text_pdf(tmp_path / "a.pdf"))
+    job = Job(job_id="j1", document_id="expulsado", operation="extract", pages=[1, 2], service=service)
+    assert queue.submit(job)
+    queue.shutdown()
+    assert job.status == "completado", job.error
+    assert job.service is None
+    assert PDFService(job.result_path).get_total_pages() == 2
+
+
+def test_expire_finished_jobs(tmp_path):
+    queue = JobQueue(DocumentCache(), str(tmp_path / "trabajo"), workers=1, finished_ttl=60, max_finished=2)
+    queue.shutdown()
+    now = time.time()
+    for job_id, age in (("viejo", 120), ("a", 30), ("b", 20), ("c", 10)):
+        job = Job(job_id=job_id, document_id="d", operation="extract", pages=[1], status="completado",
+                  finished_at=now - age)
+        (queue.work_dir / job_id).mkdir()
+        queue._jobs[job_id] = job
+    queue._jobs["en_curso"] = Job(job_id="en_curso", document_id="d", operation="extract", pages=[1])
+
+    assert queue.expire() == 2
+    assert sorted(queue._jobs) == ["b", "c", "en_curso"]
+    assert not (queue.work_dir / "viejo").exists() and not (queue.work_dir / "a").exists()
+    assert (queue.work_dir / "b").exists()
@@ -0,0 +1,52 @@
+import io
+import json
+import logging
+
+import pytest
+
+from services.log import ROOT_LOGGER, configure_logging, get_logger, job_logger
+
+
+@pytest.fixture
+def restore_root_logger():
+    root = logging.getLogger(ROOT_LOGGER)
+    state = root.handlers[:], root.level, root.propagate
+    yield
+    root.handlers[:], root.level, root.propagate = state
+
+
+def test_json_lines_with_context(restore_root_logger):
+    stream = io.StringIO()
+    configure_logging("INFO", json_format=True, stream=stream)
+    log = job_logger(get_logger("prueba"), doc="a.pdf", op="export")
+    log.info("Exportación completada", extra={"pages": 3})
+    log.debug("No se emite")
+
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1
+    event = json.loads(lines[0])
+    assert event["level"] == "INFO"
+    assert event["logger"] == f"{ROOT_LOGGER}.prueba"
+    assert event["msg"] == "Exportación completada"
+    assert (event["doc"], event["op"], event["pages"]) == ("a.pdf", "export", 3)
+
+
+def test_text_format_and_level(restore_root_logger):
+    stream = io.StringIO()
+    configure_logging("WARNING", json_format=False, stream=stream)
+    logger = get_logger("prueba")
+    logger.info("oculto")
+    logger.warning("Manifiesto ilegible", extra={"context": {"manifest": "x.json"}})
+    output = stream.getvalue()
+    assert "oculto" not in output
+    assert "WARNING pdf_extractor.prueba: Manifiesto ilegible [manifest=x.json]" in output
+
+
+def test_environment_defaults(restore_root_logger, monkeypatch):
+    monkeypatch.setenv("PDF_EXTRACTOR_LOG_LEVEL", "ERROR")
+    monkeypatch.setenv("PDF_EXTRACTOR_LOG_JSON", "1")
+    stream = io.StringIO()
+    root = configure_logging(stream=stream)
+    assert root.level == logging.ERROR
+    get_logger("prueba").error("fallo")
+    assert json.loads(stream.getvalue())["msg"] == "fallo"
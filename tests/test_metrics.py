@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from services.metrics import Histogram, MetricsRegistry
+
+
+def test_histogram_buckets():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    data = histogram.to_dict()
+    assert data["buckets"] == {"0.1": 2, "1.0": 1, "+Inf": 1}
+    assert data["count"] == 4
+    assert data["min_s"] == 0.05 and data["max_s"] == 3.0
+    assert data["mean_s"] == pytest.approx(3.65 / 4)
+
+
+def test_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    with registry.span("render"):
+        pass
+    assert registry.snapshot() == {}
+
+
+def test_spans_and_exports(tmp_path):
+    registry = MetricsRegistry(enabled=True)
+    for _ in range(3):
+        with registry.span("render"):
+            pass
+    registry.observe("encode", 2.0)
+    snapshot = registry.snapshot()
+    assert snapshot["render"]["count"] == 3
+    assert snapshot["encode"]["buckets"]["2.5"] == 1
+
+    prometheus = registry.to_prometheus()
+    assert 'pdf_extractor_stage_seconds_bucket{stage="encode",le="1.0"} 0' in prometheus
+    assert 'pdf_extractor_stage_seconds_bucket{stage="encode",le="+Inf"} 1' in prometheus
+    assert 'pdf_extractor_stage_seconds_count{stage="render"} 3' in prometheus
+
+    registry.dump(str(tmp_path))
+    assert json.loads((tmp_path / "metrics.json").read_text())["stages"]["render"]["count"] == 3
+    assert (tmp_path / "metrics.prom").read_text() == prometheus
+
+    registry.reset()
+    assert registry.snapshot() == {}
+
+
+def test_span_records_even_on_error():
+    registry = MetricsRegistry(enabled=True)
+    with pytest.raises(RuntimeError):
+        with registry.span("fallo"):
+            raise RuntimeError
+    assert registry.snapshot()["fallo"]["count"] == 1
+
+
+def test_service_stages_are_recorded(monkeypatch, text_doc):
+    from services.metrics import metrics
+    from services.pdf_service import PDFService
+
+    monkeypatch.setattr(metrics, "enabled", True)
+    metrics.reset()
+    try:
+        PDFService(text_doc).render_page(1, for_export=True)
+        stages = metrics.snapshot()
+    finally:
+        metrics.reset()
+    assert stages["render.rasterize"]["count"] == 1
+    assert stages["render.to_pil"]["count"] == 1
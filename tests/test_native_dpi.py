@@ -0,0 +1,74 @@
+import io
+
+import fitz  # PyMuPDF
+import pytest
+from PIL import Image
+
+from services.page_images import dominant_image_dpi
+from services.pdf_service import PDFService
+from services.resolution_policy import ExportResolutionPolicy
+from tests.conftest import page_manager, scan_jpeg
+
+SCAN_150 = scan_jpeg(dpi=150)
+
+
+def scanned(page):
+    page.insert_image(page.rect, stream=SCAN_150)
+
+
+def first_page(path) -> fitz.Page:
+    return fitz.open(path)[0]
+
+
+@pytest.mark.parametrize("dpi", [100, 150, 300])
+def test_full_page_scan_reports_its_resolution(make_pdf, dpi):
+    page = first_page(make_pdf(lambda page: page.insert_image(page.rect, stream=scan_jpeg(dpi=dpi))))
+    assert dominant_image_dpi(page) == pytest.approx(dpi, rel=0.01)
+
+
+def test_rotated_placement_keeps_resolution(make_pdf):
+    # Escaneo apaisado colocado girado sobre la página vertical
+    buffer = io.BytesIO()
+    Image.open(io.BytesIO(SCAN_150)).transpose(Image.Transpose.ROTATE_90).save(buffer, "JPEG")
+    page = first_page(make_pdf(lambda page: page.insert_image(page.rect, stream=buffer.getvalue(), rotate=90)))
+    assert dominant_image_dpi(page) == pytest.approx(150, rel=0.01)
+
+
+@pytest.mark.parametrize("build", [
+    lambda page: page.insert_image(fitz.Rect(0, 0, 300, 400), stream=SCAN_150),
+    lambda page: (scanned(page), page.insert_text((72, 800), "Texto real")),
+    lambda page: page.insert_text((72, 72), "Solo texto"),
+], ids=["pequena", "con_texto", "sin_imagen"])
+def test_pages_without_native_resolution(make_pdf, build):
+    assert dominant_image_dpi(first_page(make_pdf(build))) is None
+
+
+def test_largest_image_dominates(make_pdf):
+    def build(page):
+        page.insert_image(fitz.Rect(0, 0, 595, 600), stream=SCAN_150)
+        page.insert_image(fitz.Rect(0, 600, 200, 842), stream=scan_jpeg(dpi=300))
+    assert dominant_image_dpi(first_page(make_pdf(build))) == pytest.approx(150 * 842 / 600, rel=0.01)
+
+
+def test_export_renders_scans_at_native_dpi(make_pdf, tmp_path):
+    service = PDFService(make_pdf(scanned, lambda page: page.insert_text((72, 72), "hola")))
+    assert service.page_target_dpi(1) == pytest.approx(150, rel=0.01)
+    assert service.page_target_dpi(2) == 300
+
+    img = service.render_page(1, for_export=True)
+    assert img.width == pytest.approx(8.27 * 150, abs=2)
+    assert img.info["dpi"][0] == pytest.approx(150, rel=0.01)
+
+    assert service.export_as_images_zip(page_manager([1, 2]), str(tmp_path / "a.zip"), "JPEG")
+    assert service.last_export_report[1] == pytest.approx(150, rel=0.01)
+    assert service.last_export_report[2] == 300
+
+
+@pytest.mark.parametrize("policy, expected", [
+    (ExportResolutionPolicy(match_native=False), 300),
+    (ExportResolutionPolicy(native_min_dpi=200), 200),
+    (ExportResolutionPolicy(native_max_dpi=120), 120),
+], ids=["fijo", "minimo", "maximo"])
+def test_policy_bounds_native_dpi(make_pdf, policy, expected):
+    service = PDFService(make_pdf(scanned), resolution_policy=policy)
+    assert service.page_target_dpi(1) == pytest.approx(expected, rel=0.01)
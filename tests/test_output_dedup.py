@@ -0,0 +1,113 @@
+import json
+import tarfile
+import zipfile
+
+import fitz  # PyMuPDF
+import pytest
+
+from services.output_dedup import OutputDeduplicator, page_render_key
+from services.pdf_service import PDFService
+from tests.conftest import A4, page_manager
+
+
+def cover(page):
+    page.insert_text((72, 100), "Formulario de alta", fontsize=20)
+
+
+def body(page):
+    page.insert_text((72, 100), "Datos del solicitante", fontsize=12)
+
+
+def blank(page):
+    pass
+
+
+def white_box(page):
+    # Contenido distinto que se ve igual que una página en blanco
+    page.draw_rect(fitz.Rect(100, 100, 200, 200), color=(1, 1, 1), fill=(1, 1, 1))
+
+
+def merged(*builders) -> fitz.Document:
+    """Páginas de documentos distintos: cada una con sus propios objetos de fuente"""
+    doc = fitz.open()
+    for build in builders:
+        part = fitz.open()
+        build(part.new_page(width=A4[0], height=A4[1]))
+        doc.insert_pdf(part)
+    return doc
+
+
+def test_render_key_ignores_object_numbers():
+    doc = merged(cover, body, cover)
+    assert doc[0].get_fonts()[0][0] != doc[2].get_fonts()[0][0]
+    cache = {}
+    keys = [page_render_key(page, cache=cache) for page in doc]
+    assert keys[0] == keys[2] != keys[1]
+
+
+def test_render_key_depends_on_rotation_and_size():
+    doc = merged(cover, cover)
+    key = page_render_key(doc[0])
+    assert page_render_key(doc[0], rotation=90) != key
+    doc[1].set_mediabox(fitz.Rect(0, 0, 400, 400))
+    assert page_render_key(doc[1]) != key
+
+
+def test_deduplicator_registers_originals_and_duplicates():
+    dedup = OutputDeduplicator()
+    dedup.add("a_pagina_001.png", b"imagen", "clave")
+    assert dedup.original_for_render("clave") == "a_pagina_001.png"
+    assert dedup.original_for_data(b"imagen") == "a_pagina_001.png"
+    assert dedup.original_for_data(b"otra") is None
+    assert dedup.size("a_pagina_001.png") == 6
+    assert dedup.add_duplicate("a_pagina_007", "a_pagina_001.png", "otra_clave") == "a_pagina_007.png"
+    assert dedup.original_for_render("otra_clave") == "a_pagina_001.png"
+    assert dedup.manifest() == {"duplicates": {"a_pagina_007.png": "a_pagina_001.png"}}
+
+
+@pytest.fixture
+def form_pdf(tmp_path) -> str:
+    path = tmp_path / "form.pdf"
+    merged(cover, body, cover, blank, white_box, body).save(str(path))
+    return str(path)
+
+
+def test_zip_stores_duplicates_once_with_manifest(form_pdf, tmp_path):
+    service = PDFService(form_pdf)
+    output = tmp_path / "imagenes.zip"
+    assert service.export_as_images_zip(page_manager(range(1, 7)), str(output), deduplicate=True)
+    with zipfile.ZipFile(output) as zf:
+        names = zf.namelist()
+        manifest = json.loads(zf.read("form_duplicadas.json"))
+    assert sorted(names) == ["form_duplicadas.json", "form_pagina_001.png", "form_pagina_002.png",
+                             "form_pagina_004.png"]
+    assert manifest == {"duplicates": {"form_pagina_003.png": "form_pagina_001.png",
+                                       "form_pagina_005.png": "form_pagina_004.png",
+                                       "form_pagina_006.png": "form_pagina_002.png"}}
+    report = service.last_encoding_report
+    # La página 5 solo se reconoce por el hash de su imagen, después de codificarla
+    assert (report["pages"], report["duplicate_pages"]) == (4, 3)
+
+
+def test_without_deduplicate_every_page_is_stored(form_pdf, tmp_path):
+    output = tmp_path / "imagenes.zip"
+    assert PDFService(form_pdf).export_as_images_zip(page_manager(range(1, 7)), str(output))
+    with zipfile.ZipFile(output) as zf:
+        assert len(zf.namelist()) == 6
+
+
+def test_folder_uses_hard_links(form_pdf, tmp_path):
+    folder = tmp_path / "salida"
+    assert PDFService(form_pdf).export_as_images_folder(page_manager([1, 2, 3]), str(folder), deduplicate=True)
+    assert sorted(path.name for path in folder.iterdir()) == [
+        "form_pagina_001.png", "form_pagina_002.png", "form_pagina_003.png"]
+    assert (folder / "form_pagina_003.png").samefile(folder / "form_pagina_001.png")
+
+
+def test_tar_stores_duplicates_as_links(form_pdf, tmp_path):
+    output = tmp_path / "imagenes.tar"
+    assert PDFService(form_pdf).export_as_images_tar(page_manager([1, 2, 3]), str(output), deduplicate=True)
+    with tarfile.open(output) as tf:
+        member = tf.getmember("form_pagina_003.png")
+        assert member.islnk() and member.linkname == "form_pagina_001.png"
+        assert tf.extractfile(member).read() == tf.extractfile("form_pagina_001.png").read()
@@ -0,0 +1,78 @@
+import pytest
+
+from services.page_analysis import BlankPageDetector
+from services.pdf_service import PDFService
+from tests.conftest import LINE, scan_jpeg
+
+
+def one_line(page):
+    page.insert_text((72, 100), LINE, fontsize=10)
+
+
+def page_number(page):
+    page.insert_text((290, 800), "12", fontsize=10)
+
+
+def five_short_lines(page):
+    for i in range(5):
+        page.insert_text((72, 100 + 14 * i), f"línea {i}", fontsize=10)
+
+
+def scanned(text=None, **kwargs):
+    def build(page):
+        page.insert_image(page.rect, stream=scan_jpeg(text, **kwargs))
+    return build
+
+
+def ocr_layer(page):
+    scanned()(page)
+    # render_mode=3: texto invisible, como la capa de un OCR
+    page.insert_text((72, 100), "ruido del ocr", fontsize=10, render_mode=3)
+
+
+@pytest.mark.parametrize("build, blank", [
+    (None, True),
+    (one_line, False),
+    (page_number, False),
+    (five_short_lines, False),
+    (scanned(), True),
+    (scanned(LINE), False),
+    (scanned("Hola mundo", font_size=23), False),
+    (ocr_layer, True),
+    (lambda page: page.draw_line((72, 400), (520, 400)), False),
+])
+def test_blank_page_classification(make_pdf, build, blank):
+    service = PDFService(make_pdf(build))
+    assert service.find_blank_pages() == ([1] if blank else [])
+
+
+def test_blank_pages_among_content(make_pdf):
+    service = PDFService(make_pdf(one_line, None, scanned(), page_number, scanned(LINE)))
+    assert service.find_blank_pages() == [2, 3]
+    assert service.find_blank_pages([1, 2, 4]) == [2]
+
+
+def test_threshold_controls_scanned_marks(make_pdf):
+    service = PDFService(make_pdf(scanned("Hola mundo", font_size=23)))
+    assert service.find_blank_pages(detector=BlankPageDetector(ink_threshold=0.01)) == [1]
+
+
+def test_delete_pages_in_bulk():
+    from tests.conftest import page_manager
+
+    manager = page_manager([1, 2, 3, 4])
+    assert manager.delete_pages([2, 4, 9]) == 2
+    assert manager.delete_pages([2]) == 0
+    assert manager.selected_pages == [1, 3]
+    assert [p.page_number for p in manager.get_active_pages()] == [1, 3]
+
+
+def test_watch_removes_blank_pages_before_export(make_pdf, tmp_path):
+    from services.folder_watcher import FolderWatcher, WatchConfig
+
+    input_dir = tmp_path / "entrada"
+    input_dir.mkdir()
+    (input_dir / "a.pdf").write_bytes(open(make_pdf(one_line, None, scanned(), page_number), "rb").read())
+    config = WatchConfig(str(input_dir), str(tmp_path / "salida"), remove_blank=True, poll_interval=0.01)
+    FolderWatcher(config).run(once=True)
+    assert PDFService(str(tmp_path / "salida" / "a.pdf")).get_total_pages() == 2
@@ -0,0 +1,57 @@
+import pytest
+
+from services.page_parser import PageParser
+
+
+class FakeIndex:
+    """Índice de texto con resultados fijos por consulta"""
+
+    def __init__(self, results):
+        self.results = results
+        self.queries = []
+
+    def search(self, query):
+        self.queries.append(query)
+        return self.results.get(query, [])
+
+
+@pytest.mark.parametrize("expression, pages", [
+    ("1", [1]),
+    ("1,3,5-7", [1, 3, 5, 6, 7]),
+    (" 2 , 4-5 ,", [2, 4, 5]),
+    ("3-3", [3]),
+    ("5-6,1,6", [1, 5, 6]),
+])
+def test_numbers_and_ranges(expression, pages):
+    assert PageParser.parse(expression) == pages
+
+
+@pytest.mark.parametrize("expression", ["4-2", "a", "1-", "1;2"])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        PageParser.parse(expression)
+
+
+@pytest.mark.parametrize("expression", ['1,"a, b"', '1, "a, b"', '1,  "a, b" ', '"a, b", 1'])
+def test_quoted_terms_keep_commas_and_spaces(expression):
+    index = FakeIndex({"a, b": [4, 2]})
+    assert PageParser.parse(expression, index) == [1, 2, 4]
+    assert index.queries == ["a, b"]
+
+
+def test_several_quoted_terms():
+    index = FakeIndex({"factura 4471": [3], "anexo": [9]})
+    assert PageParser.parse('"factura 4471", "anexo", 1-2', index) == [1, 2, 3, 9]
+
+
+@pytest.mark.parametrize("expression", ['1, "a, b', '"', '2,"'])
+def test_unterminated_quote(expression):
+    with pytest.raises(ValueError, match="Comillas sin cerrar"):
+        PageParser.parse(expression, FakeIndex({}))
+
+
+def test_quoted_term_requires_index():
+    assert PageParser.needs_index('1, "a"')
+    assert not PageParser.needs_index("1-3")
+    with pytest.raises(ValueError):
+        PageParser.parse('"a"')
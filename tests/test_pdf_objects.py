@@ -0,0 +1,38 @@
+import fitz  # PyMuPDF
+
+from services.output_dedup import page_render_key
+from services.pdf_objects import child_references, object_source, replace_references, without_back_references
+
+
+def test_child_references_skip_parents():
+    source = b"<</Type/Page/Parent 2 0 R/Contents 7 0 R/Resources<</Font<</F1 9 0 R>>>>>>"
+    assert child_references(source) == [7, 9]
+    assert without_back_references(b"<</P 3 0 R/A 4 0 R>>") == b"<</A 4 0 R>>"
+
+
+def test_replace_references():
+    assert replace_references(b"[1 0 R 22 0 R]", lambda xref: b"<%d>" % xref) == b"[<1> <22>]"
+
+
+def test_object_source_lists_page_children(make_pdf):
+    doc = fitz.open(make_pdf(lambda page: page.insert_text((72, 72), "hola")))
+    page = doc[0]
+    children = child_references(object_source(doc, page.xref))
+    assert page.get_contents()[0] in children
+    assert doc.pdf_catalog() not in children
+
+
+def test_render_key_ignores_copied_resources(make_pdf):
+    write = lambda page: page.insert_text((72, 72), "misma página")
+    doc = fitz.open(make_pdf(write, write, lambda page: page.insert_text((72, 72), "otra")))
+    # La segunda página usa copias de sus recursos y de la fuente: otros objetos, mismo contenido
+    font = doc[1].get_fonts()[0][0]
+    resources = int(doc.xref_get_key(doc[1].xref, "Resources")[1].split()[0])
+    font_copy, resources_copy = doc.get_new_xref(), doc.get_new_xref()
+    doc.update_object(font_copy, doc.xref_object(font))
+    doc.update_object(resources_copy, doc.xref_object(resources).replace(f"{font} 0 R", f"{font_copy} 0 R"))
+    doc.xref_set_key(doc[1].xref, "Resources", f"{resources_copy} 0 R")
+    assert doc[1].get_fonts()[0][0] == font_copy != doc[0].get_fonts()[0][0]
+    keys = [page_render_key(page) for page in doc]
+    assert keys[0] == keys[1] != keys[2]
+    assert page_render_key(doc[0], rotation=90) != keys[0]
@@ -0,0 +1,113 @@
+import os
+
+import fitz  # PyMuPDF
+import numpy as np
+import pytest
+from pypdf import PdfReader
+
+from services.pdf_service import PDFService
+from services.pdf_split import SplitRule, safe_title, split_chunks
+from tests.conftest import A4, page_manager, text_pdf
+
+
+@pytest.mark.parametrize("text, rule", [
+    ("pages:10", SplitRule("pages", 10)),
+    (" bookmarks ", SplitRule("bookmarks", 1)),
+    ("size:2.5", SplitRule("size", 2.5)),
+])
+def test_parse_rule(text, rule):
+    assert SplitRule.parse(text) == rule
+    assert SplitRule.parse(str(rule)) == rule
+
+
+@pytest.mark.parametrize("text", ["chapters:1", "pages:0", "pages:1.5", "bookmarks:-1", "size:mucho"])
+def test_invalid_rules(text):
+    with pytest.raises(ValueError):
+        SplitRule.parse(text)
+
+
+def test_safe_title():
+    assert safe_title("  Capítulo 1: Introducción / parte A ") == "Capítulo_1_Introducción_parte_A"
+    assert safe_title("???") == ""
+    assert len(safe_title("x" * 100)) == 60
+
+
+def test_every_n_pages(text_doc):
+    doc = fitz.open(text_doc)
+    assert list(split_chunks(doc, [1, 2, 3], SplitRule("pages", 2))) == [(None, [1, 2]), (None, [3])]
+
+
+@pytest.fixture
+def book(tmp_path) -> str:
+    path = text_pdf(tmp_path / "libro.pdf", pages=8)
+    doc = fitz.open(path)
+    doc.set_toc([[1, "Parte I", 2], [2, "Sección 1.1", 3], [1, "Parte II", 5], [2, "Sección 2.1", 7]])
+    doc.saveIncr()
+    return path
+
+
+@pytest.mark.parametrize("level, expected", [
+    (1, [(None, [1]), ("Parte I", [2, 3, 4]), ("Parte II", [5, 6, 7, 8])]),
+    (2, [(None, [1]), ("Parte I", [2]), ("Sección 1.1", [3, 4]), ("Parte II", [5, 6]), ("Sección 2.1", [7, 8])]),
+])
+def test_by_bookmark_level(book, level, expected):
+    assert list(split_chunks(fitz.open(book), list(range(1, 9)), SplitRule("bookmarks", level))) == expected
+
+
+def test_bookmarks_follow_the_selection(book):
+    chunks = split_chunks(fitz.open(book), [1, 4, 6, 7], SplitRule("bookmarks", 1))
+    assert list(chunks) == [(None, [1]), ("Parte I", [4]), ("Parte II", [6, 7])]
+
+
+def noise_png(seed: int) -> bytes:
+    """Imagen incompresible de unos 190 KB"""
+    pixels = np.random.default_rng(seed).integers(0, 256, (256, 256, 3), dtype=np.uint8)
+    return fitz.Pixmap(fitz.csRGB, 256, 256, pixels.tobytes(), False).tobytes("png")
+
+
+def photo_pdf(path, pages: int, shared: bool) -> str:
+    doc = fitz.open()
+    xref = 0
+    for i in range(pages):
+        page = doc.new_page(width=A4[0], height=A4[1])
+        xref = page.insert_image(fitz.Rect(72, 72, 400, 400), stream=noise_png(0 if shared else i),
+                                 xref=xref if shared else 0)
+    doc.save(str(path))
+    return str(path)
+
+
+def test_by_size_counts_shared_objects_once(tmp_path):
+    rule = SplitRule("size", 0.5)
+    shared = fitz.open(photo_pdf(tmp_path / "compartida.pdf", 6, shared=True))
+    assert [pages for _, pages in split_chunks(shared, list(range(1, 7)), rule)] == [[1, 2, 3, 4, 5, 6]]
+    distinct = fitz.open(photo_pdf(tmp_path / "distintas.pdf", 6, shared=False))
+    assert [pages for _, pages in split_chunks(distinct, list(range(1, 7)), rule)] == [[1, 2], [3, 4], [5, 6]]
+
+
+def test_oversized_page_goes_alone(tmp_path):
+    doc = fitz.open(photo_pdf(tmp_path / "fotos.pdf", 3, shared=False))
+    assert [pages for _, pages in split_chunks(doc, [1, 2, 3], SplitRule("size", 0.1))] == [[1], [2], [3]]
+
+
+def test_export_split_by_bookmarks(book, tmp_path):
+    service = PDFService(book)
+    folder = tmp_path / "partes"
+    assert service.export_split_pdfs(page_manager(range(1, 9), {5: 90}), str(folder), SplitRule("bookmarks", 1))
+    names = ["libro_parte_001.pdf", "libro_parte_002_Parte_I.pdf", "libro_parte_003_Parte_II.pdf"]
+    assert sorted(os.listdir(folder)) == names
+    readers = [PdfReader(folder / name) for name in names]
+    assert [len(reader.pages) for reader in readers] == [1, 3, 4]
+    assert "pagina5" in readers[2].pages[0].extract_text()
+    assert readers[2].pages[0].rotation == 90
+    assert service.last_split_report == {"rule": "bookmarks:1", "files": [
+        {"name": name, "pages": pages} for name, pages in zip(names, [[1], [2, 3, 4], [5, 6, 7, 8]])]}
+
+
+def test_export_split_by_size_stays_under_the_limit(tmp_path):
+    service = PDFService(photo_pdf(tmp_path / "fotos.pdf", 6, shared=False))
+    folder = tmp_path / "partes"
+    assert service.export_split_pdfs(page_manager(range(1, 7)), str(folder), SplitRule("size", 0.5))
+    files = sorted(folder.iterdir())
+    assert len(files) == 3
+    assert all(file.stat().st_size <= 0.5 * 1024 * 1024 for file in files)
+    assert sum(len(PdfReader(file).pages) for file in files) == 6
@@ -0,0 +1,142 @@
+import gc
+import os
+from multiprocessing import shared_memory
+
+import fitz  # PyMuPDF
+import numpy as np
+import pytest
+
+from services import process_render
+from services.export_sinks import MemorySink
+from services.pdf_service import PDFService
+from services.process_render import ProcessRenderer, SharedPixmapPool, render_processes_from_env
+from tests.conftest import page_manager, text_pdf
+
+pytestmark = pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="sin /dev/shm")
+
+
+def exists(segment: shared_memory.SharedMemory) -> bool:
+    return os.path.exists(f"/dev/shm/{segment.name.lstrip('/')}")
+
+
+def test_render_processes_from_env(monkeypatch):
+    monkeypatch.delenv("PDF_EXTRACTOR_RENDER_PROCESSES", raising=False)
+    assert render_processes_from_env() == 0
+    monkeypatch.setenv("PDF_EXTRACTOR_RENDER_PROCESSES", "3")
+    assert render_processes_from_env() == 3
+
+
+def test_pool_recycles_the_smallest_fitting_segment():
+    pool = SharedPixmapPool(keep=2)
+    small, large = pool.acquire(1000), pool.acquire(100_000)
+    assert small.size >= 1000 and large.size >= 100_000
+    pool.release(large)
+    pool.release(small)
+    assert pool.acquire(500) is small
+    assert pool.acquire(50_000) is large
+    pool.release(small)
+    pool.release(large)
+    pool.close()
+    assert not exists(small) and not exists(large)
+
+
+def test_full_pool_keeps_the_largest_segments():
+    pool = SharedPixmapPool(keep=1)
+    small, large = pool.acquire(1000), pool.acquire(100_000)
+    pool.release(small)
+    pool.release(large)
+    # El pequeño se descarta: la siguiente página pequeña reutiliza el grande
+    assert not exists(small)
+    assert pool.acquire(1000) is large
+    pool.release(large)
+    pool.close()
+
+
+def test_segment_viewed_by_an_image_is_closed_when_the_image_goes():
+    pool = SharedPixmapPool(keep=0)
+    segment = pool.acquire(1000)
+    view = np.frombuffer(segment.buf, dtype=np.uint8)
+    pool.release(segment)
+    # Borrado del sistema en el acto, pero el mapeo sigue mientras la vista exista
+    assert not exists(segment) and pool._retired == [segment]
+    view[0] = 1
+    del view
+    pool.acquire(10)  # Cualquier operación del pool recoge los segmentos ya libres
+    assert pool._retired == []
+    pool.close()
+
+
+@pytest.fixture(scope="module")
+def pdf(tmp_path_factory) -> str:
+    return text_pdf(tmp_path_factory.mktemp("proc") / "doc.pdf", pages=3)
+
+
+@pytest.fixture(scope="module")
+def renderer(pdf):
+    renderer = ProcessRenderer(pdf, processes=2)
+    yield renderer
+    renderer.close()
+
+
+@pytest.mark.parametrize("color_mode, mode, readonly", [("color", "RGB", False), ("gray", "L", True)])
+def test_process_render_matches_thread_render(pdf, renderer, color_mode, mode, readonly):
+    page = fitz.open(pdf)[1]
+    img = renderer.render(page, 2.0, color_mode)
+    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2), colorspace=fitz.csRGB if mode == "RGB" else fitz.csGRAY,
+                          alpha=False)
+    assert (img.mode, img.size) == (mode, (pix.width, pix.height))
+    assert img.tobytes() == pix.samples
+    # En grises la imagen mira el segmento compartido sin copiarlo
+    assert img.readonly == readonly
+
+
+def test_page_larger_than_the_segment_is_rendered_again(pdf, renderer, monkeypatch):
+    page = fitz.open(pdf)[0]
+    acquire, sizes = renderer.pool.acquire, []
+
+    def undersized(size):
+        # La primera reserva se queda corta: el proceso avisa y se repite con el tamaño exacto
+        sizes.append(size)
+        return shared_memory.SharedMemory(create=True, size=1000) if len(sizes) == 1 else acquire(size)
+    monkeypatch.setattr(renderer.pool, "acquire", undersized)
+    img = renderer.render(page, 3.0, "gray")
+    pix = page.get_pixmap(matrix=fitz.Matrix(3, 3), colorspace=fitz.csGRAY, alpha=False)
+    assert len(sizes) == 2 and sizes[1] == pix.stride * pix.height
+    assert img.tobytes() == pix.samples
+
+def test_segments_return_to_the_pool_and_are_removed_on_close(pdf):
+    renderer = ProcessRenderer(pdf, processes=1)
+    page = fitz.open(pdf)[0]
+    img = renderer.render(page, 1.0, "gray")
+    assert renderer.pool._free == []
+    del img
+    gc.collect()
+    (segment,) = renderer.pool._free
+    assert exists(segment)
+    renderer.close()
+    assert not exists(segment)
+
+
+def test_images_outlive_a_closed_pool(pdf):
+    renderer = ProcessRenderer(pdf, processes=1)
+    img = renderer.render(fitz.open(pdf)[0], 1.0, "gray")
+    expected = fitz.open(pdf)[0].get_pixmap(colorspace=fitz.csGRAY, alpha=False).samples
+    renderer.close()
+    assert img.tobytes() == expected
+    lingering = len(process_render._lingering_segments)
+    del img
+    gc.collect()
+    # Al desaparecer la imagen su segmento se borra del sistema; el mapeo dura lo que el proceso
+    assert len(process_render._lingering_segments) == lingering + 1
+    assert not exists(process_render._lingering_segments[-1])
+
+
+def test_export_with_render_processes_matches_threads(pdf):
+    outputs = []
+    for processes in (0, 2):
+        service = PDFService(pdf, render_processes=processes)
+        sink = MemorySink("doc")
+        assert service.export_images_to(page_manager([1, 2, 3], {2: 90}), sink, "PNG", color_mode="gray")
+        service.close()
+        outputs.append(sink.files)
+    assert outputs[0] == outputs[1] and len(outputs[0]) == 3
@@ -0,0 +1,63 @@
+import pytest
+
+from services.page_manager import PageManager
+from services.pdf_service import PDFService
+from services.resolution_policy import ExportResolutionPolicy
+
+A4 = (595, 842)
+
+
+def test_pages_within_budget_keep_nominal_dpi():
+    scale, dpi = ExportResolutionPolicy().scale_for(*A4)
+    assert dpi == 300 and scale == pytest.approx(300 / 72)
+
+
+def test_oversized_pages_are_capped_to_the_budget():
+    policy = ExportResolutionPolicy(max_pixels=1_000_000)
+    assert policy.exceeds_budget(*A4)
+    scale, dpi = policy.scale_for(*A4)
+    assert (A4[0] * scale) * (A4[1] * scale) == pytest.approx(1_000_000)
+    assert policy.is_capped(dpi)
+
+
+def test_byte_budget_depends_on_channels():
+    policy = ExportResolutionPolicy(max_pixels=None, max_bytes=3_000_000)
+    assert policy.pixel_budget(channels=3) == 1_000_000
+    assert policy.pixel_budget(channels=1) == 3_000_000
+    assert ExportResolutionPolicy(max_pixels=None).pixel_budget() is None
+
+
+def test_cap_never_goes_below_min_dpi():
+    _, dpi = ExportResolutionPolicy(max_pixels=1000, min_dpi=72).scale_for(*A4)
+    assert dpi == 72
+
+
+def test_native_target_dpi():
+    policy = ExportResolutionPolicy(native_min_dpi=100)
+    assert policy.target_dpi(None) == 300
+    assert policy.target_dpi(150) == 150
+    assert policy.target_dpi(50) == 100
+    assert policy.target_dpi(600) == 300
+    assert ExportResolutionPolicy(match_native=False).target_dpi(150) == 300
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("PDF_EXTRACTOR_MAX_MEGAPIXELS", "2.5")
+    monkeypatch.setenv("PDF_EXTRACTOR_OVERSIZE_MODE", "cap")
+    monkeypatch.setenv("PDF_EXTRACTOR_NATIVE_DPI", "0")
+    policy = ExportResolutionPolicy.from_env()
+    assert (policy.max_pixels, policy.mode, policy.match_native) == (2_500_000, "cap", False)
+
+
+def test_export_report_records_capped_pages(make_pdf, tmp_path):
+    path = make_pdf(lambda page: page.insert_text((72, 72), "hola"))
+    service = PDFService(path, resolution_policy=ExportResolutionPolicy(max_pixels=1_000_000, mode="cap"))
+    img = service.render_page(1, for_export=True)
+    # El pixmap redondea cada lado hacia arriba
+    assert img.width * img.height <= 1_000_000 * 1.01
+    assert img.info["dpi"][0] < 300
+
+    manager = PageManager()
+    manager.add_page(1)
+    assert service.export_as_images_zip(manager, str(tmp_path / "a.zip"), "JPEG")
+    assert service.last_export_report[1] == pytest.approx(img.info["dpi"][0])
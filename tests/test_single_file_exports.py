@@ -0,0 +1,83 @@
+import io
+import math
+import zlib
+
+import fitz  # PyMuPDF
+import numpy as np
+import pytest
+from PIL import Image, ImageSequence
+from pypdf import PdfReader
+
+from services.image_pdf import StreamingImagePDFWriter
+from services.pdf_service import PDFService
+from tests.conftest import A4, page_manager, text_pdf
+
+
+def jpeg(size, color) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def test_streaming_writer_produces_a_valid_pdf():
+    output = io.BytesIO()
+    writer = StreamingImagePDFWriter(output)
+    writer.add_page(200, 100, jpeg((40, 20), "red"), 40, 20)
+    # Página de 1 bit: filas empaquetadas (1 = blanco) y comprimidas
+    writer.add_page(72.5, 36, zlib.compress(bytes([0b11110000, 0b00000000]) * 4), 10, 4, grayscale=True,
+                    bits=1, image_filter="FlateDecode")
+    writer.close()
+
+    doc = fitz.open(stream=output.getvalue(), filetype="pdf")
+    assert [tuple(page.rect)[2:] for page in doc] == [(200, 100), (72.5, 36)]
+    pix = fitz.Pixmap(doc, doc[0].get_images()[0][0])
+    assert (pix.width, pix.height, pix.pixel(0, 0)) == (40, 20, pytest.approx((254, 0, 0), abs=2))
+    pix = fitz.Pixmap(doc, doc[1].get_images()[0][0])
+    assert (pix.n, pix.pixel(0, 0), pix.pixel(9, 0)) == (1, (255,), (0,))
+    assert len(PdfReader(io.BytesIO(output.getvalue())).pages) == 2
+
+
+@pytest.fixture
+def service(tmp_path) -> PDFService:
+    return PDFService(text_pdf(tmp_path / "doc.pdf", pages=3))
+
+
+@pytest.mark.parametrize("color_mode, mode, compression", [
+    ("color", "RGB", "tiff_lzw"), ("gray", "L", "tiff_lzw"), ("bitonal", "1", "group4")])
+def test_multipage_tiff(service, tmp_path, color_mode, mode, compression):
+    output = tmp_path / "doc.tiff"
+    assert service.export_as_multipage_tiff(page_manager([3, 1], {3: 90}), str(output), color_mode=color_mode,
+                                            encoding_profile="balanced")
+    with Image.open(output) as img:
+        frames = [(frame.mode, frame.size, frame.info.get("compression")) for frame in ImageSequence.Iterator(img)]
+    portrait = tuple(math.ceil(side * 300 / 72) for side in A4)
+    # Páginas en orden de documento; la 3 sale girada
+    assert [size for _, size, _ in frames] == [portrait, portrait[::-1]]
+    assert {(frame_mode, frame_compression) for frame_mode, _, frame_compression in frames} == {(mode, compression)}
+    assert service.last_encoding_report["pages"] == 2
+
+
+@pytest.mark.parametrize("color_mode, colorspace", [("color", 3), ("gray", 1), ("bitonal", 1)])
+def test_image_pdf(service, tmp_path, color_mode, colorspace):
+    output = tmp_path / "aplanado.pdf"
+    assert service.export_as_image_pdf(page_manager([1, 2, 3], {2: 90}), str(output), color_mode=color_mode)
+    doc = fitz.open(str(output))
+    assert [tuple(round(v) for v in page.rect[2:]) for page in doc] == [A4, A4[::-1], A4]
+    for page in doc:
+        # Solo una imagen por página, sin texto
+        assert page.get_text().strip() == ""
+        (image,) = page.get_images(full=True)
+        assert fitz.Pixmap(doc, image[0]).n == colorspace
+    # El PDF aplanado se ve como el original
+    original = fitz.open(service.pdf_path)[0].get_pixmap(colorspace=fitz.csGRAY)
+    flattened = doc[0].get_pixmap(colorspace=fitz.csGRAY)
+    shape = (min(original.height, flattened.height), min(original.width, flattened.width))
+    pixels = [np.frombuffer(pix.samples, np.uint8).reshape(pix.height, pix.width)[:shape[0], :shape[1]]
+              for pix in (original, flattened)]
+    assert np.abs(pixels[0].astype(int) - pixels[1]).mean() < 2
+
+
+def test_empty_selection_writes_nothing(service, tmp_path):
+    assert not service.export_as_multipage_tiff(page_manager([]), str(tmp_path / "a.tiff"))
+    assert not service.export_as_image_pdf(page_manager([]), str(tmp_path / "a.pdf"))
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["doc.pdf"]
@@ -0,0 +1,36 @@
+import json
+
+from services.pdf_service import PDFService
+from tests.conftest import page_manager, text_pdf
+
+
+def test_txt_export_keeps_page_order(tmp_path):
+    service = PDFService(text_pdf(tmp_path / "a.pdf", pages=12))
+    output = tmp_path / "a.txt"
+    assert service.export_text(page_manager([9, 2, 11, 5]), str(output), "txt", workers=4)
+    text = output.read_text(encoding="utf-8")
+    headers = [line for line in text.splitlines() if line.startswith("=====")]
+    assert headers == [f"===== Página {n} =====" for n in (2, 5, 9, 11)]
+    assert text.index("pagina2 ") < text.index("pagina5 ") < text.index("pagina9 ")
+
+
+def test_json_export_has_blocks_and_rotation(tmp_path):
+    service = PDFService(text_pdf(tmp_path / "a.pdf", pages=3))
+    output = tmp_path / "a.json"
+    progress = []
+    assert service.export("text_json", page_manager([1, 3], {3: 90}), str(output),
+                          progress_callback=lambda *args: progress.append(args) or True)
+    data = json.loads(output.read_text(encoding="utf-8"))
+    assert data["document"] == "a.pdf"
+    assert [(p["page"], p["rotation"]) for p in data["pages"]] == [(1, 0), (3, 90)]
+    block = data["pages"][1]["blocks"][0]
+    assert block["text"].startswith("pagina3 ") and len(block["bbox"]) == 4
+    assert progress[-1][:2] == (2, 2)
+
+
+def test_empty_selection_writes_nothing(tmp_path):
+    service = PDFService(text_pdf(tmp_path / "a.pdf"))
+    manager = page_manager([1])
+    manager.delete_page(1)
+    assert not service.export_text(manager, str(tmp_path / "a.txt"))
+    assert not (tmp_path / "a.txt").exists()
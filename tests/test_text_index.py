@@ -0,0 +1,59 @@
+import fitz  # PyMuPDF
+
+from services.page_parser import PageParser
+from services.pdf_service import PDFService
+from services.text_index import INDEX_FILENAME, TextIndex, tokenize
+
+
+def invoice_pdf(path):
+    doc = fitz.open()
+    for text in ("Factura 4471 de Cliente", "Página de anexo", "factura 9000", "ANEXO factura 4471"):
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(str(path))
+    return str(path)
+
+
+def test_tokenize_folds_case_and_accents():
+    assert tokenize("Página, PAGINA; pagína_2") == ["pagina", "pagina", "pagina_2"]
+
+
+def test_search_requires_every_word(tmp_path):
+    index = PDFService(invoice_pdf(tmp_path / "f.pdf")).get_text_index()
+    assert index.search("factura") == [1, 3, 4]
+    assert index.search("factura 4471") == [1, 4]
+    assert index.search("pagina") == [2]
+    assert index.search("inexistente factura") == []
+    assert index.search("  ") == []
+
+
+def test_parser_selects_pages_by_content(tmp_path):
+    service = PDFService(invoice_pdf(tmp_path / "f.pdf"))
+    assert PageParser.parse('"factura 4471", 2', service.get_text_index()) == [1, 2, 4]
+
+
+def test_index_is_persisted_by_fingerprint(tmp_path, cache_dir, monkeypatch):
+    path = invoice_pdf(tmp_path / "f.pdf")
+    first = PDFService(path)
+    first.get_text_index()
+    assert (cache_dir / first.fingerprint / INDEX_FILENAME).exists()
+
+    # Otra instancia (otro arranque) carga el índice sin volver a extraer texto
+    def no_build(*args, **kwargs):
+        raise AssertionError("El índice debía cargarse de la caché")
+    monkeypatch.setattr(TextIndex, "build", no_build)
+    second = PDFService(path)
+    assert not second.is_text_index_ready()
+    assert second.get_text_index().search("anexo") == [2, 4]
+    assert second.is_text_index_ready()
+
+
+def test_stale_or_corrupt_index_is_ignored(tmp_path, cache_dir):
+    path = invoice_pdf(tmp_path / "f.pdf")
+    fingerprint = PDFService(path).fingerprint
+    index_path = cache_dir / fingerprint / INDEX_FILENAME
+    index_path.parent.mkdir(parents=True)
+    TextIndex("otra", 1, {"factura": [1]}).save(index_path)
+    assert TextIndex.load(index_path, fingerprint) is None
+    index_path.write_bytes(b"roto")
+    assert TextIndex.load(index_path, fingerprint) is None
+    assert PDFService(path).get_text_index().search("factura") == [1, 3, 4]
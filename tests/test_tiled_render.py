@@ -0,0 +1,103 @@
+import io
+import zlib
+
+import fitz  # PyMuPDF
+import numpy as np
+import pytest
+from PIL import Image
+
+from services.pdf_service import PDFService
+from services.resolution_policy import ExportResolutionPolicy
+from services.tiled_render import StreamingPNGWriter
+
+
+def write_png(pixels: np.ndarray, channels: int, bit_depth: int = 8, strip: int = 7, **kwargs) -> bytes:
+    height, width = pixels.shape[:2]
+    output = io.BytesIO()
+    writer = StreamingPNGWriter(output, width, height, channels=channels, bit_depth=bit_depth,
+                                chunk_size=64, **kwargs)
+    rows = pixels if bit_depth == 8 else np.packbits(pixels, axis=1)
+    for y in range(0, height, strip):
+        block = rows[y:y + strip]
+        writer.write_rows(block.tobytes(), len(block))
+    writer.close()
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("channels, mode", [(3, "RGB"), (1, "L")])
+def test_round_trip_through_pillow(channels, mode):
+    rng = np.random.default_rng(0)
+    shape = (45, 33, 3) if channels == 3 else (45, 33)
+    pixels = rng.integers(0, 256, shape, dtype=np.uint8)
+    img = Image.open(io.BytesIO(write_png(pixels, channels, dpi=150)))
+    assert img.mode == mode
+    assert np.array_equal(np.asarray(img), pixels)
+    assert img.info["dpi"] == pytest.approx((150, 150), abs=0.05)
+
+
+def test_round_trip_one_bit():
+    pixels = np.random.default_rng(1).integers(0, 2, (20, 13), dtype=np.uint8).astype(bool)
+    img = Image.open(io.BytesIO(write_png(pixels, channels=1, bit_depth=1)))
+    assert img.mode == "1"
+    assert np.array_equal(np.asarray(img), pixels)
+
+
+def test_rejects_wrong_strip_sizes():
+    writer = StreamingPNGWriter(io.BytesIO(), 4, 2, channels=1)
+    with pytest.raises(ValueError):
+        writer.write_rows(b"\x00" * 5, 1)
+    writer.write_rows(b"\x00" * 4, 1)
+    with pytest.raises(ValueError):
+        writer.write_rows(b"\x00" * 8, 2)
+    with pytest.raises(ValueError, match="incompleto"):
+        writer.close()
+
+
+def test_idat_chunks_hold_one_zlib_stream():
+    data = write_png(np.zeros((30, 30), dtype=np.uint8), channels=1)
+    chunks, pos = [], 8
+    while pos < len(data):
+        length = int.from_bytes(data[pos:pos + 4], "big")
+        chunks.append((data[pos + 4:pos + 8], data[pos + 8:pos + 8 + length]))
+        pos += 12 + length
+    assert [tag for tag, _ in chunks][0] == b"IHDR" and chunks[-1][0] == b"IEND"
+    stream = b"".join(body for tag, body in chunks if tag == b"IDAT")
+    assert zlib.decompress(stream) == (b"\x00" + b"\x00" * 30) * 30
+
+
+@pytest.mark.parametrize("color_mode", ["color", "gray"])
+@pytest.mark.parametrize("rotation", [0, 90])
+def test_tiled_render_matches_full_render(make_pdf, color_mode, rotation):
+    def draw(page):
+        page.insert_text((72, 100), "Franjas " * 8, fontsize=14)
+        page.draw_rect((100, 200, 400, 600), color=(1, 0, 0), fill=(0, 0, 1))
+    policy = ExportResolutionPolicy(dpi=72, tile_pixels=595 * 37)
+    service = PDFService(make_pdf(draw), resolution_policy=policy)
+    output = io.BytesIO()
+    assert service.render_page_tiled(1, output, rotation=rotation, color_mode=color_mode) == 72
+
+    # Mismo render de la página entera, con la rotación en la matriz como las franjas
+    colorspace = fitz.csRGB if color_mode == "color" else fitz.csGRAY
+    pix = service._get_fitz_doc()[0].get_pixmap(matrix=fitz.Matrix(1, 1).prerotate(rotation),
+                                               colorspace=colorspace, alpha=False)
+    full = Image.frombytes("RGB" if color_mode == "color" else "L", (pix.width, pix.height), pix.samples)
+    tiled = Image.open(output)
+    assert tiled.size == full.size
+    difference = np.abs(np.asarray(tiled, dtype=int) - np.asarray(full, dtype=int))
+    assert difference.max() <= 1
+
+
+def test_oversized_png_pages_are_exported_by_strips(make_pdf, tmp_path):
+    import zipfile
+    from services.page_manager import PageManager
+
+    policy = ExportResolutionPolicy(dpi=144, max_pixels=100_000, tile_pixels=50_000)
+    service = PDFService(make_pdf(lambda page: page.insert_text((72, 72), "grande")), resolution_policy=policy)
+    manager = PageManager()
+    manager.add_page(1)
+    assert service.export_as_images_zip(manager, str(tmp_path / "a.zip"), "PNG")
+    with zipfile.ZipFile(tmp_path / "a.zip") as archive:
+        img = Image.open(io.BytesIO(archive.read(archive.namelist()[0])))
+    # Resolución completa aunque la página no quepa en el presupuesto
+    assert img.size == (595 * 2, 842 * 2)
+    assert service.last_export_report[1] == 144
@@ -2,6 +2,7 @@ import flet as ft
 from typing import Callable, Optional
 from pathlib import Path
 from datetime import datetime
+from services.pdf_split import SplitRule
 
 class ExportOptions:
     """Componente para opciones de exportación"""
@@ -17,8 +18,16 @@ class ExportOptions:
             options=[
                 ft.dropdown.Option(key="pdf_combined", text="PDF único"),
                 ft.dropdown.Option(key="pdf_individual", text="PDFs individuales"),
+                ft.dropdown.Option(key="pdf_split", text="PDF dividido"),
                 ft.dropdown.Option(key="images_zip", text="Imágenes (ZIP)"),
-                ft.dropdown.Option(key="images_folder", text="Imágenes (Carpeta)")
+                ft.dropdown.Option(key="images_folder", text="Imágenes (Carpeta)"),
+                ft.dropdown.Option(key="images_tar", text="Imágenes (TAR)"),
+                ft.dropdown.Option(key="images_tiff", text="TIFF multipágina"),
+                ft.dropdown.Option(key="images_pdf", text="PDF de imágenes"),
+                ft.dropdown.Option(key="embedded_zip", text="Imágenes incrustadas (ZIP)"),
+                ft.dropdown.Option(key="embedded_folder", text="Imágenes incrustadas (Carpeta)"),
+                ft.dropdown.Option(key="text_txt", text="Texto (TXT)"),
+                ft.dropdown.Option(key="text_json", text="Texto (JSON)")
             ],
             value="pdf_combined",
             width=200
@@ -29,13 +38,82 @@ class ExportOptions:
             options=[
                 ft.dropdown.Option(key="PNG", text="PNG"),
                 ft.dropdown.Option(key="JPEG", text="JPEG"),
-                ft.dropdown.Option(key="TIFF", text="TIFF")
+                ft.dropdown.Option(key="TIFF", text="TIFF"),
+                ft.dropdown.Option(key="WEBP", text="WebP")
             ],
             value="PNG",
             width=150,
             visible=False  # Solo visible para exportación de imágenes
         )
         
+        self.encoding_profile = ft.Dropdown(
+            label="Perfil de codificación",
+            options=[
+                ft.dropdown.Option(key="fast", text="Rápido"),
+                ft.dropdown.Option(key="balanced", text="Equilibrado"),
+                ft.dropdown.Option(key="smallest", text="Menor tamaño")
+            ],
+            value="balanced",
+            width=180,
+            visible=False  # Solo visible para exportación de imágenes
+        )
+        
+        self.color_mode = ft.Dropdown(
+            label="Color",
+            options=[
+                ft.dropdown.Option(key="color", text="Color"),
+                ft.dropdown.Option(key="gray", text="Escala de grises"),
+                ft.dropdown.Option(key="bitonal", text="Blanco y negro")
+            ],
+            value="color",
+            width=170,
+            tooltip="Blanco y negro: 1 bit por píxel (TIFF con CCITT G4), ideal para archivar escaneos de texto",
+            visible=False  # Solo visible para exportación de imágenes
+        )
+        
+        self.prefer_embedded = ft.Checkbox(
+            label="Escaneos: guardar la imagen original",
+            tooltip="Las páginas que son una sola imagen se copian sin re-rasterizar ni recodificar",
+            value=False,
+            visible=False  # Solo visible para exportación de imágenes
+        )
+        
+        self.deduplicate = ft.Checkbox(
+            label="Guardar una sola vez las páginas idénticas",
+            tooltip="Portadas y plantillas repetidas no se renderizan ni se guardan de nuevo",
+            value=False,
+            visible=False  # Solo visible para exportación de imágenes
+        )
+        
+        self.split_mode = ft.Dropdown(
+            label="Dividir",
+            options=[
+                ft.dropdown.Option(key="pages", text="Cada N páginas"),
+                ft.dropdown.Option(key="bookmarks", text="Por marcadores"),
+                ft.dropdown.Option(key="size", text="Por tamaño (MB)")
+            ],
+            value="pages",
+            width=180,
+            on_change=self._on_split_mode_change,
+            visible=False  # Solo visible para PDF dividido
+        )
+        
+        self.split_value = ft.TextField(
+            label="Páginas por archivo",
+            value="10",
+            width=160,
+            keyboard_type=ft.KeyboardType.NUMBER,
+            visible=False  # Solo visible para PDF dividido
+        )
+        
+        self.incremental = ft.Checkbox(
+            label="Incremental: solo páginas nuevas o cambiadas",
+            tooltip="Omite los archivos que una exportación anterior a la misma carpeta dejó vigentes "
+                    "(también reanuda una exportación interrumpida)",
+            value=False,
+            visible=False  # Solo visible para exportaciones de páginas a carpeta
+        )
+        
         self.output_path = ft.TextField(
             label="Ruta de salida",
             read_only=True,
@@ -64,7 +142,11 @@ class ExportOptions:
             content=ft.Column(
                 controls=[
                     ft.Text("Opciones de Exportación", size=16, weight=ft.FontWeight.BOLD),
-                    ft.Row([self.export_format, self.image_format]),
+                    ft.Row([self.export_format, self.image_format, self.encoding_profile, self.color_mode,
+                            self.split_mode, self.split_value]),
+                    self.prefer_embedded,
+                    self.deduplicate,
+                    self.incremental,
                     ft.Row([
                         self.output_path,
                         self.browse_button
@@ -97,22 +179,49 @@ class ExportOptions:
         self.export_button.disabled = True
         
         # Mostrar/ocultar opciones de imagen según el formato
-        is_image_format = format_key in ["images_zip", "images_folder"]
+        is_image_format = format_key in ["images_zip", "images_folder", "images_tar"]
+        # Los formatos de un solo archivo de imágenes fijan su codificación, pero admiten perfil y color
+        is_single_image_file = format_key in ["images_tiff", "images_pdf"]
         self.image_format.visible = is_image_format
+        self.encoding_profile.visible = is_image_format or is_single_image_file
+        self.color_mode.visible = is_image_format or is_single_image_file
+        self.prefer_embedded.visible = is_image_format
+        self.deduplicate.visible = is_image_format
+        self.incremental.visible = format_key in ["images_folder", "pdf_individual"]
+        self.split_mode.visible = format_key == "pdf_split"
+        self.split_value.visible = format_key == "pdf_split"
         
         # Actualizar texto del botón de navegación
-        if format_key in ["pdf_combined"]:
+        if format_key in ["pdf_combined", "images_pdf"]:
             self.output_path.label = "Archivo de salida"
             self.output_path.hint_text = "Selecciona dónde guardar el PDF"
-        elif format_key == "images_zip":
+        elif format_key == "images_tiff":
+            self.output_path.label = "Archivo TIFF de salida"
+            self.output_path.hint_text = "Selecciona dónde guardar el TIFF"
+        elif format_key in ["images_zip", "embedded_zip"]:
             self.output_path.label = "Archivo ZIP de salida"
             self.output_path.hint_text = "Selecciona dónde guardar el ZIP"
+        elif format_key == "images_tar":
+            self.output_path.label = "Archivo TAR de salida"
+            self.output_path.hint_text = "Selecciona dónde guardar el TAR"
+        elif format_key in ["text_txt", "text_json"]:
+            self.output_path.label = "Archivo de texto de salida"
+            self.output_path.hint_text = "Selecciona dónde guardar el texto"
         else:
             self.output_path.label = "Carpeta de salida"
             self.output_path.hint_text = "Selecciona carpeta de destino"
         
         self.page.update()
     
+    def _on_split_mode_change(self, e):
+        """Ajustar el significado del valor al criterio de división"""
+        labels = {"pages": "Páginas por archivo", "bookmarks": "Nivel de marcador", "size": "Tamaño máximo (MB)"}
+        defaults = {"pages": "10", "bookmarks": "1", "size": "10"}
+        self.split_value.label = labels[self.split_mode.value]
+        self.split_value.value = defaults[self.split_mode.value]
+        self.split_value.error_text = None
+        self.page.update()
+    
     def _on_browse(self, e):
         """Manejar clic en botón de navegación"""
         format_key = self.export_format.value
@@ -126,14 +235,40 @@ class ExportOptions:
                 file_name=suggested_name,
                 allowed_extensions=["pdf"]
             )
-        elif format_key in ["images_zip"]:
+        elif format_key in ["images_tiff", "images_pdf"]:
+            # Para un único archivo con todas las páginas renderizadas
+            extension = "tif" if format_key == "images_tiff" else "pdf"
+            suggested_name = f"{self.base_filename}_imagenes_{timestamp}.{extension}"
+            self.folder_picker.save_file(
+                dialog_title="Guardar como...",
+                file_name=suggested_name,
+                allowed_extensions=[extension]
+            )
+        elif format_key in ["images_zip", "embedded_zip"]:
             # Para ZIP de imágenes, mostrar diálogo de guardar archivo
-            suggested_name = f"{self.base_filename}_imagenes_{timestamp}.zip"
+            suffix = "imagenes" if format_key == "images_zip" else "imagenes_originales"
+            suggested_name = f"{self.base_filename}_{suffix}_{timestamp}.zip"
             self.folder_picker.save_file(
                 dialog_title="Guardar como...",
                 file_name=suggested_name,
                 allowed_extensions=["zip"]
             )
+        elif format_key == "images_tar":
+            suggested_name = f"{self.base_filename}_imagenes_{timestamp}.tar"
+            self.folder_picker.save_file(
+                dialog_title="Guardar como...",
+                file_name=suggested_name,
+                allowed_extensions=["tar"]
+            )
+        elif format_key in ["text_txt", "text_json"]:
+            # Para texto, mostrar diálogo de guardar archivo con su extensión
+            extension = "txt" if format_key == "text_txt" else "json"
+            suggested_name = f"{self.base_filename}_texto_{timestamp}.{extension}"
+            self.folder_picker.save_file(
+                dialog_title="Guardar texto como...",
+                file_name=suggested_name,
+                allowed_extensions=[extension]
+            )
         else:
             # Para otros formatos, seleccionar carpeta
             self.folder_picker.get_directory_path(dialog_title="Seleccionar carpeta de destino")
@@ -161,12 +296,35 @@ class ExportOptions:
         output_path = self.output_path.value
         format_key = self.export_format.value
         
-        if format_key == "pdf_combined":
+        if format_key in ["pdf_combined", "images_pdf"]:
             if not output_path.lower().endswith(".pdf"):
                 output_path += ".pdf"
-        elif format_key == "images_zip":
+        elif format_key == "images_tiff":
+            if not output_path.lower().endswith((".tif", ".tiff")):
+                output_path += ".tif"
+        elif format_key in ["images_zip", "embedded_zip"]:
             if not output_path.lower().endswith(".zip"):
                 output_path += ".zip"
+        elif format_key == "images_tar":
+            if not output_path.lower().endswith(".tar"):
+                output_path += ".tar"
+        elif format_key == "text_txt":
+            if not output_path.lower().endswith(".txt"):
+                output_path += ".txt"
+        elif format_key == "text_json":
+            if not output_path.lower().endswith(".json"):
+                output_path += ".json"
+        
+        # Validar el criterio de división antes de lanzar la exportación
+        split = None
+        if format_key == "pdf_split":
+            try:
+                split = SplitRule.parse(f"{self.split_mode.value}:{self.split_value.value}")
+            except ValueError as ex:
+                self.split_value.error_text = str(ex)
+                self.page.update()
+                return
+            self.split_value.error_text = None
         
         # Actualizar el campo de texto con la ruta corregida
         self.output_path.value = output_path
@@ -176,7 +334,13 @@ class ExportOptions:
         export_config = {
             'format': format_key,
             'output_path': output_path,
-            'image_format': self.image_format.value if self.image_format.visible else 'PNG'
+            'image_format': self.image_format.value if self.image_format.visible else 'PNG',
+            'encoding_profile': self.encoding_profile.value if self.encoding_profile.visible else 'balanced',
+            'color_mode': self.color_mode.value if self.color_mode.visible else 'color',
+            'prefer_embedded': bool(self.prefer_embedded.value) and self.prefer_embedded.visible,
+            'deduplicate': bool(self.deduplicate.value) and self.deduplicate.visible,
+            'incremental': bool(self.incremental.value) and self.incremental.visible,
+            'split': split
         }
         
         self.on_export(export_config)
@@ -197,6 +361,22 @@ class ExportOptions:
         self.export_format.value = "pdf_combined"
         self.image_format.value = "PNG"
         self.image_format.visible = False
+        self.encoding_profile.value = "balanced"
+        self.encoding_profile.visible = False
+        self.color_mode.value = "color"
+        self.color_mode.visible = False
+        self.prefer_embedded.value = False
+        self.prefer_embedded.visible = False
+        self.deduplicate.value = False
+        self.deduplicate.visible = False
+        self.incremental.value = False
+        self.incremental.visible = False
+        self.split_mode.value = "pages"
+        self.split_mode.visible = False
+        self.split_value.label = "Páginas por archivo"
+        self.split_value.value = "10"
+        self.split_value.error_text = None
+        self.split_value.visible = False
         self.output_path.hint_text = "Selecciona dónde guardar el PDF"
         self.page.update()
     
@@ -206,10 +386,16 @@ class ExportOptions:
         self.export_button.disabled = True
         # Actualizar hint text según el formato actual
         format_key = self.export_format.value
-        if format_key == "pdf_combined":
+        if format_key in ["pdf_combined", "images_pdf"]:
             self.output_path.hint_text = "Selecciona dónde guardar el PDF"
-        elif format_key == "images_zip":
+        elif format_key == "images_tiff":
+            self.output_path.hint_text = "Selecciona dónde guardar el TIFF"
+        elif format_key in ["images_zip", "embedded_zip"]:
             self.output_path.hint_text = "Selecciona dónde guardar el ZIP"
+        elif format_key == "images_tar":
+            self.output_path.hint_text = "Selecciona dónde guardar el TAR"
+        elif format_key in ["text_txt", "text_json"]:
+            self.output_path.hint_text = "Selecciona dónde guardar el texto"
         else:
             self.output_path.hint_text = "Selecciona carpeta de destino"
         self.page.update()
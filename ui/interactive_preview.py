@@ -2,7 +2,7 @@ import flet as ft
 from PIL import Image
 import io
 import base64
-from typing import Callable, Optional
+from typing import Callable, List, Optional
 from services.page_manager import PageManager, PageInfo
 
 class InteractivePreview:
@@ -17,6 +17,8 @@ class InteractivePreview:
             expand=True,
             spacing=10
         )
+        # Grupos de duplicadas mostrados (None = vista normal de páginas)
+        self._duplicate_groups = None
         
     def get_control(self):
         """Obtener el control principal del preview"""
@@ -24,6 +26,7 @@ class InteractivePreview:
     
     def render_pages(self, page_manager: PageManager):
         """Renderizar todas las páginas del manager"""
+        self._duplicate_groups = None
         self.preview_container.controls.clear()
         
         active_pages = page_manager.get_active_pages()
@@ -60,6 +63,90 @@ class InteractivePreview:
         
         self.page.update()
     
+    def render_duplicate_groups(self, groups: List[List[int]], page_manager: PageManager):
+        """Mostrar las páginas duplicadas agrupadas; cada grupo se puede reducir a su primera página"""
+        self._duplicate_groups = groups
+        self.preview_container.controls.clear()
+        
+        # Solo los grupos que aún tienen dos o más páginas activas
+        active_groups = []
+        for group in groups:
+            active = [n for n in group if page_manager.get_page_image(n) is not None]
+            if len(active) > 1:
+                active_groups.append(active)
+        
+        self.preview_container.controls.append(
+            ft.Row(
+                controls=[
+                    ft.Text(
+                        f"{len(active_groups)} grupos de páginas duplicadas",
+                        size=14,
+                        weight=ft.FontWeight.BOLD
+                    ),
+                    ft.TextButton(
+                        "Conservar solo la primera de cada grupo",
+                        icon=ft.Icons.FILTER_1,
+                        on_click=lambda e: self._keep_first(active_groups, page_manager),
+                        disabled=not active_groups
+                    ),
+                    ft.TextButton(
+                        "Ver todas las páginas",
+                        icon=ft.Icons.GRID_VIEW,
+                        on_click=lambda e: self.render_pages(page_manager)
+                    )
+                ],
+                spacing=15
+            )
+        )
+        
+        for number, group in enumerate(active_groups, 1):
+            pages_row = ft.Row(
+                controls=[
+                    self._create_page_preview(page_manager.get_page_info(n), page_manager)
+                    for n in group
+                ],
+                scroll=ft.ScrollMode.AUTO,
+                spacing=15
+            )
+            self.preview_container.controls.append(
+                ft.Column(
+                    controls=[
+                        ft.Row(
+                            controls=[
+                                ft.Text(
+                                    f"Grupo {number}: páginas {', '.join(map(str, group))}",
+                                    size=12,
+                                    color=ft.Colors.GREY_700
+                                ),
+                                ft.TextButton(
+                                    "Conservar solo la primera",
+                                    on_click=lambda e, g=group: self._keep_first([g], page_manager)
+                                )
+                            ]
+                        ),
+                        pages_row
+                    ],
+                    spacing=5
+                )
+            )
+        
+        self.page.update()
+    
+    def _keep_first(self, groups: List[List[int]], page_manager: PageManager):
+        """Eliminar de una vez todas las páginas de los grupos salvo la primera de cada uno"""
+        removed = page_manager.delete_pages(n for group in groups for n in group[1:])
+        self._refresh(page_manager)
+        
+        if self.on_page_change:
+            self.on_page_change(f"{removed} páginas duplicadas eliminadas")
+    
+    def _refresh(self, page_manager: PageManager):
+        """Volver a dibujar la vista actual (páginas o grupos de duplicadas)"""
+        if self._duplicate_groups is not None:
+            self.render_duplicate_groups(self._duplicate_groups, page_manager)
+        else:
+            self.render_pages(page_manager)
+    
     def _create_page_preview(self, page_info: PageInfo, page_manager: PageManager):
         """Crear el preview de una página individual"""
         # Convertir imagen a base64
@@ -145,7 +232,7 @@ class InteractivePreview:
     def _rotate_page(self, page_number: int, page_manager: PageManager):
         """Rotar una página específica"""
         page_manager.rotate_page(page_number, 90)
-        self.render_pages(page_manager)
+        self._refresh(page_manager)
         
         if self.on_page_change:
             self.on_page_change(f"Página {page_number} rotada 90°")
@@ -153,13 +240,14 @@ class InteractivePreview:
     def _delete_page(self, page_number: int, page_manager: PageManager):
         """Eliminar una página específica"""
         page_manager.delete_page(page_number)
-        self.render_pages(page_manager)
+        self._refresh(page_manager)
         
         if self.on_page_change:
             self.on_page_change(f"Página {page_number} eliminada")
     
     def clear(self):
         """Limpiar el preview"""
+        self._duplicate_groups = None
         self.preview_container.controls.clear()
         self.page.update()
     
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Modo de vigilancia de carpeta: exporta automáticamente cada PDF que llega
+"""
+
+import argparse
+from services.log import configure_logging
+from services.folder_watcher import FolderWatcher, WatchConfig, logger
+from services.atomic_output import FSYNC_MODES, fsync_mode_from_env
+from services.color_modes import COLOR_MODES, DEFAULT_COLOR_MODE
+from services.encoding_profiles import DEFAULT_PROFILE, ENCODING_PROFILES, IMAGE_FORMATS
+from services.page_analysis import BlankPageDetector
+from services.pdf_service import EXPORT_OUTPUT_NAMES
+from services.pdf_split import SplitRule
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vigilar una carpeta y exportar los PDFs nuevos")
+    parser.add_argument("input_dir", help="Carpeta donde llegan los PDFs")
+    parser.add_argument("output_dir", help="Carpeta donde se guardan los resultados")
+    parser.add_argument("--pages", default="", help="Páginas a exportar (ej: 1,3,5-7); vacío = todas")
+    parser.add_argument("--format", dest="export_format", default="pdf_combined",
+                        choices=list(EXPORT_OUTPUT_NAMES),
+                        help="Formato de exportación")
+    parser.add_argument("--image-format", default="PNG", choices=list(IMAGE_FORMATS),
+                        help="Formato de imagen para las exportaciones de imágenes")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, choices=list(ENCODING_PROFILES),
+                        help="Perfil de codificación: rapidez frente a tamaño en disco")
+    parser.add_argument("--color", default=DEFAULT_COLOR_MODE, choices=list(COLOR_MODES),
+                        help="Modo de color de las imágenes (bitonal: 1 bit, TIFF con CCITT G4)")
+    parser.add_argument("--split", type=SplitRule.parse, default=None,
+                        help="Criterio de pdf_split: pages:N, bookmarks:NIVEL o size:MB")
+    parser.add_argument("--embedded", action="store_true",
+                        help="En páginas escaneadas, guardar la imagen original sin re-rasterizar")
+    parser.add_argument("--dedup", action="store_true",
+                        help="Guardar una sola vez las páginas idénticas (enlaces duros en carpetas)")
+    parser.add_argument("--remove-blank", action="store_true",
+                        help="Quitar las páginas en blanco antes de exportar")
+    parser.add_argument("--blank-threshold", type=float, default=BlankPageDetector.ink_threshold,
+                        help="Fracción máxima de celdas con tinta de una página en blanco")
+    parser.add_argument("--fsync", default=fsync_mode_from_env(), choices=list(FSYNC_MODES),
+                        help="Durabilidad de las salidas: sincronizar cada archivo, por grupos o nunca")
+    parser.add_argument("--workers", type=int, default=2, help="Documentos procesados a la vez")
+    parser.add_argument("--interval", type=float, default=2.0, help="Segundos entre revisiones")
+    parser.add_argument("--settle", type=float, default=5.0,
+                        help="Segundos sin cambios para considerar un archivo completo")
+    parser.add_argument("--manifest", help="Ruta del manifiesto de procesados")
+    parser.add_argument("--once", action="store_true", help="Procesar lo existente y terminar")
+    parser.add_argument("--log-level", default=None, help="Nivel de log (DEBUG, INFO, WARNING...)")
+    parser.add_argument("--log-json", action="store_true", default=None, help="Log estructurado en JSON")
+    args = parser.parse_args()
+    configure_logging(args.log_level, args.log_json)
+
+    watcher = FolderWatcher(WatchConfig(
+        input_dir=args.input_dir,
+        output_dir=args.output_dir,
+        pages=args.pages,
+        export_format=args.export_format,
+        image_format=args.image_format,
+        encoding_profile=args.profile,
+        prefer_embedded=args.embedded,
+        deduplicate=args.dedup,
+        color_mode=args.color,
+        split=args.split,
+        max_workers=args.workers,
+        poll_interval=args.interval,
+        settle_time=args.settle,
+        manifest_path=args.manifest,
+        remove_blank=args.remove_blank,
+        blank_threshold=args.blank_threshold,
+        fsync=args.fsync,
+    ))
+    logger.info("Vigilando carpeta (Ctrl+C para detener)", extra={"context": {"input_dir": args.input_dir}})
+    try:
+        watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    main()